@@ -0,0 +1,128 @@
+"""
+Deterministic synthetic markdown corpus generator.
+
+    python3 bench/corpus.py OUT_DIR [--pages N] [--blocks N] [--seed S] [--inline-density D]
+
+The same arguments always produce byte-identical files.
+"""
+import argparse
+import random
+from pathlib import Path
+
+WORDS = (
+    "elf ring hobbit shire mountain river forest wizard song road tale king "
+    "sword shadow light star tower gate ship sea horse council fellowship "
+    "journey return age stone tree valley fire ice storm dawn dusk"
+).split()
+
+# Relative weight of each block kind
+DEFAULT_MIX = {
+    "paragraph": 10,
+    "heading": 3,
+    "unordered_list": 3,
+    "ordered_list": 2,
+    "quote": 2,
+    "code": 2,
+}
+
+
+def _words(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _inline(rng: random.Random, n_words: int, density: float) -> str:
+    """A run of text where each word is replaced by inline markup with probability `density`."""
+    out = []
+    for _ in range(n_words):
+        word = rng.choice(WORDS)
+        if rng.random() >= density:
+            out.append(word)
+            continue
+        kind = rng.randrange(5)
+        if kind == 0:
+            out.append(f"**{word}**")
+        elif kind == 1:
+            out.append(f"_{word}_")
+        elif kind == 2:
+            out.append(f"`{word}`")
+        elif kind == 3:
+            out.append(f"[{word}](/{rng.choice(WORDS)}/{word})")
+        else:
+            out.append(f"![{word}](/images/{word}.png)")
+    return " ".join(out)
+
+
+def generate_markdown(
+    rng: random.Random,
+    blocks: int = 40,
+    mix: dict[str, int] | None = None,
+    inline_density: float = 0.15,
+) -> str:
+    """One page: an H1 followed by `blocks` blocks drawn from `mix`."""
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    parts = [f"# {_words(rng, 4).title()}"]
+    for kind in rng.choices(kinds, weights, k=blocks):
+        if kind == "heading":
+            parts.append("#" * rng.randint(2, 6) + " " + _inline(rng, 5, inline_density))
+        elif kind == "unordered_list":
+            parts.append("\n".join(f"- {_inline(rng, 8, inline_density)}" for _ in range(rng.randint(2, 8))))
+        elif kind == "ordered_list":
+            parts.append("\n".join(f"{i}. {_inline(rng, 8, inline_density)}" for i in range(1, rng.randint(2, 8) + 1)))
+        elif kind == "quote":
+            parts.append("\n".join(f"> {_inline(rng, 12, inline_density)}" for _ in range(rng.randint(1, 4))))
+        elif kind == "code":
+            body = "\n".join(f"{rng.choice(WORDS)}({_words(rng, 3)})" for _ in range(rng.randint(2, 12)))
+            parts.append(f"```\n{body}\n```")
+        else:
+            lines = [_inline(rng, 14, inline_density) for _ in range(rng.randint(1, 5))]
+            parts.append("\n".join(lines))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(
+    dest: str | Path,
+    pages: int = 100,
+    blocks: int = 40,
+    mix: dict[str, int] | None = None,
+    inline_density: float = 0.15,
+    seed: int = 0,
+) -> list[Path]:
+    """Write `pages` markdown files under dest (nested a few levels deep)."""
+    rng = random.Random(seed)
+    root = Path(dest)
+    paths = []
+    for i in range(pages):
+        rel = Path(f"section{i % 10}") / f"page{i}" / "index.md"
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(generate_markdown(rng, blocks, mix, inline_density), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def parse_mix(spec: str | None) -> dict[str, int] | None:
+    """'paragraph=5,code=1' -> {'paragraph': 5, 'code': 1}"""
+    if not spec:
+        return None
+    mix = {}
+    for item in spec.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"Unknown block kind in mix: {kind}")
+        mix[kind] = int(weight)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus.")
+    parser.add_argument("dest")
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--mix", help="block weights, e.g. paragraph=5,code=1,quote=1")
+    parser.add_argument("--inline-density", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    written = generate_corpus(args.dest, args.pages, args.blocks, parse_mix(args.mix), args.inline_density, args.seed)
+    print(f"[CORPUS] Wrote {len(written)} page(s) to {args.dest}")
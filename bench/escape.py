@@ -0,0 +1,86 @@
+"""
+Cost of HTML escaping during serialization.
+
+Serializes an inline-heavy synthetic document with the escaping leaves, then a
+copy of the same tree made of leaves that insert text and attributes raw (the
+rendering before escaping was added), and reports the overhead. Also times
+escape() alone on text with and without special characters.
+
+    python3 bench/escape.py [--blocks N] [--inline-density D] [--repeat R]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import generate_markdown  # noqa: E402
+from htmlnode import VOID_TAGS, LeafNode, ParentNode, escape  # noqa: E402
+from textnode import markdown_to_html_node  # noqa: E402
+
+
+class RawLeafNode(LeafNode):
+    """LeafNode without escaping."""
+    __slots__ = ()
+
+    def props_to_html(self):
+        if self.props is None:
+            return ""
+        return "".join(f' {prop}="{value}"' for prop, value in self.props.items())
+
+    def to_html(self):
+        props_html = self.props_to_html()
+        if not self.tag:
+            return f"{self.value}"
+        if self.value is None or self.tag in VOID_TAGS:
+            return f"<{self.tag}{props_html}/>"
+        return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
+
+
+def copy_html_tree(node):
+    if isinstance(node, ParentNode):
+        return ParentNode(node.tag, [copy_html_tree(c) for c in node.children], node.props)
+    return RawLeafNode(node.tag, node.value, node.props)
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--inline-density", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    markdown = generate_markdown(random.Random(args.seed), args.blocks, inline_density=args.inline_density)
+    # Some text that does need escaping, as in real prose and code samples
+    markdown += "\n\n" + "\n\n".join(["a < b && c > d [x](/q?a=1&b=2)"] * (args.blocks // 20)) + "\n"
+    tree = markdown_to_html_node(markdown)
+    raw_tree = copy_html_tree(tree)
+
+    escaped = best_of(args.repeat, tree.to_html)
+    raw = best_of(args.repeat, raw_tree.to_html)
+    size = len(tree.to_html())
+    print(f"serialize, no escaping   {raw * 1e3:9.1f} ms  {size / raw / 1e6:7.1f} MB/s")
+    print(f"serialize, escaping      {escaped * 1e3:9.1f} ms  {size / escaped / 1e6:7.1f} MB/s")
+    print(f"overhead                 {escaped / raw - 1:9.1%}")
+
+    n = 200_000
+    for label, text in (("plain", "the road goes ever on and on"), ("special", "a < b && c > d")):
+        t = best_of(args.repeat, lambda: [escape(text) for _ in range(n)])
+        print(f"escape() {label:<15} {t / n * 1e9:9.1f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory benchmark for the node classes.
+
+Builds the HTML and TextNode trees for a large synthetic document, then copies
+them into the slotted classes and into equivalent __dict__-based subclasses
+(the layout the classes had before they were slotted) and reports bytes per node.
+
+    python3 bench/node_memory.py [--blocks N]
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from corpus import generate_markdown  # noqa: E402
+from htmlnode import LeafNode, ParentNode  # noqa: E402
+from textnode import TextNode, markdown_to_html_node, text_to_textnodes  # noqa: E402
+
+
+# Subclasses without __slots__ get a per-instance __dict__ again
+class DictLeafNode(LeafNode):
+    pass
+
+
+class DictParentNode(ParentNode):
+    pass
+
+
+class DictTextNode(TextNode):
+    pass
+
+
+def copy_html_tree(node, leaf_cls, parent_cls):
+    if isinstance(node, ParentNode):
+        return parent_cls(node.tag, [copy_html_tree(c, leaf_cls, parent_cls) for c in node.children], node.props)
+    return leaf_cls(node.tag, node.value, node.props)
+
+
+def count_html_nodes(node) -> int:
+    if isinstance(node, ParentNode):
+        return 1 + sum(count_html_nodes(c) for c in node.children)
+    return 1
+
+
+def measure(build) -> int:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--blocks", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    markdown = generate_markdown(random.Random(args.seed), args.blocks, inline_density=0.3)
+    tree = markdown_to_html_node(markdown)
+    text_nodes = [n for line in markdown.splitlines() for n in text_to_textnodes(line)]
+    n_html = count_html_nodes(tree)
+    n_text = len(text_nodes)
+
+    # Strings are shared between the copies, so only the node objects are measured
+    rows = [
+        ("HTML nodes", n_html,
+         measure(lambda: copy_html_tree(tree, DictLeafNode, DictParentNode)),
+         measure(lambda: copy_html_tree(tree, LeafNode, ParentNode))),
+        ("TextNodes", n_text,
+         measure(lambda: [DictTextNode(n.text, n.text_type, n.url) for n in text_nodes]),
+         measure(lambda: [TextNode(n.text, n.text_type, n.url) for n in text_nodes])),
+    ]
+
+    print(f"{'':<12}{'nodes':>10}{'before B/node':>16}{'after B/node':>15}{'saved':>8}")
+    for name, count, before, after in rows:
+        print(
+            f"{name:<12}{count:>10}{before / count:>16.1f}{after / count:>15.1f}"
+            f"{1 - after / before:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
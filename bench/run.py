@@ -0,0 +1,162 @@
+"""
+Build benchmark over a synthetic corpus.
+
+    python3 bench/run.py [--pages N] [--blocks N] [--mix ...] [--output FILE]
+                         [--compare BASELINE.json] [--threshold 0.10]
+
+Times each pipeline stage (block split, classification, inline parsing, block
+rendering, serialization and the full build), reports throughput and peak
+memory (tracemalloc, measured in a separate pass so it doesn't skew timings)
+and saves the results as JSON. With --compare, stages that got slower than
+the baseline by more than --threshold are flagged and the exit code is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent / "src"))
+sys.path.insert(0, str(BENCH_DIR))
+
+from corpus import generate_corpus, parse_mix  # noqa: E402
+from main import generate_pages_recursive  # noqa: E402
+from textnode import (  # noqa: E402
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+    text_to_textnodes,
+)
+
+RESULTS_DIR = BENCH_DIR / "results"
+
+
+def _stages(docs: list[str], content_dir: Path, template: Path, out_dir: Path):
+    """(name, unit, units, fn) for each stage; fn runs the stage once over the corpus."""
+    blocks = [b for md in docs for b in markdown_to_blocks(md)]
+    inline_lines = [
+        line for b in blocks if not b.startswith("```") for line in b.split("\n")
+    ]
+    trees = [markdown_to_html_node(md) for md in docs]
+
+    def full_build():
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(content_dir, template, out_dir)
+
+    return [
+        ("block_split", "blocks", len(blocks), lambda: [markdown_to_blocks(md) for md in docs]),
+        ("block_classify", "blocks", len(blocks), lambda: [block_to_block_type(b) for b in blocks]),
+        ("inline_parse", "lines", len(inline_lines), lambda: [text_to_textnodes(t) for t in inline_lines]),
+        ("markdown_to_html_node", "pages", len(docs), lambda: [markdown_to_html_node(md) for md in docs]),
+        ("serialize", "pages", len(docs), lambda: [t.to_html() for t in trees]),
+        ("full_build", "pages", len(docs), full_build),
+    ]
+
+
+def run(pages: int, blocks: int, mix, inline_density: float, seed: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        paths = generate_corpus(tmp / "content", pages, blocks, mix, inline_density, seed)
+        docs = [p.read_text(encoding="utf-8") for p in paths]
+        total_bytes = sum(len(d.encode("utf-8")) for d in docs)
+        template = tmp / "template.html"
+        template.write_text(
+            "<!doctype html><html><head><title>{{ Title }}</title></head>"
+            "<body><article>{{ Content }}</article></body></html>",
+            encoding="utf-8",
+        )
+
+        results = {}
+        for name, unit, units, fn in _stages(docs, tmp / "content", template, tmp / "out"):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                best = min(best, time.perf_counter() - start)
+
+            tracemalloc.start()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            results[name] = {
+                "seconds": best,
+                f"{unit}_per_s": units / best if best else None,
+                "mb_per_s": total_bytes / best / 1e6 if best else None,
+                "peak_bytes": peak,
+            }
+
+    return {
+        "corpus": {
+            "pages": pages, "blocks_per_page": blocks, "mix": mix,
+            "inline_density": inline_density, "seed": seed, "bytes": total_bytes,
+        },
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "stages": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Stages whose time grew by more than `threshold` (a fraction) vs. the baseline."""
+    regressions = []
+    for name, stage in current["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old:
+            continue
+        change = stage["seconds"] / old["seconds"] - 1
+        if change > threshold:
+            regressions.append(f"{name}: {old['seconds']:.4f}s -> {stage['seconds']:.4f}s (+{change:.0%})")
+    return regressions
+
+
+def print_report(report: dict) -> None:
+    c = report["corpus"]
+    print(f"[BENCH] {c['pages']} pages, {c['bytes'] / 1e6:.2f} MB of markdown")
+    print(f"{'stage':<24}{'seconds':>10}{'throughput':>22}{'MB/s':>9}{'peak MB':>10}")
+    for name, s in report["stages"].items():
+        rate_key = next(k for k in s if k.endswith("_per_s") and k != "mb_per_s")
+        rate = f"{s[rate_key]:,.0f} {rate_key[:-6]}/s"
+        print(f"{name:<24}{s['seconds']:>10.4f}{rate:>22}{s['mb_per_s']:>9.2f}{s['peak_bytes'] / 1e6:>10.2f}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the build pipeline on a synthetic corpus.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=40)
+    parser.add_argument("--mix", help="block weights, e.g. paragraph=5,code=1,quote=1")
+    parser.add_argument("--inline-density", type=float, default=0.15)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per stage; the best is kept")
+    parser.add_argument("--output", help="JSON results path (default: bench/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown fraction")
+    args = parser.parse_args(argv)
+
+    report = run(args.pages, args.blocks, parse_mix(args.mix), args.inline_density, args.seed, args.repeat)
+    print_report(report)
+
+    out = Path(args.output) if args.output else RESULTS_DIR / f"{report['timestamp'].replace(':', '')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"[BENCH] Results written to {out}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            return 1
+        print(f"[BENCH] No stage slower than baseline by more than {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,5 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-# Build the site
-python3 src/main.py
-
-# Serve it
-cd public
-python3 -m http.server 8888
+# Build the site in memory, serve it and live-reload on changes
+python3 src/serve.py --port 8888
@@ -0,0 +1,191 @@
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from instrument import log
+from manifest import atomic_write_bytes, atomic_write_text
+
+# Static files that get a content hash in their name
+FINGERPRINT_EXTENSIONS = frozenset({
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg", ".ico", ".woff", ".woff2",
+})
+# Text formats worth shipping precompressed
+COMPRESS_EXTENSIONS = frozenset({".html", ".css", ".js", ".svg"})
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+HEADERS_NAME = "_headers"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_HASH_LEN = 8
+_FINGERPRINTED_RE = re.compile(rf"^(.*)\.[0-9a-f]{{{_HASH_LEN}}}(\.[^./]+)$")
+_ATTR_URL_RE = re.compile(r'\b(href|src)="([^"]*)"')
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def local_path(url: str, page_rel: str, basepath: str = "/") -> str | None:
+    """
+    Output-relative path a URL on the page at page_rel points to, or None for
+    external URLs and ones outside the site. Query and fragment are dropped.
+    """
+    url = url.split("#", 1)[0].split("?", 1)[0]
+    if not url or url.startswith("//") or ":" in url.split("/", 1)[0]:
+        return None
+    if url.startswith("/"):
+        if not url.startswith(basepath):
+            return None
+        rel = url[len(basepath):]
+    else:
+        rel = posixpath.join(posixpath.dirname(page_rel), url)
+    rel = posixpath.normpath(rel)
+    if rel == "." or rel.startswith("../"):
+        return None
+    return rel
+
+
+def fingerprinted_name(rel: str, data: bytes) -> str:
+    """'images/a.png' -> 'images/a.<hash>.png'"""
+    digest = hashlib.sha256(data).hexdigest()[:_HASH_LEN]
+    base, ext = os.path.splitext(rel)
+    return f"{base}.{digest}{ext}"
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class _UrlRewriter:
+    """Maps asset URLs (original or previously fingerprinted) to their current fingerprinted URL."""
+
+    def __init__(self, mapping: dict[str, str], basepath: str):
+        self.basepath = basepath
+        self.mapping = mapping
+
+    def __call__(self, url: str) -> str:
+        if not url.startswith(self.basepath):
+            return url
+        rel = url[len(self.basepath):]
+        path, sep, suffix = rel.partition("?")
+        new = self.mapping.get(path)
+        if new is None:
+            m = _FINGERPRINTED_RE.match(path)
+            if m is None:
+                return url
+            new = self.mapping.get(m.group(1) + m.group(2))
+            if new is None:
+                return url
+        return self.basepath + new + sep + suffix
+
+
+def fingerprint_assets(out_dir: str | Path, static_dir: str | Path, basepath: str = "/") -> dict[str, str]:
+    """
+    Give every static asset a content-hashed sibling in out_dir (hardlinked when
+    possible), rewrite href/src references in the generated HTML and url()
+    references in CSS, and drop fingerprinted files left by earlier builds.
+    The original names are kept so external links keep working.
+    Returns {original relative path: fingerprinted relative path}.
+    """
+    out = Path(out_dir)
+    static = Path(static_dir)
+    previous = {}
+    manifest_path = out / ASSET_MANIFEST_NAME
+    if manifest_path.exists():
+        try:
+            previous = json.loads(manifest_path.read_text(encoding="utf-8"))
+        except ValueError:
+            previous = {}
+
+    assets = sorted(
+        p.relative_to(static).as_posix()
+        for p in static.rglob("*")
+        if p.is_file() and p.suffix.lower() in FINGERPRINT_EXTENSIONS
+    )
+    # CSS last: its url() references are rewritten first, so its hash covers them
+    assets.sort(key=lambda rel: rel.endswith(".css"))
+
+    mapping = {}
+    rewrite = _UrlRewriter(mapping, basepath)
+    for rel in assets:
+        src = out / rel
+        if not src.exists():
+            continue
+        data = src.read_bytes()
+        if rel.endswith(".css"):
+            text = data.decode("utf-8")
+            new_text = _CSS_URL_RE.sub(lambda m: f"url({m.group(1)}{rewrite(m.group(2))}{m.group(1)})", text)
+            data = new_text.encode("utf-8")
+            hashed = fingerprinted_name(rel, data)
+            target = out / hashed
+            # Rewriting identical bytes would bump the mtime and make precompress redo the .gz
+            if not (target.exists() and target.read_bytes() == data):
+                atomic_write_bytes(target, data)
+        else:
+            hashed = fingerprinted_name(rel, data)
+            _link_or_copy(src, out / hashed)
+        mapping[rel] = hashed
+
+    for rel, hashed in previous.items():
+        if mapping.get(rel) != hashed:
+            (out / hashed).unlink(missing_ok=True)
+            Path(str(out / hashed) + ".gz").unlink(missing_ok=True)
+
+    rewritten = 0
+    for html_path in out.rglob("*.html"):
+        text = html_path.read_text(encoding="utf-8")
+        new_text = _ATTR_URL_RE.sub(lambda m: f'{m.group(1)}="{rewrite(m.group(2))}"', text)
+        if new_text != text:
+            atomic_write_text(html_path, new_text)
+            rewritten += 1
+
+    atomic_write_bytes(manifest_path, json.dumps(mapping, indent=1, sort_keys=True).encode("utf-8"))
+    write_headers(out, mapping, basepath)
+    log.info(f"[ASSETS] Fingerprinted {len(mapping)} asset(s), rewrote {rewritten} page(s)")
+    return mapping
+
+
+def write_headers(out_dir: Path, mapping: dict[str, str], basepath: str = "/") -> None:
+    """Write a _headers file (Netlify / Cloudflare Pages format) marking fingerprinted assets immutable."""
+    lines = []
+    for hashed in sorted(mapping.values()):
+        lines.append(f"{basepath}{hashed}")
+        lines.append(f"  Cache-Control: {IMMUTABLE_CACHE_CONTROL}")
+    atomic_write_text(Path(out_dir) / HEADERS_NAME, "\n".join(lines) + "\n")
+
+
+def _gzip_file(path: Path) -> tuple[int, int] | None:
+    gz = path.with_name(path.name + ".gz")
+    st = path.stat()
+    if gz.exists() and gz.stat().st_mtime_ns >= st.st_mtime_ns:
+        return None
+    data = path.read_bytes()
+    # mtime=0 keeps the output byte-identical for identical input
+    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+    atomic_write_bytes(gz, compressed)
+    return len(data), len(compressed)
+
+
+def precompress(out_dir: str | Path, workers: int | None = None) -> tuple[int, int, int]:
+    """
+    Write a max-level .gz sibling for every HTML/CSS/JS/SVG file that changed
+    since its .gz was written. zlib releases the GIL, so this runs on threads.
+    Returns (files compressed, bytes in, bytes out).
+    """
+    files = [
+        p for p in Path(out_dir).rglob("*")
+        if p.suffix.lower() in COMPRESS_EXTENSIONS and p.is_file()
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = [r for r in pool.map(_gzip_file, files) if r is not None]
+    raw = sum(r[0] for r in results)
+    packed = sum(r[1] for r in results)
+    log.info(f"[GZIP] Compressed {len(results)} file(s): {raw:,} -> {packed:,} bytes")
+    return len(results), raw, packed
@@ -0,0 +1,109 @@
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+from manifest import CACHE_DIR, atomic_write_text
+
+DEFAULT_BLOCK_CACHE_PATH = CACHE_DIR / "blocks.json"
+
+# Source files whose code determines how a block renders; editing any of them
+# invalidates every cached fragment.
+RENDERER_MODULES = ("htmlnode.py", "textnode.py", "highlight.py")
+
+_renderer_version = None
+
+
+def renderer_version() -> str:
+    """Hash of the renderer's source code, computed once per process."""
+    global _renderer_version
+    if _renderer_version is None:
+        h = hashlib.sha256()
+        src_dir = Path(__file__).resolve().parent
+        for name in RENDERER_MODULES:
+            h.update(name.encode("utf-8"))
+            h.update((src_dir / name).read_bytes())
+        _renderer_version = h.hexdigest()[:16]
+    return _renderer_version
+
+
+class BlockCache:
+    """
+    Content-addressed cache of rendered block HTML.
+
+    Keys are a digest of the block text plus whatever page context changes its
+    rendering (e.g. the basepath). Entries are kept in an LRU of at most
+    max_entries; with a path, the cache is loaded from and saved to disk and
+    discarded as a whole when renderer_version() differs.
+    """
+
+    def __init__(self, max_entries: int = 20000, path: str | Path | None = None):
+        self.max_entries = max_entries
+        self.path = Path(path) if path is not None else None
+        self.version = renderer_version()
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        # Entries added since the last drain_new(); used to ship worker results back
+        self._new: dict[str, str] = {}
+        if self.path is not None:
+            self._load()
+
+    @staticmethod
+    def key(block: str, context: str) -> str:
+        return hashlib.blake2b(f"{context}\0{block}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        html = self._entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, key: str, html: str) -> None:
+        self._entries[key] = html
+        self._entries.move_to_end(key)
+        self._new[key] = html
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def update(self, entries: dict[str, str], hits: int = 0, misses: int = 0) -> None:
+        """Merge entries and counts gathered by another process."""
+        for key, html in entries.items():
+            self.put(key, html)
+        self.hits += hits
+        self.misses += misses
+
+    def drain_new(self) -> dict[str, str]:
+        new, self._new = self._new, {}
+        return new
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return
+        for key, html in data.get("entries", {}).items():
+            self._entries[key] = html
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(
+            self.path, json.dumps({"version": self.version, "entries": self._entries}, separators=(",", ":"))
+        )
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"[CACHE] blocks: {self.hits} hit(s), {self.misses} miss(es) ({rate:.0%} hit rate), {len(self)} cached"
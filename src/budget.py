@@ -0,0 +1,201 @@
+import fnmatch
+import json
+import re
+from pathlib import Path
+
+from assets import local_path
+from instrument import log
+from manifest import atomic_write_text
+
+DEFAULT_BUDGETS_PATH = Path("budgets.json")
+
+# Stylesheets, scripts, images and media a page loads (not <a href> links)
+_ASSET_REF_RE = re.compile(r'<link\b[^>]*?\shref="([^"]*)"|\ssrc="([^"]*)"', re.IGNORECASE)
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([kmg]?i?b?)?\s*$", re.IGNORECASE)
+_UNITS = {"": 1, "b": 1, "kb": 1000, "mb": 1000**2, "gb": 1000**3, "kib": 1024, "mib": 1024**2, "gib": 1024**3}
+
+
+def parse_size(value) -> int:
+    """Bytes from an int or a string like "500KB", "1.5MB" or "2MiB"."""
+    if isinstance(value, int):
+        return value
+    m = _SIZE_RE.match(str(value))
+    unit = (m.group(2) or "").lower() if m else None
+    if unit in ("k", "m", "g"):
+        unit += "b"
+    if m is None or unit not in _UNITS:
+        raise ValueError(f"Not a size: {value!r}")
+    return int(float(m.group(1)) * _UNITS[unit])
+
+
+def page_assets(html: str, page_rel: str, basepath: str = "/") -> list[str]:
+    """
+    Output-relative paths of the files a page references from <link href> and
+    src attributes, in order, without duplicates. External URLs are skipped;
+    whether the files exist is left to the caller.
+    """
+    found = {}
+    for m in _ASSET_REF_RE.finditer(html):
+        rel = local_path(m.group(1) or m.group(2) or "", page_rel, basepath)
+        if rel is not None:
+            found.setdefault(rel, None)
+    return list(found)
+
+
+class SizeReport:
+    """
+    Sizes of a build's output: every file ({relative path: bytes}) and every
+    page's weight, its HTML plus the files it references (see page_assets),
+    as {page: {"html": bytes, "weight": bytes, "assets": [paths]}}.
+    """
+
+    def __init__(self, files: dict[str, int] | None = None, pages: dict[str, dict] | None = None):
+        self.files = files if files is not None else {}
+        self.pages = pages if pages is not None else {}
+
+    @classmethod
+    def from_dir(cls, out_dir: str | Path, basepath: str = "/") -> "SizeReport":
+        out = Path(out_dir)
+        files = {}
+        for p in sorted(out.rglob("*")):
+            if p.is_file():
+                files[p.relative_to(out).as_posix()] = p.stat().st_size
+        pages = {}
+        for rel, size in files.items():
+            if not rel.endswith(".html"):
+                continue
+            html = (out / rel).read_text(encoding="utf-8", errors="replace")
+            assets = [a for a in page_assets(html, rel, basepath) if a in files and not a.endswith(".html")]
+            pages[rel] = {"html": size, "weight": size + sum(files[a] for a in assets), "assets": assets}
+        return cls(files, pages)
+
+    @property
+    def total(self) -> int:
+        return sum(self.files.values())
+
+    @classmethod
+    def load(cls, path: str | Path) -> "SizeReport | None":
+        try:
+            data = json.loads(Path(path).read_text(encoding="utf-8"))
+            return cls(data["files"], data["pages"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, path: str | Path) -> None:
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(p, json.dumps({"files": self.files, "pages": self.pages}, separators=(",", ":")))
+
+    def regressions(self, baseline: "SizeReport") -> list[tuple[str, str, int, int]]:
+        """(kind, path, old, new) of files and page weights that grew since baseline, biggest growth first."""
+        grown = []
+        for kind, now, before in (
+            ("file", self.files, baseline.files),
+            ("page", {k: v["weight"] for k, v in self.pages.items()},
+             {k: v["weight"] for k, v in baseline.pages.items()}),
+        ):
+            for rel, size in now.items():
+                old = before.get(rel, 0)
+                if size > old:
+                    grown.append((kind, rel, old, size))
+        grown.sort(key=lambda g: (g[2] - g[3], g[1]))
+        return grown
+
+
+class Budgets:
+    """
+    Size limits for a build, from a JSON file like
+
+        {"files": {"images/*": "500KB", "*": "2MB"},
+         "pages": {"*": "3MB"},
+         "total": "50MB",
+         "growth": 0.2}
+
+    `files` limits output files and `pages` page weights; the first glob that
+    matches a path applies. `growth` (optional) also fails anything that grew
+    by more than that fraction since the baseline.
+    """
+
+    DEFAULTS = {"files": {"*": "2MB"}, "pages": {"*": "4MB"}}
+
+    def __init__(self, files=None, pages=None, total=None, growth=None):
+        self.files = [(glob, parse_size(limit)) for glob, limit in (files or {}).items()]
+        self.pages = [(glob, parse_size(limit)) for glob, limit in (pages or {}).items()]
+        self.total = parse_size(total) if total is not None else None
+        self.growth = float(growth) if growth is not None else None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Budgets":
+        unknown = data.keys() - {"files", "pages", "total", "growth"}
+        if unknown:
+            raise ValueError(f"Unknown budget keys: {', '.join(sorted(unknown))}")
+        return cls(data.get("files"), data.get("pages"), data.get("total"), data.get("growth"))
+
+    @classmethod
+    def load(cls, path: str | Path | None = None) -> "Budgets":
+        """Budgets from a JSON file; the defaults when path is None or, for the default path, missing."""
+        if path is None or (Path(path) == DEFAULT_BUDGETS_PATH and not Path(path).exists()):
+            return cls.from_dict(cls.DEFAULTS)
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+    @staticmethod
+    def _limit(rules: list[tuple[str, int]], rel: str) -> tuple[str, int] | None:
+        for glob, limit in rules:
+            if fnmatch.fnmatchcase(rel, glob):
+                return glob, limit
+        return None
+
+    def check(self, report: SizeReport, baseline: SizeReport | None = None) -> list[str]:
+        """One message per budget the report exceeds."""
+        over = []
+        for kind, rules, sizes in (
+            ("file", self.files, report.files),
+            ("page", self.pages, {rel: page["weight"] for rel, page in report.pages.items()}),
+        ):
+            for rel, size in sizes.items():
+                rule = self._limit(rules, rel)
+                if rule is not None and size > rule[1]:
+                    over.append(f"{kind} {rel} is {size:,} bytes, over the {rule[1]:,} byte budget for {rule[0]}")
+        if self.total is not None and report.total > self.total:
+            over.append(f"total output is {report.total:,} bytes, over the {self.total:,} byte budget")
+        if self.growth is not None and baseline is not None:
+            for kind, rel, old, new in report.regressions(baseline):
+                if old and new > old * (1 + self.growth):
+                    over.append(f"{kind} {rel} grew {new / old - 1:.0%} ({old:,} -> {new:,} bytes), over the {self.growth:.0%} limit")
+        return over
+
+
+def size_report(
+    out_dir: str | Path,
+    basepath: str = "/",
+    budgets: Budgets | None = None,
+    baseline_path: str | Path | None = None,
+    top: int = 10,
+) -> list[str]:
+    """
+    Measure out_dir, log its size, the `top` biggest regressions against the
+    baseline and every budget exceeded. The run becomes the new baseline only
+    when it is within budget, so rerunning a failed check fails again.
+    Returns the budget violations.
+    """
+    report = SizeReport.from_dir(out_dir, basepath)
+    baseline = SizeReport.load(baseline_path) if baseline_path is not None else None
+    heaviest = max(report.pages.items(), key=lambda item: item[1]["weight"], default=None)
+    log.info(
+        f"[SIZE] {len(report.files)} file(s), {report.total:,} bytes"
+        + (f"; heaviest page {heaviest[0]} ({heaviest[1]['weight']:,} bytes)" if heaviest else "")
+    )
+    if baseline is not None:
+        grown = report.regressions(baseline)
+        if grown:
+            before, after = baseline.total, report.total
+            log.info(f"[SIZE] Total {before:,} -> {after:,} bytes ({after - before:+,}); biggest growth:")
+            for kind, rel, old, new in grown[:top]:
+                change = f"{new / old - 1:+.0%}" if old else "new"
+                log.info(f"[SIZE]   {kind} {rel}: {old:,} -> {new:,} bytes ({change})")
+    violations = (budgets or Budgets.load()).check(report, baseline)
+    for message in violations:
+        log.error(f"[BUDGET] {message}")
+    if baseline_path is not None and not violations:
+        report.save(baseline_path)
+    return violations
@@ -0,0 +1,163 @@
+import datetime
+import json
+import re
+from pathlib import Path
+
+from manifest import atomic_write_text
+from textnode import find_title
+
+FENCE = "---"
+_LINE_RE = re.compile(r"^([A-Za-z_][\w-]*)\s*:\s*(.*)$")
+_TRUE = frozenset({"true", "yes", "on", "1"})
+_FALSE = frozenset({"false", "no", "off", "0", ""})
+
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_meta(raw: dict[str, str], source: str = "front matter") -> dict:
+    """
+    Normalize raw `key: value` pairs: tags become a list (comma separated,
+    optionally in [brackets]), draft a bool, date is checked to be an ISO date
+    (YYYY-MM-DD) so dates sort as strings. Other keys are kept as strings.
+    """
+    meta = {}
+    for key, value in raw.items():
+        if key == "tags":
+            value = value[1:-1] if value.startswith("[") and value.endswith("]") else value
+            meta[key] = [_unquote(t.strip()) for t in value.split(",") if t.strip()]
+        elif key == "draft":
+            flag = value.lower()
+            if flag not in _TRUE and flag not in _FALSE:
+                raise ValueError(f"{source}: draft must be true or false, got {value!r}")
+            meta[key] = flag in _TRUE
+        elif key == "date":
+            try:
+                datetime.date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"{source}: date must be YYYY-MM-DD, got {value!r}") from None
+            meta[key] = value
+        else:
+            meta[key] = value
+    return meta
+
+
+def _parse_lines(lines, source: str) -> dict[str, str]:
+    """Parse the lines after the opening fence up to the closing one."""
+    raw = {}
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip() == FENCE:
+            return raw
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        m = _LINE_RE.match(line.strip())
+        if m is None:
+            raise ValueError(f"{source}: expected 'key: value' in front matter, got {line!r}")
+        raw[m.group(1).lower()] = _unquote(m.group(2).strip())
+    raise ValueError(f"{source}: front matter is not closed with '{FENCE}'")
+
+
+def read_front_matter(f, source: str = "front matter") -> dict:
+    """
+    Read the front matter at the start of an open text file, leaving the file
+    positioned at the start of the body. A file that doesn't start with a
+    '---' line has no front matter: {} is returned and nothing is consumed.
+    """
+    start = f.tell()
+    if f.readline().rstrip("\r\n") != FENCE:
+        f.seek(start)
+        return {}
+    return parse_meta(_parse_lines(iter(f.readline, ""), source), source)
+
+
+def split_front_matter(markdown: str, source: str = "front matter") -> tuple[dict, str]:
+    """(metadata, body) of a markdown document held in memory."""
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    first, _, rest = markdown.partition("\n")
+    if first.rstrip("\r") != FENCE:
+        return {}, markdown
+    lines = rest.splitlines(keepends=True)
+    raw = _parse_lines(iter(lines), source)
+    # _parse_lines stopped on the closing fence: the body is everything after it
+    consumed = next(i for i, line in enumerate(lines) if line.strip() == FENCE) + 1
+    return parse_meta(raw, source), "".join(lines[consumed:])
+
+
+def read_meta(md_path: str | Path) -> dict:
+    """
+    A page's front matter plus its title: the `title` key if there is one,
+    else the first H1, found by scanning only as far as that heading.
+    """
+    with open(md_path, encoding="utf-8") as f:
+        meta = read_front_matter(f, str(md_path))
+        if "title" not in meta:
+            title = find_title(iter(f.readline, ""))
+            if title is not None:
+                meta["title"] = title
+    return meta
+
+
+def template_values(meta: dict) -> dict[str, str]:
+    """Template slot values for a page's metadata: lists joined with ", ", flags left out."""
+    values = {}
+    for key, value in meta.items():
+        if isinstance(value, bool):
+            continue
+        values[key] = ", ".join(value) if isinstance(value, list) else value
+    return values
+
+
+class MetadataIndex:
+    """
+    Site-wide index of page metadata ({content-relative path: read_meta()}),
+    for listings and for filling templates without parsing page bodies.
+    Entries are cached in `path` by source hash, so a page is only reopened
+    when it changed.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else None
+        self.pages: dict[str, dict] = {}
+        self.read = 0
+        if self.path is not None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                if isinstance(data, dict):
+                    self.pages = data
+            except (OSError, ValueError):
+                pass
+
+    def get(self, rel: str, md_path: str | Path, digest: str) -> dict:
+        entry = self.pages.get(rel)
+        if entry is None or entry["hash"] != digest:
+            entry = {"hash": digest, "meta": read_meta(md_path)}
+            self.pages[rel] = entry
+            self.read += 1
+        return entry["meta"]
+
+    def retain(self, rels) -> None:
+        """Drop pages that are no longer part of the site."""
+        keep = set(rels)
+        for rel in self.pages.keys() - keep:
+            del self.pages[rel]
+
+    def listing(self, include_drafts: bool = False) -> list[tuple[str, dict]]:
+        """(path, metadata) of every page, newest first; undated pages last, by path."""
+        entries = [
+            (rel, entry["meta"]) for rel, entry in self.pages.items()
+            if include_drafts or not entry["meta"].get("draft")
+        ]
+        entries.sort(key=lambda e: e[0])
+        entries.sort(key=lambda e: e[1].get("date", ""), reverse=True)
+        return entries
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(self.pages, separators=(",", ":"), sort_keys=True))
@@ -0,0 +1,161 @@
+import re
+import sys
+from functools import lru_cache
+
+from htmlnode import escape
+
+# Prefix of the token classes in the generated markup and stylesheet
+CLASS_PREFIX = "hl-"
+
+STYLESHEET_NAME = "highlight.css"
+
+# Token class -> declarations, tuned for the site's dark code blocks
+THEME = {
+    "c": "color: #8d99ae; font-style: italic",  # comment
+    "k": "color: #f4a261; font-weight: bold",  # keyword
+    "s": "color: #a7c957",  # string
+    "n": "color: #e76f51",  # number
+    "b": "color: #9fc5e8",  # builtin, literal
+    "d": "color: #cdb4db",  # decorator, variable, at-rule
+    "t": "color: #f4a261",  # tag
+    "a": "color: #e9c46a",  # attribute, property, key
+}
+
+
+class Lexer:
+    """
+    A regex lexer: an ordered list of (token class, pattern). At each position
+    the first pattern that matches wins; text no pattern matches is emitted
+    unclassed. Patterns must not contain capturing groups.
+    """
+
+    def __init__(self, rules: list[tuple[str, str]]):
+        self.classes = [cls for cls, _ in rules]
+        self.regex = re.compile("|".join(f"({pattern})" for _, pattern in rules), re.M)
+
+    def tokens(self, code: str):
+        """(token class or None, text) pairs covering all of code."""
+        pos = 0
+        for m in self.regex.finditer(code):
+            if m.start() == m.end():
+                continue
+            if m.start() > pos:
+                yield None, code[pos:m.start()]
+            yield self.classes[m.lastindex - 1], m.group()
+            pos = m.end()
+        if pos < len(code):
+            yield None, code[pos:]
+
+
+def _words(*words: str) -> str:
+    return r"\b(?:" + "|".join(words) + r")\b"
+
+
+_NUMBER = r"\b(?:0[xX][0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)\b"
+_DQ_STRING = r'"(?:\\.|[^"\\\n])*"'
+_SQ_STRING = r"'(?:\\.|[^'\\\n])*'"
+
+LEXERS = {
+    "python": Lexer([
+        ("c", r"#[^\n]*"),
+        ("s", r'(?i:[rbuf]{0,2})(?:"""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\')'),
+        ("s", rf"(?i:[rbuf]{{0,2}})(?:{_DQ_STRING}|{_SQ_STRING})"),
+        ("d", r"^[ \t]*@[\w.]+"),
+        ("k", _words(
+            "and", "as", "assert", "async", "await", "break", "class", "continue", "def", "del", "elif",
+            "else", "except", "finally", "for", "from", "global", "if", "import", "in", "is", "lambda",
+            "nonlocal", "not", "or", "pass", "raise", "return", "try", "while", "with", "yield",
+        )),
+        ("b", _words(
+            "True", "False", "None", "self", "cls", "print", "len", "range", "open", "isinstance",
+            "str", "int", "float", "bool", "list", "dict", "set", "tuple", "super", "enumerate", "zip",
+        )),
+        ("n", _NUMBER),
+    ]),
+    "bash": Lexer([
+        ("c", r"(?:^|(?<=\s))#[^\n]*"),
+        ("s", rf"{_DQ_STRING}|'[^']*'"),
+        ("d", r"\$(?:\{[^}\n]*\}|\w+|[@#?$!*-])"),
+        ("k", _words(
+            "if", "then", "elif", "else", "fi", "for", "in", "do", "done", "while", "until", "case",
+            "esac", "function", "return", "local", "export", "readonly", "set", "unset", "source",
+        )),
+        ("b", _words("echo", "cd", "exit", "test", "true", "false", "shift", "eval", "exec", "trap")),
+        ("n", r"(?<![\w-])\d+\b"),
+    ]),
+    "js": Lexer([
+        ("c", r"//[^\n]*|/\*[\s\S]*?\*/"),
+        ("s", rf"{_DQ_STRING}|{_SQ_STRING}|`(?:\\.|[^`\\])*`"),
+        ("k", _words(
+            "async", "await", "break", "case", "catch", "class", "const", "continue", "default",
+            "delete", "do", "else", "export", "extends", "finally", "for", "from", "function", "if",
+            "import", "in", "instanceof", "let", "new", "of", "return", "static", "switch", "throw",
+            "try", "typeof", "var", "void", "while", "yield",
+        )),
+        ("b", _words("true", "false", "null", "undefined", "this", "NaN", "Infinity", "console", "window", "document")),
+        ("n", _NUMBER),
+    ]),
+    "html": Lexer([
+        ("c", r"<!--[\s\S]*?-->"),
+        ("d", r"<![A-Za-z][^>]*>"),
+        ("t", r"</?[A-Za-z][\w:-]*|/?>"),
+        ("a", r"(?<=\s)[A-Za-z_:][\w:.-]*(?=\s*=)"),
+        ("s", r'(?<==)(?:"[^"]*"|\'[^\']*\')'),
+    ]),
+    "css": Lexer([
+        ("c", r"/\*[\s\S]*?\*/"),
+        ("s", rf"{_DQ_STRING}|{_SQ_STRING}"),
+        ("d", r"@[\w-]+"),
+        ("a", r"(?<![\w-])-{0,2}[A-Za-z][\w-]*(?=\s*:[^{};]*[;}])"),
+        ("n", r"#[0-9a-fA-F]{3,8}\b(?=[^{]*[;}])|(?<![\w-])-?(?:\d+\.?\d*|\.\d+)(?:%|[A-Za-z]+)?"),
+        ("b", r"!important\b|" + _words("inherit", "initial", "unset", "none", "auto")),
+    ]),
+    "json": Lexer([
+        ("a", rf"{_DQ_STRING}(?=\s*:)"),
+        ("s", _DQ_STRING),
+        ("b", _words("true", "false", "null")),
+        ("n", r"-?" + _NUMBER),
+    ]),
+}
+
+ALIASES = {
+    "py": "python", "python3": "python",
+    "sh": "bash", "shell": "bash", "zsh": "bash",
+    "javascript": "js", "mjs": "js", "node": "js",
+    "htm": "html", "xhtml": "html", "xml": "html",
+}
+
+
+def language(info: str) -> str:
+    """The language of a fence info string ("Python title=x" -> "python"), or "" if there is none."""
+    name = info.strip().split(None, 1)[0].lower() if info.strip() else ""
+    name = re.sub(r"[^\w+#.-]", "", name)
+    return ALIASES.get(name, name)
+
+
+@lru_cache(maxsize=512)
+def highlight(code: str, lang: str) -> str | None:
+    """
+    code as escaped HTML with its tokens wrapped in <span class="hl-...">,
+    or None if lang has no lexer.
+    """
+    lexer = LEXERS.get(lang)
+    if lexer is None:
+        return None
+    out = []
+    for cls, text in lexer.tokens(code):
+        if cls is None:
+            out.append(escape(text))
+        else:
+            out.append(f'<span class="{CLASS_PREFIX}{cls}">{escape(text)}</span>')
+    return "".join(out)
+
+
+def stylesheet() -> str:
+    """The CSS for the token classes highlight() emits."""
+    return "".join(f".{CLASS_PREFIX}{cls} {{ {decls}; }}\n" for cls, decls in THEME.items())
+
+
+if __name__ == "__main__":
+    # python3 src/highlight.py > static/highlight.css
+    sys.stdout.write(stylesheet())
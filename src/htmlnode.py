@@ -1,6 +1,52 @@
+import sys
+
+# HTML void elements: rendered self-closing
+VOID_TAGS = frozenset({
+	"area", "base", "br", "col", "embed", "hr", "img",
+	"input", "link", "meta", "param", "source", "track", "wbr",
+})
+
+_TEXT_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+
+
+class Markup(str):
+	"""A string of HTML that is already safe: escape() and escape_attr() return it unchanged."""
+	__slots__ = ()
+
+	def __repr__(self):
+		return f"Markup({str.__repr__(self)})"
+
+
+def escape(value) -> str:
+	"""Escape text for use between tags. Most text has nothing to escape and is returned as is."""
+	if type(value) is not str:
+		if isinstance(value, Markup):
+			return value
+		value = str(value)
+	if "&" in value or "<" in value or ">" in value:
+		return value.translate(_TEXT_ESCAPES)
+	return value
+
+
+def escape_attr(value) -> str:
+	"""Escape an attribute value, whether it is double- or single-quoted."""
+	if type(value) is not str:
+		if isinstance(value, Markup):
+			return value
+		value = str(value)
+	if "&" in value or "<" in value or ">" in value or '"' in value or "'" in value:
+		return value.translate(_ATTR_ESCAPES)
+	return value
+
+
 class HTMLNode:
+	# Documents create very many short-lived nodes: no per-instance __dict__
+	__slots__ = ("tag", "value", "children", "props")
+
 	def __init__(self, tag=None, value=None, children=None, props=None):
-		self.tag = tag
+		# Interned so every node with the same tag shares one string
+		self.tag = sys.intern(tag) if type(tag) is str else tag
 		self.value = value
 		self.children = children
 		self.props = props
@@ -8,12 +54,24 @@ class HTMLNode:
 	def to_html(self):
 		raise NotImplementedError("to_html method not implemented")
 
+	def iter_html(self):
+		"""Yield the rendered HTML in chunks, in document order."""
+		raise NotImplementedError("iter_html method not implemented")
+
+	def write_html(self, fp):
+		"""Stream the rendered HTML into a text file object without building the whole string."""
+		write = fp.write
+		for chunk in self.iter_html():
+			write(chunk)
+
 	def props_to_html(self):
 		if self.props is None:
 			return ""
 		props_html = ""
-		for prop in self.props:
-			props_html += f' {prop}="{self.props[prop]}"'
+		for prop, value in self.props.items():
+			if type(value) is not str or "&" in value or "<" in value or ">" in value or '"' in value:
+				value = escape_attr(value)
+			props_html += f' {prop}="{value}"'
 		return props_html
 
 	def __repr__(self):
@@ -21,41 +79,52 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag=None, value=None, props=None):
         super().__init__(tag=tag, value=value, props=props)
 
+    def iter_html(self):
+        # A leaf is small: yield it as a single chunk so a whole start tag
+        # (with its attributes) never straddles two chunks
+        yield self.to_html()
+
     def to_html(self):
-        props_html = self.props_to_html()
+        props_html = self.props_to_html() if self.props else ""
+        value = self.value
+        # Text is escaped unless it is Markup; the check is inlined because
+        # almost every leaf is plain text with nothing to escape
+        if value is not None and (type(value) is not str or "&" in value or "<" in value or ">" in value):
+            value = escape(value)
 
         # Plain text node (no tag)
         if not self.tag:
-            if self.value is None:
+            if value is None:
                 raise ValueError("Value is missing for plain text node")
-            return f"{self.value}"
+            return value
 
         # HTML void elements: render self-closing when value is None
-        void_tags = {
-            "area", "base", "br", "col", "embed", "hr", "img",
-            "input", "link", "meta", "param", "source", "track", "wbr",
-        }
-        if self.value is None or self.tag in void_tags:
+        if value is None or self.tag in VOID_TAGS:
             return f"<{self.tag}{props_html}/>"
 
         # Normal element with value
-        return f"<{self.tag}{props_html}>{self.value}</{self.tag}>"
+        return f"<{self.tag}{props_html}>{value}</{self.tag}>"
 
 class ParentNode(HTMLNode):
+	__slots__ = ()
+
 	def __init__(self, tag, children, props=None):
 		super().__init__(tag=tag, children=children, props=props)
 
 	def to_html(self):
+		return "".join(self.iter_html())
+
+	def iter_html(self):
 		if self.tag is None:
 			raise ValueError("Tag is missing")
 		if self.children is None or len(self.children) ==0:
 			raise ValueError("Children are missing")
-		html_string = f"<{self.tag}>"
+		yield f"<{self.tag}{self.props_to_html()}>"
 		for child in self.children:
-			childstring = child.to_html()
-			html_string += childstring
-		html_string += f"</{self.tag}>"
-		return html_string
+			yield from child.iter_html()
+		yield f"</{self.tag}>"
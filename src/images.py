@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+
+from manifest import CACHE_DIR, atomic_write_text, file_hash
+
+DEFAULT_IMAGE_INDEX_PATH = CACHE_DIR / "images.json"
+
+IMAGE_EXTENSIONS = frozenset({".png", ".jpg", ".jpeg", ".gif", ".webp"})
+
+# JPEG start-of-frame markers; C4 (DHT), C8 (JPG) and CC (DAC) share the range but aren't frames
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _jpeg_size(f) -> tuple[int, int] | None:
+    f.seek(2)
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue  # standalone markers carry no length
+        header = f.read(2)
+        if len(header) < 2:
+            return None
+        (length,) = struct.unpack(">H", header)
+        if marker in _JPEG_SOF:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path: str | Path) -> tuple[int, int] | None:
+    """
+    (width, height) of a PNG, JPEG, GIF or WebP file, read from its header
+    without decoding any pixels. None for other or truncated files.
+    """
+    with open(path, "rb") as f:
+        head = f.read(30)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+            chunk = head[12:16]
+            if chunk == b"VP8 " and len(head) >= 30:
+                w, h = struct.unpack("<HH", head[26:30])
+                return w & 0x3FFF, h & 0x3FFF
+            if chunk == b"VP8L" and len(head) >= 25:
+                (bits,) = struct.unpack("<I", head[21:25])
+                return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+            if chunk == b"VP8X" and len(head) >= 30:
+                w = int.from_bytes(head[24:27], "little") + 1
+                h = int.from_bytes(head[27:30], "little") + 1
+                return w, h
+            return None
+        if head[:2] == b"\xff\xd8":
+            return _jpeg_size(f)
+    return None
+
+
+class ImageIndex:
+    """
+    Dimensions of the images under a static directory, keyed by their
+    root-relative URL ("/images/a.png").
+
+    Probed sizes are cached per image with its (size, mtime_ns) and hash:
+    unchanged files are only stat'ed, and a file whose stat changed is hashed
+    and probed only if its content is new. `version` changes whenever any dimension does and is part of
+    the render inputs (block cache keys, the build manifest).
+    """
+
+    def __init__(self, sizes: dict[str, tuple[int, int]] | None = None):
+        self.sizes = sizes if sizes is not None else {}
+        h = hashlib.sha256()
+        for url, (w, h_) in sorted(self.sizes.items()):
+            h.update(f"{url}\0{w}x{h_}\n".encode("utf-8"))
+        self.version = h.hexdigest()[:16]
+
+    @classmethod
+    def scan(cls, static_dir: str | Path, cache_path: str | Path | None = None) -> "ImageIndex":
+        static = Path(static_dir)
+        cached = {}
+        if cache_path is not None:
+            try:
+                cached = json.loads(Path(cache_path).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                cached = {}
+
+        if not isinstance(cached, dict):
+            cached = {}
+        # Entries from older cache formats simply don't match
+        cached = {url: e for url, e in cached.items() if isinstance(e, dict) and e.keys() == {"stat", "hash", "size"}}
+        known = {e["hash"]: e["size"] for e in cached.values()}
+
+        entries = {}
+        sizes = {}
+        if static.is_dir():
+            for p in sorted(static.rglob("*")):
+                if p.suffix.lower() not in IMAGE_EXTENSIONS or not p.is_file():
+                    continue
+                url = "/" + p.relative_to(static).as_posix()
+                st = p.stat()
+                stat = [st.st_size, st.st_mtime_ns]
+                entry = cached.get(url)
+                if entry is None or entry["stat"] != stat:
+                    digest = file_hash(p)
+                    size = known.get(digest)
+                    if size is None:
+                        size = image_size(p)
+                    if size is None:
+                        continue
+                    entry = {"stat": stat, "hash": digest, "size": list(size)}
+                entries[url] = entry
+                sizes[url] = tuple(entry["size"])
+
+        if cache_path is not None and entries != cached:
+            cache = Path(cache_path)
+            cache.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_text(cache, json.dumps(entries, sort_keys=True))
+        return cls(sizes)
+
+    def lookup(self, url: str) -> tuple[int, int] | None:
+        """Size of a root-relative image URL (before the basepath is applied)."""
+        return self.sizes.get(url)
+
+    def __len__(self):
+        return len(self.sizes)
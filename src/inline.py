@@ -0,0 +1,309 @@
+import base64
+import hashlib
+import json
+import mimetypes
+import posixpath
+import re
+import time
+from pathlib import Path
+
+from assets import local_path
+from instrument import log
+from manifest import atomic_write_text
+
+INLINE_CSS_MODES = ("full", "used")
+DEFAULT_IMAGE_LIMIT = 2048
+
+_LINK_RE = re.compile(r"<link\b[^>]*>", re.IGNORECASE)
+_IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+
+
+def _attr_re(name: str) -> re.Pattern:
+    """An attribute with a double-quoted, single-quoted or (as minify writes simple values) unquoted value."""
+    return re.compile(rf"""\s{name}\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""", re.IGNORECASE)
+
+
+def _attr_value(m: re.Match) -> str:
+    return next(g for g in m.groups() if g is not None)
+
+
+_HREF_RE = _attr_re("href")
+_SRC_RE = _attr_re("src")
+_REL_RE = _attr_re("rel")
+
+_TAG_USE_RE = re.compile(r"<([A-Za-z][A-Za-z0-9-]*)")
+_CLASS_USE_RE = _attr_re("class")
+_ID_USE_RE = _attr_re("id")
+
+_CSS_COMMENT_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_COMPOUND_SPLIT_RE = re.compile(r"\s*[>+~]\s*|\s+")
+_SELECTOR_NOISE_RE = re.compile(r"\[[^\]]*\]|::?[\w-]+(\([^)]*\))?")
+_SELECTOR_TAG_RE = re.compile(r"^[A-Za-z][\w-]*")
+_SELECTOR_CLASS_RE = re.compile(r"\.([\w-]+)")
+_SELECTOR_ID_RE = re.compile(r"#([\w-]+)")
+# At-rules whose block holds rules to filter; every other at-rule is kept whole
+_NESTED_AT_RULES = ("@media", "@supports", "@layer", "@container")
+
+
+def split_rules(css: str) -> list[tuple[str, str | None]]:
+    """
+    Top-level (prelude, block body) pairs of a stylesheet, comments removed.
+    Statements without a block (@import, @charset) come back as (statement, None).
+    """
+    css = _CSS_COMMENT_RE.sub(lambda m: m.group(1) or "", css)
+    rules = []
+    depth = 0
+    quote = None
+    start = 0
+    body_start = 0
+    for i, ch in enumerate(css):
+        if quote is not None:
+            if ch == quote and css[i - 1] != "\\":
+                quote = None
+        elif ch in "\"'":
+            quote = ch
+        elif ch == "{":
+            if depth == 0:
+                body_start = i + 1
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append((css[start:body_start - 1].strip(), css[body_start:i].strip()))
+                start = i + 1
+        elif ch == ";" and depth == 0:
+            rules.append((css[start:i + 1].strip(), None))
+            start = i + 1
+    return [rule for rule in rules if rule[0] or rule[1]]
+
+
+def _split_selectors(prelude: str) -> list[str]:
+    """Split a selector list on the commas that aren't inside parentheses."""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(prelude):
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(prelude[start:i])
+            start = i + 1
+    parts.append(prelude[start:])
+    return [p.strip() for p in parts if p.strip()]
+
+
+class PageUsage:
+    """The element names, classes and ids that appear in a page."""
+
+    __slots__ = ("tags", "classes", "ids")
+
+    def __init__(self, html: str):
+        self.tags = {t.lower() for t in _TAG_USE_RE.findall(html)}
+        self.classes = {c for m in _CLASS_USE_RE.finditer(html) for c in _attr_value(m).split()}
+        self.ids = {_attr_value(m) for m in _ID_USE_RE.finditer(html)}
+
+    def key(self) -> str:
+        return "|".join(",".join(sorted(s)) for s in (self.tags, self.classes, self.ids))
+
+    def matches(self, selector: str) -> bool:
+        """
+        Whether the selector could match an element on the page: every
+        compound's type, classes and ids must be used somewhere. Combinators,
+        pseudo-classes and attribute conditions are ignored, so this errs on
+        the side of keeping a rule.
+        """
+        for compound in _COMPOUND_SPLIT_RE.split(_SELECTOR_NOISE_RE.sub("", selector)):
+            if not compound or compound == "*":
+                continue
+            tag = _SELECTOR_TAG_RE.match(compound)
+            if tag is not None and tag.group(0).lower() not in self.tags:
+                return False
+            if not self.classes.issuperset(_SELECTOR_CLASS_RE.findall(compound)):
+                return False
+            if not self.ids.issuperset(_SELECTOR_ID_RE.findall(compound)):
+                return False
+        return True
+
+
+def used_css(rules: list[tuple[str, str | None]], usage: PageUsage) -> str:
+    """The rules (from split_rules) a page can use, as compact CSS."""
+    out = []
+    for prelude, body in rules:
+        if body is None:
+            out.append(prelude)
+        elif prelude.startswith("@"):
+            if prelude.lower().startswith(_NESTED_AT_RULES):
+                inner = used_css(split_rules(body), usage)
+                if inner:
+                    out.append(f"{prelude}{{{inner}}}")
+            else:
+                out.append(f"{prelude}{{{body}}}")
+        elif any(usage.matches(s) for s in _split_selectors(prelude)):
+            out.append(f"{prelude}{{{body}}}")
+    return "".join(out)
+
+
+def _rebase_css_urls(css: str, css_rel: str, basepath: str) -> str:
+    """Make relative url()s in a stylesheet root-relative, so they still resolve once inlined elsewhere."""
+    css_dir = posixpath.dirname(css_rel)
+
+    def rebase(m):
+        quote, url = m.group(1), m.group(2).strip()
+        if url.startswith(("/", "#", "data:")) or ":" in url.split("/", 1)[0]:
+            return m.group(0)
+        return f"url({quote}{basepath}{posixpath.normpath(posixpath.join(css_dir, url))}{quote})"
+
+    return _CSS_URL_RE.sub(rebase, css)
+
+
+class AssetInliner:
+    """
+    Inlines local stylesheets into <style> (all of it, or with css_mode "used"
+    only the rules that can match the page) and turns images of at most
+    image_limit bytes into data: URIs.
+
+    Results are cached by content hash in `cache_path`: parsed stylesheets,
+    the used rules per stylesheet and page usage, and data URIs per image.
+    """
+
+    def __init__(self, out_dir: str | Path, basepath: str = "/", css_mode: str | None = None,
+                 image_limit: int = 0, cache_path: str | Path | None = None):
+        if css_mode is not None and css_mode not in INLINE_CSS_MODES:
+            raise ValueError(f"Unknown CSS inlining mode: {css_mode}")
+        self.out = Path(out_dir)
+        self.basepath = basepath
+        self.css_mode = css_mode
+        self.image_limit = image_limit
+        self.cache_path = Path(cache_path) if cache_path is not None else None
+        self.cache = {"css": {}, "used": {}, "images": {}}
+        self.hits = self.misses = 0
+        if self.cache_path is not None:
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+                if isinstance(data, dict) and data.keys() == self.cache.keys():
+                    self.cache = data
+            except (OSError, ValueError):
+                pass
+        self._files: dict[str, tuple[str, bytes] | None] = {}
+        self._used: set[str] = set()
+
+    def _read(self, rel: str) -> tuple[str, bytes] | None:
+        """(sha256, bytes) of an output file, read once per run; None if missing."""
+        if rel not in self._files:
+            try:
+                data = (self.out / rel).read_bytes()
+                self._files[rel] = (hashlib.sha256(data).hexdigest(), data)
+            except OSError:
+                self._files[rel] = None
+        return self._files[rel]
+
+    def _cached(self, section: str, key: str, make):
+        self._used.add(f"{section}\0{key}")
+        entry = self.cache[section].get(key)
+        if entry is None:
+            entry = make()
+            self.cache[section][key] = entry
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def _stylesheet(self, css_rel: str, usage: PageUsage) -> str | None:
+        found = self._read(css_rel)
+        if found is None:
+            return None
+        digest, data = found
+
+        def parse():
+            css = _rebase_css_urls(data.decode("utf-8"), css_rel, self.basepath)
+            return split_rules(css)
+
+        rules = self._cached("css", f"{digest}:{self.basepath}", parse)
+        if self.css_mode == "full":
+            return "".join(f"{p}{{{b}}}" if b is not None else p for p, b in rules)
+        usage_key = hashlib.sha256(usage.key().encode("utf-8")).hexdigest()[:16]
+        return self._cached("used", f"{digest}:{self.basepath}:{usage_key}", lambda: used_css(rules, usage))
+
+    def _data_uri(self, rel: str) -> str | None:
+        try:
+            if (self.out / rel).stat().st_size > self.image_limit:
+                return None
+        except OSError:
+            return None
+        mime = mimetypes.guess_type(rel)[0]
+        if mime is None or not mime.startswith("image/"):
+            return None
+        digest, data = self._read(rel)
+        return self._cached(
+            "images", digest, lambda: f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+        )
+
+    def inline_page(self, html: str, page_rel: str) -> tuple[str, int, int]:
+        """Returns (new html, stylesheets inlined, images inlined)."""
+        styles = images = 0
+        if self.css_mode is not None:
+            usage = PageUsage(html) if self.css_mode == "used" else None
+
+            def link(m):
+                nonlocal styles
+                tag = m.group(0)
+                href, rel_attr = _HREF_RE.search(tag), _REL_RE.search(tag)
+                if href is None or rel_attr is None or "stylesheet" not in _attr_value(rel_attr).lower().split():
+                    return tag
+                rel = local_path(_attr_value(href), page_rel, self.basepath)
+                css = self._stylesheet(rel, usage) if rel is not None else None
+                if css is None:
+                    return tag
+                styles += 1
+                return f"<style>{css}</style>"
+
+            html = _LINK_RE.sub(link, html)
+        if self.image_limit > 0:
+            def img(m):
+                nonlocal images
+                tag = m.group(0)
+                src = _SRC_RE.search(tag)
+                if src is None:
+                    return tag
+                rel = local_path(_attr_value(src), page_rel, self.basepath)
+                uri = self._data_uri(rel) if rel is not None else None
+                if uri is None:
+                    return tag
+                images += 1
+                # Always quoted: base64 has characters an unquoted value can't hold
+                return f'{tag[:src.start()]} src="{uri}"{tag[src.end():]}'
+
+            html = _IMG_RE.sub(img, html)
+        return html, styles, images
+
+    def run(self) -> tuple[int, int, int]:
+        """Inline every page under out_dir; returns (pages changed, stylesheets, images)."""
+        start = time.perf_counter()
+        changed = styles = images = 0
+        for page in sorted(self.out.rglob("*.html")):
+            rel = page.relative_to(self.out).as_posix()
+            html = page.read_text(encoding="utf-8")
+            new_html, s, i = self.inline_page(html, rel)
+            styles += s
+            images += i
+            if new_html != html:
+                atomic_write_text(page, new_html)
+                changed += 1
+        self.save()
+        log.info(
+            f"[INLINE] {changed} page(s) changed: {styles} stylesheet(s), {images} image(s) inlined "
+            f"in {time.perf_counter() - start:.2f}s; {self.hits} cache hit(s), {self.misses} miss(es)"
+        )
+        return changed, styles, images
+
+    def save(self) -> None:
+        """Write the cache, keeping only entries used in this run."""
+        if self.cache_path is None:
+            return
+        kept = {
+            section: {k: v for k, v in entries.items() if f"{section}\0{k}" in self._used}
+            for section, entries in self.cache.items()
+        }
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.cache_path, json.dumps(kept, separators=(",", ":")))
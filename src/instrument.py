@@ -0,0 +1,169 @@
+import atexit
+import csv
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+QUIET, NORMAL, VERBOSE = 0, 1, 2
+
+# Per-page stages, in pipeline order
+PAGE_STAGES = (
+    "read",
+    "block_split",
+    "block_classify",
+    "inline_parse",
+    "block_render",
+    "serialize",
+    "template_fill",
+    "write",
+)
+
+
+class BuildLog:
+    """
+    Leveled, buffered build output.
+
+    Lines are collected and written to stdout in batches instead of one
+    print() per file. Errors always go to stderr, after pending lines.
+    """
+
+    def __init__(self, level: int = NORMAL, buffer_lines: int = 512):
+        self.level = level
+        self.buffer_lines = buffer_lines
+        self._lines = []
+
+    def _add(self, msg: str) -> None:
+        self._lines.append(msg)
+        if len(self._lines) >= self.buffer_lines:
+            self.flush()
+
+    def info(self, msg: str) -> None:
+        if self.level >= NORMAL:
+            self._add(msg)
+
+    def verbose(self, msg: str) -> None:
+        if self.level >= VERBOSE:
+            self._add(msg)
+
+    def error(self, msg: str) -> None:
+        self.flush()
+        print(msg, file=sys.stderr)
+
+    def write_raw(self, text: str) -> None:
+        """Append already-formatted output (e.g. a worker's captured log)."""
+        if text:
+            self._lines.append(text.rstrip("\n"))
+
+    def flush(self) -> None:
+        # sys.stdout is looked up here so contextlib.redirect_stdout works
+        if self._lines:
+            sys.stdout.write("\n".join(self._lines) + "\n")
+            self._lines.clear()
+
+
+log = BuildLog()
+atexit.register(log.flush)
+
+
+class PageTimer:
+    """Accumulated seconds per stage for one page."""
+
+    __slots__ = ("page", "stages")
+
+    def __init__(self, page: str):
+        self.page = page
+        self.stages = dict.fromkeys(PAGE_STAGES, 0.0)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def stage(self, name: str) -> "_Stage":
+        return _Stage(self, name)
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "start")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    """Collects per-page PageTimers and build-wide stage timings for --profile."""
+
+    def __init__(self):
+        self.pages: list[PageTimer] = []
+        self.build_stages: dict[str, float] = {}
+
+    def page(self, name: str) -> PageTimer:
+        timer = PageTimer(name)
+        self.pages.append(timer)
+        return timer
+
+    def add_build(self, stage: str, seconds: float) -> None:
+        """Record a build-wide stage such as the static copy."""
+        self.build_stages[stage] = self.build_stages.get(stage, 0.0) + seconds
+
+    def add_page(self, name: str, stages: dict[str, float]) -> None:
+        """Record timings measured elsewhere (e.g. in a worker process)."""
+        timer = self.page(name)
+        timer.stages.update(stages)
+
+    def totals(self) -> dict[str, float]:
+        totals = dict.fromkeys(PAGE_STAGES, 0.0)
+        for timer in self.pages:
+            for stage, secs in timer.stages.items():
+                totals[stage] = totals.get(stage, 0.0) + secs
+        totals.update(self.build_stages)
+        return totals
+
+    def slowest(self, n: int = 10) -> list[PageTimer]:
+        return sorted(self.pages, key=lambda t: t.total, reverse=True)[:n]
+
+    def write_report(self, path: str | Path) -> None:
+        """Write a .csv (one row per page plus a TOTAL row) or JSON report."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        totals = self.totals()
+        if p.suffix.lower() == ".csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(["page", *PAGE_STAGES, "total"])
+            for t in self.pages:
+                writer.writerow([t.page, *(f"{t.stages[s]:.6f}" for s in PAGE_STAGES), f"{t.total:.6f}"])
+            for stage, secs in self.build_stages.items():
+                writer.writerow([f"({stage})", *("" for _ in PAGE_STAGES), f"{secs:.6f}"])
+            writer.writerow(["TOTAL", *(f"{totals[s]:.6f}" for s in PAGE_STAGES), f"{sum(totals.values()):.6f}"])
+            p.write_text(buf.getvalue(), encoding="utf-8")
+            return
+        report = {
+            "pages": len(self.pages),
+            "totals": totals,
+            "slowest": [{"page": t.page, "total": t.total} for t in self.slowest()],
+            "per_page": [{"page": t.page, "total": t.total, **t.stages} for t in self.pages],
+        }
+        p.write_text(json.dumps(report, indent=1), encoding="utf-8")
+
+    def summary(self, n: int = 5) -> str:
+        lines = ["[PROFILE] Stage totals:"]
+        for stage, secs in self.totals().items():
+            lines.append(f"[PROFILE]   {stage:<15}{secs * 1000:>10.1f} ms")
+        lines.append(f"[PROFILE] Slowest {min(n, len(self.pages))} page(s):")
+        for t in self.slowest(n):
+            lines.append(f"[PROFILE]   {t.total * 1000:>8.1f} ms  {t.page}")
+        return "\n".join(lines)
@@ -1,8 +1,26 @@
+import contextlib
+import io
 import os
 import shutil
 import sys
+import time
+import traceback
 from pathlib import Path
 from textnode import *
+from template import Template
+from instrument import NORMAL, QUIET, VERBOSE, PageTimer, Profiler, log
+from blockcache import BlockCache, DEFAULT_BLOCK_CACHE_PATH
+from images import ImageIndex
+from search import SearchIndex, page_url
+from minify import HtmlMinifier, MinifyStats, minify_css
+from publish import PUBLISH_MODES, publish, staging_dir
+from staticcopy import StaticCopier, copy_file
+from output import ArchiveOutput, DiskOutput, MemoryOutput, OutputBackend
+from inline import DEFAULT_IMAGE_LIMIT, INLINE_CSS_MODES, AssetInliner
+from budget import DEFAULT_BUDGETS_PATH, Budgets, size_report
+from frontmatter import MetadataIndex, read_front_matter, read_meta, split_front_matter, template_values
+from shard import DEFAULT_SHARD_ROOT, SHARD_MANIFEST_NAME, SHARD_STRATEGIES, ShardManifest, assign_shards, parse_shard, shard_output_dir
+from manifest import BuildManifest, DEFAULT_MANIFEST_PATH, file_hash
 
 def normalize_basepath(bp: str | None) -> str:
     """Ensure basepath starts and ends with a single slash. Empty -> '/'."""
@@ -27,50 +45,36 @@ def clear_directory(dir_path: Path) -> None:
     for entry in dir_path.iterdir():
         if entry.is_dir() and not entry.is_symlink():
             shutil.rmtree(entry)
-            print(f"[DEL DIR]  {entry}")
+            log.verbose(f"[DEL DIR]  {entry}")
         else:
             entry.unlink(missing_ok=True)
-            print(f"[DEL FILE] {entry}")
-
-
-def copy_directory_recursive(src: Path, dst: Path) -> None:
-    """
-    Recursively copy all contents from src into dst.
-    Assumes dst exists and is empty (use clear_directory first).
-    """
-    if not src.exists():
-        raise FileNotFoundError(f"Source does not exist: {src}")
-    if not src.is_dir():
-        raise NotADirectoryError(f"Source is not a directory: {src}")
-
-    for root, dirs, files in os.walk(src):
-        root_path = Path(root)
-        rel = root_path.relative_to(src)
-        dst_root = dst / rel
-
-        dst_root.mkdir(parents=True, exist_ok=True)
-
-        for name in files:
-            s = root_path / name
-            d = dst_root / name
-            if s.is_symlink():
-                target = s.resolve()
-                shutil.copy2(target, d)
-                print(f"[COPY LINK->FILE] {s} -> {d} (target: {target})")
-            else:
-                shutil.copy2(s, d)
-                print(f"[COPY FILE] {s} -> {d}")
-
-        for name in dirs:
-            dst_dir = dst_root / name
-            dst_dir.mkdir(parents=True, exist_ok=True)
-            print(f"[ENSURE DIR] {dst_dir}")
-
-
-def copy_static_to_public(src: str = "static", dst: str = "public") -> None:
+            log.verbose(f"[DEL FILE] {entry}")
+
+
+def _static_copier(minify: MinifyStats | None = None, link: bool = False) -> StaticCopier:
+    transform = None
+    if minify is not None:
+        def transform(s: Path) -> bytes | None:
+            if s.suffix.lower() != ".css":
+                return None
+            css = s.read_bytes()
+            out = minify_css(css.decode("utf-8")).encode("utf-8")
+            minify.add_css(len(css), len(out))
+            return out
+    return StaticCopier(link=link, transform=transform)
+
+
+def copy_static_to_public(
+    src: str = "static",
+    dst: str = "public",
+    minify: MinifyStats | None = None,
+    link: bool = False,
+) -> dict[str, str]:
     """
     1) clears destination dir contents
-    2) recursively copies everything from src into dst
+    2) copies everything from src into dst with a StaticCopier (minifying CSS
+       with `minify`, hardlinking to the sources with `link`)
+    Returns the {relative path: hash} mapping of the copied files.
     """
     src_path = Path(src).resolve()
     dst_path = Path(dst).resolve()
@@ -78,10 +82,83 @@ def copy_static_to_public(src: str = "static", dst: str = "public") -> None:
     if src_path == dst_path or str(dst_path).startswith(str(src_path) + os.sep):
         raise ValueError("Destination must not be the same as (or inside) the source directory.")
 
-    print(f"[START] Copying from {src_path} -> {dst_path}")
+    log.info(f"[START] Copying from {src_path} -> {dst_path}")
     clear_directory(dst_path)
-    copy_directory_recursive(src_path, dst_path)
-    print(f"[DONE]  Copied to {dst_path}")
+    hashes = _static_copier(minify, link).copy(src_path, DiskOutput(dst_path))
+    log.info(f"[DONE]  Copied to {dst_path}")
+    return hashes
+
+
+def render_page(
+    markdown: str,
+    template: Template,
+    fp,
+    metadata: dict | None = None,
+    timer: PageTimer | None = None,
+    cache: BlockCache | None = None,
+    images: ImageIndex | None = None,
+) -> None:
+    """
+    Render a markdown document through a compiled template into a text file object.
+
+    Template slots are filled from the page's front matter (or `metadata`, as
+    frontmatter.read_meta returns it), plus "title" (the `title` key, else the
+    first H1) and "content" (the rendered page, streamed into fp).
+    With a timer, the content is serialized to a string first so serialization
+    and template filling can be timed separately.
+    """
+    meta, markdown = split_front_matter(markdown)
+    if metadata is None:
+        metadata = meta
+
+    # Convert markdown to HTML; root-relative links get the basepath as they are rendered
+    root_node = markdown_to_html_node(markdown, RenderContext(template.basepath, timer, cache, images))
+
+    # Extract title (raises if there is no title key and no H1)
+    title = metadata.get("title")
+    if title is None:
+        title = extract_title(markdown)
+
+    values = template_values(metadata)
+    values["title"] = title
+    if timer is None:
+        values["content"] = root_node
+        template.render_to(fp, values)
+        return
+    with timer.stage("serialize"):
+        values["content"] = Markup(root_node.to_html())
+    with timer.stage("template_fill"):
+        template.render_to(fp, values)
+
+
+def render_file(
+    src_path: str | Path,
+    template: Template,
+    fp,
+    metadata: dict | None = None,
+    cache: BlockCache | None = None,
+    images: ImageIndex | None = None,
+) -> None:
+    """
+    Streaming counterpart of render_page for a markdown file on disk.
+
+    The file is read line by line and each block is rendered and written as soon
+    as it is complete, so memory use is bounded by the largest block rather than
+    the document. Unless `metadata` is given, the front matter and title are
+    read first by frontmatter.read_meta, which stops at the first H1.
+    """
+    if metadata is None:
+        metadata = read_meta(src_path)
+    title = metadata.get("title")
+    if title is None:
+        raise ValueError("No H1 header found in markdown")
+
+    values = template_values(metadata)
+    values["title"] = title
+    with open(src_path, encoding="utf-8") as f:
+        read_front_matter(f, str(src_path))
+        values["content"] = StreamedDocument(BlockScanner(f), RenderContext(template.basepath, cache=cache, images=images))
+        template.render_to(fp, values)
 
 
 def generate_page(
@@ -89,49 +166,255 @@ def generate_page(
     template_path: str | Path,
     dest_path: str | Path,
     basepath: str = "/",
-    _preloaded_template: str | None = None,
+    _preloaded_template: str | Template | None = None,
+    metadata: dict | None = None,
+    timer: PageTimer | None = None,
+    cache: BlockCache | None = None,
+    images: ImageIndex | None = None,
+    minify: MinifyStats | None = None,
+    output: OutputBackend | None = None,
 ) -> None:
+    """
+    Render one markdown file through the template into dest_path (see render_page).
+    With `minify`, the HTML is minified as it is written and the sizes recorded.
+    With an output backend, dest_path is a path relative to its root; otherwise
+    the page is written to disk.
+    """
     src = Path(from_path)
     tpl = Path(template_path)
-    dest = Path(dest_path)
+    if output is None:
+        dest = Path(dest_path)
+        output, key = DiskOutput(dest.parent), dest.name
+    else:
+        key = Path(dest_path).as_posix()
+    dest = output.display(key)
 
-    print(f"[PAGE] Generating page from {src} to {dest} using {tpl}")
+    log.info(f"[PAGE] Generating page from {src} to {dest} using {tpl}")
 
-    markdown = src.read_text(encoding="utf-8")
+    basepath = normalize_basepath(basepath)
     template = _preloaded_template if _preloaded_template is not None else tpl.read_text(encoding="utf-8")
+    if not isinstance(template, Template):
+        template = Template(template, basepath)
+
+    if timer is not None:
+        with timer.stage("read"):
+            markdown = src.read_text(encoding="utf-8")
+        buf = io.StringIO()
+        out = HtmlMinifier(buf) if minify is not None else buf
+        render_page(markdown, template, out, metadata, timer, cache, images)
+        if minify is not None:
+            out.close()
+            minify.add_html(out.bytes_in, out.bytes_out)
+        with timer.stage("write"):
+            with output.open_text(key) as fp:
+                fp.write(buf.getvalue())
+        log.info(f"[PAGE] Wrote {dest}")
+        return
+
+    # Backends only commit a page once it is complete, so a half-written one is never visible
+    with output.open_text(key) as fp:
+        out = HtmlMinifier(fp) if minify is not None else fp
+        render_file(src, template, out, metadata, cache, images)
+        if minify is not None:
+            out.close()
+            minify.add_html(out.bytes_in, out.bytes_out)
+    log.info(f"[PAGE] Wrote {dest}")
+
+
+
+def copy_static_incremental(
+    src: str | Path,
+    dst: str | Path,
+    previous: dict[str, str] | None = None,
+    minify: MinifyStats | None = None,
+    link: bool = False,
+) -> dict[str, str]:
+    """
+    Copy only static files whose hash differs from `previous` (or whose output is
+    missing), and delete outputs whose source file is gone. CSS is minified with
+    `minify`; see StaticCopier for how files are compared, copied and deduplicated.
+    Returns the new {relative path: hash} mapping.
+    """
+    return _static_copier(minify, link).copy(src, DiskOutput(dst), previous)
 
-    # Convert markdown to HTML
-    root_node = markdown_to_html_node(markdown)
-    content_html = root_node.to_html()
 
-    # Extract title (raises if no H1)
-    title = extract_title(markdown)
+class PageGenerationError(Exception):
+    """Raised after a parallel build when one or more pages failed to render."""
 
-    # Fill template
-    final_html = (
-        template
-        .replace("{{ Title }}", title)
-        .replace("{{ Content }}", content_html)
-    )
+    def __init__(self, failures: list[tuple[Path, str]]):
+        self.failures = failures
+        names = ", ".join(str(p) for p, _ in failures)
+        super().__init__(f"{len(failures)} page(s) failed: {names}")
 
-    # Rewrite root-relative href/src to be under basepath (but only if not '/')
-    basepath = normalize_basepath(basepath)
-    if basepath != "/":
-        final_html = final_html.replace('href="/', f'href="{basepath}')
-        final_html = final_html.replace('src="/', f'src="{basepath}')
 
-    dest.parent.mkdir(parents=True, exist_ok=True)
-    dest.write_text(final_html, encoding="utf-8")
-    print(f"[PAGE] Wrote {dest}")
+# Template compiled and block cache loaded once per worker process by _init_worker
+_worker_template: Template | None = None
+_worker_cache: BlockCache | None = None
+_worker_images: ImageIndex | None = None
 
 
+def _init_worker(
+    template_path: str | Path,
+    basepath: str,
+    log_level: int,
+    cache_config: tuple[int, str | None] | None,
+    images: ImageIndex | None = None,
+) -> None:
+    global _worker_template, _worker_cache, _worker_images
+    _worker_template = Template.from_file(template_path, basepath)
+    _worker_images = images
+    log.level = log_level
+    if cache_config is not None:
+        _worker_cache = BlockCache(*cache_config)
+
+
+def _render_job(job: tuple) -> tuple[str, str | None, dict | None, tuple | None, tuple | None, dict | None]:
+    """
+    Render one page inside a worker. Never raises: the page's log output, the
+    formatted traceback (or None), the stage timings (when profiling), the
+    block cache delta (new entries, hits, misses), the minified sizes
+    (bytes in, bytes out) and, when capturing, the page's {path: bytes} are
+    returned so the parent can report (and store) them in order without the
+    pool getting stuck on a failure.
+    """
+    md_path, dest_path, meta, tpl_path, basepath, profile, minify, capture = job
+    timer = PageTimer(str(md_path)) if profile else None
+    stats = MinifyStats() if minify else None
+    # Non-disk backends live in the parent; the page comes back as bytes
+    captured = MemoryOutput() if capture else None
+    buf = io.StringIO()
+    error = None
+    with contextlib.redirect_stdout(buf):
+        try:
+            generate_page(
+                from_path=md_path,
+                template_path=tpl_path,
+                dest_path=dest_path,
+                basepath=basepath,
+                _preloaded_template=_worker_template,
+                metadata=meta,
+                timer=timer,
+                cache=_worker_cache,
+                images=_worker_images,
+                minify=stats,
+                output=captured,
+            )
+        except Exception:
+            error = traceback.format_exc()
+        finally:
+            log.flush()
+    cache_delta = None
+    if _worker_cache is not None:
+        cache_delta = (_worker_cache.drain_new(), _worker_cache.hits, _worker_cache.misses)
+        _worker_cache.hits = _worker_cache.misses = 0
+    minify_delta = (stats.html_in, stats.html_out) if stats is not None else None
+    files = captured.files if captured is not None else None
+    return buf.getvalue(), error, (timer.stages if timer is not None else None), cache_delta, minify_delta, files
+
+
+def _generate_pages_parallel(
+    jobs: list[tuple[Path, str, dict]],
+    tpl_path: Path,
+    basepath: str,
+    workers: int,
+    profiler: Profiler | None = None,
+    cache: BlockCache | None = None,
+    images: ImageIndex | None = None,
+    minify: MinifyStats | None = None,
+    output: OutputBackend | None = None,
+) -> None:
+    """
+    Render (md_path, output path, metadata) jobs over a process pool. Each page's log
+    lines are printed as one block in input order; failures are collected and
+    raised together as PageGenerationError once every page has been attempted.
+    Workers write disk output themselves; for other backends the rendered
+    pages are sent back and stored here.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    on_disk = isinstance(output, DiskOutput)
+    tasks = [
+        (md, output.root / rel if on_disk else rel, meta, tpl_path, basepath,
+         profiler is not None, minify is not None, not on_disk)
+        for md, rel, meta in jobs
+    ]
+    chunksize = max(1, len(tasks) // (workers * 4))
+    failures = []
+    cache_config = None
+    if cache is not None:
+        cache_config = (cache.max_entries, str(cache.path) if cache.path is not None else None)
+    # Forked workers inherit the log buffer; flush so nothing is printed twice
+    log.flush()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(tpl_path, basepath, log.level, cache_config, images),
+        ) as pool:
+            results = pool.map(_render_job, tasks, chunksize=chunksize)
+            for (md_path, _, _), result in zip(jobs, results):
+                page_log, error, stages, cache_delta, minify_delta, files = result
+                log.write_raw(page_log)
+                if stages is not None:
+                    profiler.add_page(str(md_path), stages)
+                if cache_delta is not None:
+                    cache.update(*cache_delta)
+                if minify_delta is not None:
+                    minify.add_html(*minify_delta)
+                for path, data in (files or {}).items():
+                    output.write_bytes(path, data)
+                if error is not None:
+                    log.error(f"[ERROR] {md_path}\n{error}")
+                    failures.append((md_path, error))
+    except BrokenProcessPool as e:
+        raise PageGenerationError([(tpl_path, f"worker process died: {e}")]) from e
+    if failures:
+        raise PageGenerationError(failures)
+
 
 def generate_pages_recursive(
     dir_path_content: str | Path,
     template_path: str | Path,
     dest_dir_path: str | Path,
     basepath: str = "/",
-) -> None:
+    previous: dict[str, dict] | None = None,
+    workers: int = 1,
+    profiler: Profiler | None = None,
+    cache: BlockCache | None = None,
+    images: ImageIndex | None = None,
+    search: SearchIndex | None = None,
+    minify: MinifyStats | None = None,
+    output: OutputBackend | None = None,
+    shard: tuple[int, int] | None = None,
+    shard_by: str = "size",
+    metadata: MetadataIndex | None = None,
+) -> dict[str, dict]:
+    """
+    Render every *.md under dir_path_content into dest_dir_path (or into the
+    `output` backend, when given). With shard=(I, N), only the pages
+    shard.assign_shards gives to shard I are rendered and returned.
+
+    Every page's front matter is looked up in the `metadata` index (a fresh,
+    uncached one by default) before anything else: drafts are left out
+    entirely, and the rest are rendered with their metadata. Malformed front
+    matter is logged per page and raised together as PageGenerationError
+    before any page is rendered.
+
+    With workers > 1 the pages are rendered across a process pool
+    (see _generate_pages_parallel). Either way a failing page doesn't stop the
+    others; the failures are raised together as PageGenerationError. With a profiler, per-page stage timings
+    are recorded on it. With a block cache, unchanged blocks reuse their
+    rendered HTML. With an image index, images get their dimensions and
+    lazy-loading attributes. With a search index, every page is (re)indexed
+    as needed; writing the index is left to the caller. With minify stats,
+    pages are written minified.
+
+    When `previous` (the pages section of a BuildManifest) is given, pages whose
+    source hash is unchanged and whose output still exists are skipped, and
+    outputs of pages that no longer exist are deleted.
+    Returns the new {relative source: {"hash", "output"}} mapping.
+    """
     content_root = Path(dir_path_content)
     dest_root = Path(dest_dir_path)
     tpl_path = Path(template_path)
@@ -141,42 +424,584 @@ def generate_pages_recursive(
     if not tpl_path.exists():
         raise FileNotFoundError(f"Template not found: {tpl_path}")
 
-    template = tpl_path.read_text(encoding="utf-8")
-
-    for md_path in content_root.rglob("*.md"):
+    basepath = normalize_basepath(basepath)
+    previous = previous if previous is not None else {}
+    if output is None:
+        output = DiskOutput(dest_root)
+    if metadata is None:
+        metadata = MetadataIndex()
+
+    md_paths = sorted(content_root.rglob("*.md"))
+    if shard is not None:
+        index, count = shard
+        sizes = {p.relative_to(content_root).as_posix(): p.stat().st_size for p in md_paths}
+        assigned = assign_shards(sizes, count, shard_by)
+        md_paths = [p for p in md_paths if assigned[p.relative_to(content_root).as_posix()] == index]
+        log.info(f"[SHARD] {index}/{count}: {len(md_paths)} of {len(sizes)} page(s)")
+
+    pages = {}
+    jobs = []
+    skipped = drafts = 0
+    invalid = []
+    for md_path in md_paths:
         rel = md_path.relative_to(content_root)
-        out_rel = rel.with_suffix(".html")
-        dest_path = dest_root / out_rel
-
-        print(f"[PAGE] Generating page from {md_path} to {dest_path} using {tpl_path}")
-        markdown = md_path.read_text(encoding="utf-8")
-
-        generate_page(
-            from_path=md_path,
-            template_path=tpl_path,
-            dest_path=dest_path,
+        out_rel = rel.with_suffix(".html").as_posix()
+        digest = file_hash(md_path)
+        try:
+            meta = metadata.get(rel.as_posix(), md_path, digest)
+        except ValueError as e:
+            log.error(f"[ERROR] {e}")
+            invalid.append((md_path, str(e)))
+            continue
+        if meta.get("draft"):
+            drafts += 1
+            continue
+        pages[rel.as_posix()] = {"hash": digest, "output": out_rel}
+        if search is not None:
+            search.add_page(rel.as_posix(), md_path, digest, page_url(out_rel, basepath), meta.get("title"))
+
+        old = previous.get(rel.as_posix())
+        if old is not None and old["hash"] == digest and output.exists(out_rel):
+            skipped += 1
+            continue
+        jobs.append((md_path, out_rel, meta))
+    if invalid:
+        raise PageGenerationError(invalid)
+
+    try:
+        if workers > 1 and len(jobs) > 1:
+            _generate_pages_parallel(jobs, tpl_path, basepath, workers, profiler, cache, images, minify, output)
+        else:
+            template = Template.from_file(tpl_path, basepath)
+            failures = []
+            for md_path, out_rel, meta in jobs:
+                try:
+                    generate_page(
+                        from_path=md_path,
+                        template_path=tpl_path,
+                        dest_path=out_rel,
+                        basepath=basepath,
+                        _preloaded_template=template,  # optional optimization
+                        metadata=meta,
+                        timer=profiler.page(str(md_path)) if profiler is not None else None,
+                        cache=cache,
+                        images=images,
+                        minify=minify,
+                        output=output,
+                    )
+                except Exception:
+                    error = traceback.format_exc()
+                    log.error(f"[ERROR] {md_path}\n{error}")
+                    failures.append((md_path, error))
+            if failures:
+                raise PageGenerationError(failures)
+    finally:
+        log.flush()
+
+    for rel in previous.keys() - pages.keys():
+        output.remove(previous[rel]["output"])
+        log.info(f"[DEL FILE] {output.display(previous[rel]['output'])}")
+
+    if search is not None:
+        search.retain(pages)
+    if shard is None:
+        metadata.retain(p.relative_to(content_root).as_posix() for p in md_paths)
+    if skipped:
+        log.info(f"[PAGE] {skipped} unchanged page(s) skipped")
+    if drafts:
+        log.info(f"[PAGE] {drafts} draft(s) skipped")
+    log.flush()
+    return pages
+
+
+def build_site(
+    content: str | Path = "content",
+    template: str | Path = "template.html",
+    static: str | Path = "static",
+    dest: str | Path = "docs",
+    basepath: str = "/",
+    incremental: bool = False,
+    manifest_path: str | Path = DEFAULT_MANIFEST_PATH,
+    workers: int = 1,
+    profiler: Profiler | None = None,
+    cache: BlockCache | None = None,
+    image_dimensions: bool = True,
+    search_index: bool = False,
+    minify: bool = False,
+    fingerprint: bool = False,
+    precompress: bool = False,
+    publish_mode: str = "swap",
+    link_static: bool = False,
+    output: OutputBackend | None = None,
+    shard: tuple[int, int] | None = None,
+    shard_by: str = "size",
+    inline_css: str | None = None,
+    inline_images: int = 0,
+) -> BuildManifest:
+    """
+    Build the whole site. A full build is written to a staging directory next to
+    dest and published when complete (publish_mode "swap" renames it over dest,
+    "sync" moves changed files into dest and prunes the rest; see publish.py),
+    so dest is never seen half-built and a failed build leaves it untouched.
+    An incremental build reuses the manifest from the previous run and only
+    touches what changed, in place. Either way the manifest is rewritten at the end.
+    With image_dimensions, the images under static are probed (sizes cached
+    next to the manifest) so pages can reserve their layout space.
+    With search_index, a sharded full-text index is written to dest/search
+    (per-page terms are kept next to the manifest for incremental updates).
+    With minify, pages and CSS are written minified; switching it on or off
+    forces a full build. fingerprint and precompress run the post-build stages
+    from assets.py before the output is published. With link_static, static
+    files are hardlinked into dest instead of copied (see StaticCopier).
+    Page front matter is indexed (cached next to the manifest, see
+    frontmatter.MetadataIndex) and drafts are not built.
+    inline_css ("full" or "used") and inline_images (a byte limit) inline
+    stylesheets and small images into the pages (see inline.py), before the
+    other post-build stages; changing them forces a full build.
+
+    With an output backend (see output.py) the site is written there instead
+    of dest: always a full build, nothing is staged or published and the
+    manifest is left alone, since dest didn't change. The backend is closed
+    when the build finishes.
+
+    With shard=(I, N), only shard I's pages are rendered (see shard.py), always
+    in a full build, and dest gets them plus a partial manifest instead of the
+    static files; merge_shards combines the N outputs into the final site.
+    """
+    build_start = time.perf_counter()
+    inlining = inline_css is not None or inline_images > 0
+    if output is not None and (fingerprint or precompress or inlining):
+        raise ValueError("fingerprint, precompress and inlining need a directory output")
+    if shard is not None and (output is not None or search_index or fingerprint or precompress or inlining):
+        raise ValueError("A shard build can't write to an output backend or a search index; "
+                         "fingerprint, precompress and inlining run when the shards are merged")
+    basepath = normalize_basepath(basepath)
+    dest_path = Path(dest)
+    templates = {Path(template).as_posix(): file_hash(template)}
+    images = None
+    if image_dimensions:
+        images = ImageIndex.scan(static, Path(manifest_path).parent / "images.json")
+    images_version = images.version if images is not None else None
+    search = SearchIndex(Path(manifest_path).parent / "search.json") if search_index else None
+    metadata = MetadataIndex(Path(manifest_path).parent / "metadata.json")
+
+    options = {"minify": minify}
+    if inlining:
+        options["inline"] = {"css": inline_css, "images": inline_images}
+    minify_stats = MinifyStats() if minify else None
+
+    previous = BuildManifest.load(manifest_path) if incremental and output is None and shard is None else None
+    if previous is not None and previous.options != options:
+        log.info("[BUILD] Output options changed, doing a full build")
+        previous = None
+    if previous is not None and previous.needs_full_rebuild(basepath, templates, images_version):
+        log.info("[BUILD] Template, basepath or image sizes changed, re-rendering every page")
+        previous_pages = {}
+    elif previous is not None:
+        previous_pages = previous.pages
+    else:
+        previous_pages = None
+
+    if output is not None:
+        out_path = dest_path
+    else:
+        out_path = staging_dir(dest_path) if previous is None else dest_path
+    try:
+        copy_start = time.perf_counter()
+        if output is not None:
+            static_hashes = _static_copier(minify_stats, link_static).copy(static, output)
+        elif shard is not None:
+            # Static files are copied once, by merge_shards
+            clear_directory(out_path)
+            static_hashes = {}
+        elif previous is None:
+            # 1) Start from an empty staging dir, 2) copy static/ -> staging
+            static_hashes = copy_static_to_public(static, out_path, minify_stats, link_static)
+        else:
+            dest_path.mkdir(parents=True, exist_ok=True)
+            static_hashes = copy_static_incremental(static, dest, previous.static, minify_stats, link_static)
+            if inlining and static_hashes != previous.static:
+                # Pages carry copies of the stylesheets and images they inlined
+                log.info("[BUILD] Static files changed with inlining on, re-rendering every page")
+                previous_pages = {}
+        if profiler is not None:
+            profiler.add_build("static_copy", time.perf_counter() - copy_start)
+
+        # 3) Generate all content/ -> output using the template
+        pages = generate_pages_recursive(
+            dir_path_content=content,
+            template_path=template,
+            dest_dir_path=out_path,
             basepath=basepath,
-            _preloaded_template=template,  # optional optimization
+            previous=previous_pages,
+            workers=workers,
+            profiler=profiler,
+            cache=cache,
+            images=images,
+            search=search,
+            minify=minify_stats,
+            output=output,
+            shard=shard,
+            shard_by=shard_by,
+            metadata=metadata,
         )
+        if search is not None:
+            search.write(out_path, output)
+            search.save()
+        if shard is not None:
+            shard_manifest = BuildManifest(basepath, templates, pages, {}, images_version, options)
+            ShardManifest(*shard, shard_by, shard_manifest).save(out_path)
+
+        # 4) Post-build stages over the finished output
+        if inlining:
+            _inline(out_path, basepath, inline_css, inline_images, manifest_path)
+        if fingerprint:
+            from assets import fingerprint_assets
+            fingerprint_assets(out_path, static, basepath)
+        if precompress:
+            from assets import precompress as precompress_output
+            precompress_output(out_path)
+    except BaseException:
+        if out_path != dest_path:
+            shutil.rmtree(out_path, ignore_errors=True)
+        raise
+    finally:
+        if output is not None:
+            output.close()
+
+    if out_path != dest_path:
+        publish(out_path, dest_path, publish_mode)
+
+    manifest = BuildManifest(basepath, templates, pages, static_hashes, images_version, options)
+    if output is None and shard is None:
+        manifest.save(manifest_path)
+    metadata.save()
+    if cache is not None:
+        cache.save()
+        log.info(cache.stats())
+    if minify_stats is not None:
+        log.info(minify_stats.summary())
+    log.info(f"[BUILD] {len(pages)} page(s) in {time.perf_counter() - build_start:.2f}s")
+    log.flush()
+    return manifest
+
+
+def _inline(out_path: Path, basepath: str, css: str | None, images: int, manifest_path: str | Path) -> None:
+    AssetInliner(out_path, basepath, css, images, Path(manifest_path).parent / "inline.json").run()
+
+
+def merge_shards(
+    shard_dirs: list[str | Path],
+    content: str | Path = "content",
+    static: str | Path = "static",
+    dest: str | Path = "docs",
+    manifest_path: str | Path = DEFAULT_MANIFEST_PATH,
+    fingerprint: bool = False,
+    precompress: bool = False,
+    publish_mode: str = "swap",
+    link_static: bool = False,
+    inline_css: str | None = None,
+    inline_images: int = 0,
+) -> BuildManifest:
+    """
+    Combine the outputs of N `shard=(I, N)` builds and a copy of static into
+    dest, staged and published like a full build, and write the manifest for
+    the whole site so later incremental builds can pick up from it.
+
+    Raises ValueError, leaving dest untouched, when the shards don't add up:
+    a shard missing or given twice, shards built with different settings, a
+    path written by two shards (or by a shard and static), or pages under
+    content that no shard built (or that no longer exist).
+    """
+    start = time.perf_counter()
+    dirs = [Path(d) for d in shard_dirs]
+    if not dirs:
+        raise ValueError("No shard outputs to merge")
+    shards = [ShardManifest.load(d) for d in dirs]
+    first = shards[0]
+    count = first.count
+    indices = sorted(s.index for s in shards)
+    if indices != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1..{count} once each, got {', '.join(map(str, indices))}")
+    for s in shards:
+        m, ref = s.manifest, first.manifest
+        if (s.count, s.strategy, m.basepath, m.templates, m.images, m.options) != (
+            count, first.strategy, ref.basepath, ref.templates, ref.images, ref.options
+        ):
+            raise ValueError(f"Shard {s.index}/{s.count} was built with different settings than shard {first.index}/{count}")
+
+    pages, built_by = {}, {}
+    for s in shards:
+        for rel, page in s.manifest.pages.items():
+            if rel in built_by:
+                raise ValueError(f"{rel} was built by both shard {built_by[rel]} and shard {s.index}")
+            built_by[rel] = s.index
+            pages[rel] = page
+    content_root = Path(content)
+    expected = {
+        p.relative_to(content_root).as_posix() for p in content_root.rglob("*.md") if not read_meta(p).get("draft")
+    }
+    missing, extra = sorted(expected - pages.keys()), sorted(pages.keys() - expected)
+    if missing:
+        raise ValueError(f"{len(missing)} page(s) not built by any shard: {', '.join(missing[:10])}")
+    if extra:
+        raise ValueError(f"Shards built {len(extra)} page(s) that are not in {content_root}: {', '.join(extra[:10])}")
+
+    ref = first.manifest
+    dest_path = Path(dest)
+    out_path = staging_dir(dest_path)
+    minify_stats = MinifyStats() if ref.options.get("minify") else None
+    options = dict(ref.options)
+    if inline_css is not None or inline_images > 0:
+        options["inline"] = {"css": inline_css, "images": inline_images}
+    try:
+        static_hashes = copy_static_to_public(static, out_path, minify_stats, link_static)
+        written = dict.fromkeys(static_hashes, "static")
+        copied = 0
+        for s, shard_dir in zip(shards, dirs):
+            for f in sorted(p for p in shard_dir.rglob("*") if p.is_file()):
+                rel = f.relative_to(shard_dir).as_posix()
+                if rel == SHARD_MANIFEST_NAME:
+                    continue
+                if rel in written:
+                    raise ValueError(f"{rel} is written by both {written[rel]} and shard {s.index}")
+                written[rel] = f"shard {s.index}"
+                target = out_path / rel
+                target.parent.mkdir(parents=True, exist_ok=True)
+                copy_file(f, target)
+                copied += 1
+        log.info(f"[MERGE] {copied} file(s) from {len(shards)} shard(s)")
+
+        if "inline" in options:
+            _inline(out_path, ref.basepath, inline_css, inline_images, manifest_path)
+        if fingerprint:
+            from assets import fingerprint_assets
+            fingerprint_assets(out_path, static, ref.basepath)
+        if precompress:
+            from assets import precompress as precompress_output
+            precompress_output(out_path)
+    except BaseException:
+        shutil.rmtree(out_path, ignore_errors=True)
+        raise
+
+    publish(out_path, dest_path, publish_mode)
+    manifest = BuildManifest(ref.basepath, ref.templates, pages, static_hashes, ref.images, options)
+    manifest.save(manifest_path)
+    log.info(f"[BUILD] {len(pages)} page(s) merged in {time.perf_counter() - start:.2f}s")
+    log.flush()
+    return manifest
+
+
+def parse_args(argv: list[str]):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build the static site into docs/.")
+    parser.add_argument("basepath", nargs="?", default="/", help="URL prefix for root-relative links")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="only rebuild pages and static files whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "--manifest", default=str(DEFAULT_MANIFEST_PATH),
+        help="where to keep the build manifest (default: %(default)s)",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1, metavar="N",
+        help="render pages across N worker processes (0 = one per CPU core)",
+    )
+    parser.add_argument(
+        "--block-cache", choices=("off", "memory", "disk"), default="memory",
+        help="reuse rendered HTML of identical blocks; 'disk' also keeps it between builds "
+             f"in {DEFAULT_BLOCK_CACHE_PATH} (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--block-cache-size", type=int, default=20000, metavar="N",
+        help="maximum number of cached blocks kept in memory (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-image-dimensions", dest="image_dimensions", action="store_false",
+        help="don't probe static images for width/height and lazy-loading attributes",
+    )
+    parser.add_argument(
+        "--minify", action="store_true",
+        help="collapse whitespace and drop comments in the generated HTML and copied CSS",
+    )
+    parser.add_argument(
+        "--search", action="store_true",
+        help="write a sharded full-text search index to docs/search/",
+    )
+    parser.add_argument(
+        "--publish", choices=PUBLISH_MODES, default="swap",
+        help="how a full build replaces docs/: 'swap' renames the finished build over it, "
+             "'sync' updates changed files in place and prunes the rest (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--link-static", action="store_true",
+        help="hardlink static files into docs/ instead of copying them (same filesystem only)",
+    )
+    parser.add_argument(
+        "--fingerprint", action="store_true",
+        help="add content-hashed copies of static assets, point the pages at them "
+             "and write a _headers file marking them immutable",
+    )
+    parser.add_argument(
+        "--precompress", action="store_true",
+        help="write .gz siblings of HTML/CSS/JS/SVG output",
+    )
+    parser.add_argument(
+        "--inline-css", choices=INLINE_CSS_MODES,
+        help="inline local stylesheets into each page's <style>: 'full' copies them whole, "
+             "'used' keeps only the rules whose selectors match elements on the page",
+    )
+    parser.add_argument(
+        "--inline-images", nargs="?", type=int, const=DEFAULT_IMAGE_LIMIT, default=0, metavar="BYTES",
+        help="embed local images of at most BYTES (default %(const)s) as data: URIs",
+    )
+    parser.add_argument(
+        "--size-report", action="store_true",
+        help="after the build, report output and page sizes, the biggest growth since the "
+             "last report within budget and any size budgets exceeded",
+    )
+    parser.add_argument(
+        "--budgets", metavar="PATH",
+        help=f"size budgets for --size-report (JSON; default: {DEFAULT_BUDGETS_PATH} if it exists, "
+             "else 2MB per file and 4MB per page)",
+    )
+    parser.add_argument(
+        "--strict", action="store_true",
+        help="exit with status 1 when a size budget is exceeded (implies --size-report)",
+    )
+    parser.add_argument(
+        "--archive", metavar="PATH",
+        help="write the site into a .tar.gz, .tgz, .tar or .zip archive instead of docs/",
+    )
+    parser.add_argument(
+        "--shard", metavar="I/N",
+        help="render only shard I of N of the pages (e.g. on one of N CI runners) into "
+             f"{DEFAULT_SHARD_ROOT}/I/, without static files; combine the shards with --merge",
+    )
+    parser.add_argument(
+        "--shard-by", choices=SHARD_STRATEGIES, default="size",
+        help="how pages are split into shards: balanced by file size, or by a stable hash "
+             "of the path (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--merge", nargs="*", metavar="DIR",
+        help="combine --shard outputs (default: every directory in "
+             f"{DEFAULT_SHARD_ROOT}/) and the static files into docs/",
+    )
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        "-q", "--quiet", dest="log_level", action="store_const", const=QUIET, default=NORMAL,
+        help="only print errors",
+    )
+    verbosity.add_argument(
+        "-v", "--verbose", dest="log_level", action="store_const", const=VERBOSE,
+        help="also print every static file copied and deleted",
+    )
+    parser.add_argument(
+        "--profile", nargs="?", const="build-profile.json", metavar="PATH",
+        help="time every build stage per page and write a report (.json or .csv; default %(const)s)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be >= 0")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.inline_images < 0:
+        parser.error("--inline-images must be >= 0")
+    inlining = args.inline_css is not None or args.inline_images > 0
+    if args.archive and (args.incremental or args.fingerprint or args.precompress or inlining):
+        parser.error("--archive can't be combined with --incremental, --fingerprint, --precompress or inlining")
+    if args.shard is not None:
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.merge is not None or args.archive or args.search or args.fingerprint or args.precompress or inlining:
+            parser.error("--shard can't be combined with --merge, --archive, --search, --fingerprint, "
+                         "--precompress or inlining")
+    if args.merge is not None and (args.archive or args.search or args.incremental):
+        parser.error("--merge can't be combined with --archive, --search or --incremental")
+    args.size_report = args.size_report or args.budgets is not None or args.strict
+    if args.size_report and (args.archive or args.shard):
+        parser.error("--size-report, --budgets and --strict need a build into docs/")
+    return args
 
-        
-if __name__ == "__main__":
-    import sys
-
-    # Grab basepath from CLI arg (default "/")
-    basepath = sys.argv[1] if len(sys.argv) > 1 else "/"
-
-    # 1) Delete anything in docs/
-    docs_dir = Path("docs")
-    clear_directory(docs_dir)
-
-    # 2) Copy static/ -> docs/
-    copy_static_to_public("static", "docs")
 
-    # 3) Generate all content/ -> docs/ using template.html
-    generate_pages_recursive(
-        dir_path_content="content",
-        template_path="template.html",
-        dest_dir_path="docs",
-        basepath=basepath,
-    )
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    log.level = args.log_level
+    profiler = Profiler() if args.profile else None
+    cache = None
+    if args.block_cache != "off":
+        cache_path = DEFAULT_BLOCK_CACHE_PATH if args.block_cache == "disk" else None
+        cache = BlockCache(args.block_cache_size, cache_path)
+
+    if args.merge is not None:
+        if not args.merge and not DEFAULT_SHARD_ROOT.is_dir():
+            log.error(f"[FAILED] No shard outputs to merge: {DEFAULT_SHARD_ROOT}/ does not exist")
+            sys.exit(1)
+        dirs = args.merge or sorted(
+            p for p in DEFAULT_SHARD_ROOT.iterdir() if p.is_dir() and not p.name.startswith(".")
+        )
+        try:
+            manifest = merge_shards(
+                dirs,
+                manifest_path=args.manifest,
+                fingerprint=args.fingerprint,
+                precompress=args.precompress,
+                publish_mode=args.publish,
+                link_static=args.link_static,
+                inline_css=args.inline_css,
+                inline_images=args.inline_images,
+            )
+        except ValueError as e:
+            log.error(f"[FAILED] {e}")
+            sys.exit(1)
+    else:
+        try:
+            manifest = build_site(
+                content="content",
+                template="template.html",
+                static="static",
+                dest=shard_output_dir(args.shard[0]) if args.shard else "docs",
+                basepath=args.basepath,
+                incremental=args.incremental,
+                manifest_path=args.manifest,
+                workers=args.jobs,
+                profiler=profiler,
+                cache=cache,
+                image_dimensions=args.image_dimensions,
+                search_index=args.search,
+                minify=args.minify,
+                fingerprint=args.fingerprint,
+                precompress=args.precompress,
+                publish_mode=args.publish,
+                link_static=args.link_static,
+                output=ArchiveOutput(args.archive) if args.archive else None,
+                shard=args.shard,
+                shard_by=args.shard_by,
+                inline_css=args.inline_css,
+                inline_images=args.inline_images,
+            )
+        except PageGenerationError as e:
+            log.error(f"[FAILED] {e}")
+            sys.exit(1)
+
+        if profiler is not None:
+            profiler.write_report(args.profile)
+            log.info(profiler.summary())
+            log.info(f"[PROFILE] Report written to {args.profile}")
+
+    if args.size_report:
+        violations = size_report(
+            "docs",
+            manifest.basepath,
+            Budgets.load(args.budgets or DEFAULT_BUDGETS_PATH),
+            Path(args.manifest).parent / "sizes.json",
+        )
+        log.flush()
+        if violations and args.strict:
+            log.error(f"[FAILED] {len(violations)} size budget(s) exceeded")
+            sys.exit(1)
@@ -0,0 +1,135 @@
+import contextlib
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_VERSION = 1
+CACHE_DIR = Path(".ssg-cache")
+DEFAULT_MANIFEST_PATH = CACHE_DIR / "manifest.json"
+
+
+def file_hash(path: str | Path) -> str:
+    """Return the sha256 hex digest of a file's bytes, read in chunks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextlib.contextmanager
+def atomic_open_text(path: str | Path):
+    """
+    Open a temporary sibling of path for writing text and rename it into place
+    on success, so readers never see a partial file; on error it is removed.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as fp:
+            yield fp
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_bytes(path: str | Path, data: bytes) -> None:
+    """Write a whole file through a temporary sibling and rename (see atomic_open_text)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: str | Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+class BuildManifest:
+    """
+    Record of the inputs used for the last build of an output directory.
+
+    - basepath:  basepath the pages were rendered with
+    - templates: template path -> hash
+    - pages:     content-relative markdown path -> {"hash": ..., "output": ...}
+    - static:    static-relative file path -> hash
+    - images:    images.ImageIndex version the pages were rendered with (or None)
+    - options:   output options (e.g. {"minify": True}) that affect every output file
+    """
+
+    def __init__(self, basepath="/", templates=None, pages=None, static=None, images=None, options=None):
+        self.basepath = basepath
+        self.templates = templates if templates is not None else {}
+        self.pages = pages if pages is not None else {}
+        self.static = static if static is not None else {}
+        self.images = images
+        self.options = options if options is not None else {}
+
+    @classmethod
+    def load(cls, path: str | Path) -> "BuildManifest | None":
+        """Load a manifest; returns None if it is missing, unreadable or from another version."""
+        p = Path(path)
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_dict(cls, data) -> "BuildManifest | None":
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+            return None
+        return cls(
+            basepath=data.get("basepath", "/"),
+            templates=data.get("templates", {}),
+            pages=data.get("pages", {}),
+            static=data.get("static", {}),
+            images=data.get("images"),
+            options=data.get("options", {}),
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "basepath": self.basepath,
+            "templates": self.templates,
+            "pages": self.pages,
+            "static": self.static,
+            "images": self.images,
+            "options": self.options,
+        }
+
+    def save(self, path: str | Path) -> None:
+        """Write the manifest atomically (temp file + rename)."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(p, json.dumps(self.to_dict(), indent=1, sort_keys=True))
+
+    def needs_full_rebuild(self, basepath: str, templates: dict[str, str], images: str | None = None) -> bool:
+        """True when the basepath, any template or the image dimensions differ from this manifest."""
+        return self.basepath != basepath or self.templates != templates or self.images != images
+
+    def __repr__(self):
+        return (
+            f"BuildManifest({self.basepath}, templates: {len(self.templates)}, "
+            f"pages: {len(self.pages)}, static: {len(self.static)})"
+        )
+
+
+def remove_output(path: Path, stop_at: Path) -> None:
+    """Delete an output file, then prune now-empty parent directories up to stop_at."""
+    path.unlink(missing_ok=True)
+    parent = path.parent
+    stop_at = stop_at.resolve()
+    while parent.resolve() != stop_at and parent.exists():
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+        parent = parent.parent
@@ -0,0 +1,249 @@
+import re
+
+# Elements whose contents are written verbatim
+RAW_TAGS = frozenset({"pre", "code", "textarea", "script", "style"})
+# Whitespace next to these tags never renders, so it is dropped entirely
+BLOCK_TAGS = frozenset({
+    "html", "head", "body", "title", "meta", "link", "script", "style", "base",
+    "article", "aside", "blockquote", "div", "footer", "header", "main", "nav", "section",
+    "p", "pre", "ul", "ol", "li", "dl", "dt", "dd", "h1", "h2", "h3", "h4", "h5", "h6",
+    "hr", "br", "table", "thead", "tbody", "tfoot", "tr", "td", "th", "figure", "figcaption",
+    "form", "fieldset", "legend", "!doctype",
+})
+# HTML void elements: "/>" is redundant
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr",
+})
+
+_WS_RE = re.compile(r"\s+")
+_RAW_END_RE = {tag: re.compile(f"</{tag}", re.I) for tag in RAW_TAGS}
+_TAG_NAME_RE = re.compile(r"<(/?)([A-Za-z][A-Za-z0-9-]*|!doctype)", re.I)
+# A whole tag: a ">" inside a quoted attribute value does not end it
+_TAG_END_RE = re.compile(r"""<[^"'>]*(?:(?:"[^"]*"|'[^']*')[^"'>]*)*>""")
+_ATTR_RE = re.compile(r"""([^\s=/>"']+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s>"']+))?""")
+_UNQUOTED_RE = re.compile(r"[^\s\"'=<>`/]+")
+# Enough of a tag start to read its name, e.g. "<blockquote"
+_NAME_LOOKAHEAD = 12
+
+_CSS_TOKEN_RE = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)|([^"'\s/]+|/)""", re.S)
+_CSS_PUNCT = "{};,>"
+
+
+def minify_tag(tag: str) -> str:
+    """Normalize whitespace in a tag, unquote simple attribute values and drop '/' on void elements."""
+    m = _TAG_NAME_RE.match(tag)
+    if m is None or tag.startswith("<!"):
+        return _WS_RE.sub(" ", tag)
+    closing, name = m.groups()
+    if closing:
+        return f"</{name}>"
+    body = tag[m.end():-1].rstrip()
+    self_closing = body.endswith("/")
+    if self_closing:
+        body = body[:-1]
+    attrs = _ATTR_RE.findall(body)
+    out = ["<", name]
+    for i, (attr, value) in enumerate(attrs):
+        out.append(" ")
+        out.append(attr)
+        if not value:
+            continue
+        if value[0] in "\"'":
+            inner = value[1:-1]
+            # A trailing unquoted value would swallow a kept "/" of "/>"
+            last_before_slash = self_closing and name.lower() not in VOID_TAGS and i == len(attrs) - 1
+            if inner and _UNQUOTED_RE.fullmatch(inner) and not last_before_slash:
+                value = inner
+        out.append("=")
+        out.append(value)
+    if self_closing and name.lower() not in VOID_TAGS:
+        out.append("/")
+    out.append(">")
+    return "".join(out)
+
+
+class HtmlMinifier:
+    """
+    Text file wrapper that minifies HTML written to it in chunks.
+
+    Whitespace runs outside <pre>, <code>, <textarea>, <script> and <style> are
+    collapsed to one space (and dropped next to block-level tags), comments are
+    removed (except conditional ones) and tags go through minify_tag. Input is
+    buffered and processed in batches up to the last complete token, so it can
+    sit directly under Template.render_to / write_html. Call close() at the end;
+    the wrapped file is not closed.
+    """
+
+    def __init__(self, fp, batch_size: int = 16384):
+        self.fp = fp
+        self.batch_size = batch_size
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._pending = []
+        self._pending_len = 0
+        self._buf = ""
+        self._raw = None  # name of the raw element we're inside, if any
+        self._prev_tag = "!doctype"  # treat document start as a block boundary
+        self._space = True  # last emitted text ended in whitespace
+
+    def write(self, s: str) -> int:
+        self._pending.append(s)
+        self._pending_len += len(s)
+        if self._pending_len >= self.batch_size:
+            self._feed(final=False)
+        return len(s)
+
+    def close(self) -> None:
+        self._feed(final=True)
+
+    def _emit(self, out: list[str]) -> None:
+        text = "".join(out)
+        if text:
+            self.bytes_out += len(text.encode("utf-8"))
+            self.fp.write(text)
+
+    def _feed(self, final: bool) -> None:
+        chunk = "".join(self._pending)
+        self._pending.clear()
+        self._pending_len = 0
+        self.bytes_in += len(chunk.encode("utf-8"))
+        buf = self._buf + chunk
+        out = []
+        pos = 0
+        n = len(buf)
+        while pos < n:
+            if self._raw is not None:
+                m = _RAW_END_RE[self._raw].search(buf, pos)
+                if m is None:
+                    # Keep a tail that might hold the start of the closing tag
+                    keep = n if final else max(pos, n - len(self._raw) - 2)
+                    out.append(buf[pos:keep])
+                    pos = keep
+                    break
+                out.append(buf[pos:m.start()])
+                pos = m.start()
+                self._raw = None
+                continue
+
+            if buf.startswith("<!--", pos):
+                end = buf.find("-->", pos + 4)
+                if end == -1:
+                    if final:
+                        out.append(buf[pos:])
+                        pos = n
+                    break
+                if buf.startswith("<!--[if", pos):
+                    out.append(buf[pos:end + 3])
+                pos = end + 3
+                continue
+
+            m = _TAG_NAME_RE.match(buf, pos)
+            if m is not None:
+                whole = _TAG_END_RE.match(buf, pos)
+                if whole is not None:
+                    end = whole.end() - 1
+                elif final:
+                    # An unbalanced quote: fall back to the first ">"
+                    end = buf.find(">", pos)
+                else:
+                    # Incomplete, or a quoted value continues past this batch
+                    break
+                if end == -1:
+                    out.append(buf[pos:])
+                    pos = n
+                    break
+                closing, name = m.groups()
+                name = name.lower()
+                out.append(minify_tag(buf[pos:end + 1]))
+                self._space = False
+                self._prev_tag = name
+                if not closing and name in RAW_TAGS:
+                    self._raw = name
+                pos = end + 1
+                continue
+
+            # Text: up to the next tag or comment (a stray "<" is text)
+            end = buf.find("<", pos + 1 if buf[pos] == "<" else pos)
+            while end != -1 and not (_TAG_NAME_RE.match(buf, end) or buf.startswith("<!--", end)):
+                if end + _NAME_LOOKAHEAD > n and not final:
+                    break
+                end = buf.find("<", end + 1)
+            if end == -1 or end + _NAME_LOOKAHEAD > n:
+                if not final:
+                    break
+            if end == -1:
+                end = n
+            nxt = _TAG_NAME_RE.match(buf, end)
+            next_tag = nxt.group(2).lower() if nxt is not None else None
+            text = _WS_RE.sub(" ", buf[pos:end])
+            if text.startswith(" ") and (self._space or self._prev_tag in BLOCK_TAGS):
+                text = text[1:]
+            if text.endswith(" ") and (next_tag in BLOCK_TAGS or (end == n and final)):
+                text = text[:-1]
+            if text:
+                out.append(text)
+                self._space = text.endswith(" ")
+            pos = end
+        self._buf = buf[pos:]
+        self._emit(out)
+
+
+def minify_html(html: str) -> str:
+    import io
+
+    buf = io.StringIO()
+    m = HtmlMinifier(buf)
+    m.write(html)
+    m.close()
+    return buf.getvalue()
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and insignificant whitespace; strings are left alone."""
+    out = []
+    pending_space = False
+    for m in _CSS_TOKEN_RE.finditer(css):
+        string, comment, space, text = m.groups()
+        if comment is not None or space is not None:
+            pending_space = True
+            continue
+        tok = string if string is not None else text
+        if string is None:
+            tok = tok.replace(";}", "}")
+        if out:
+            last = out[-1][-1]
+            if tok[0] == "}" and last == ";":
+                out[-1] = out[-1][:-1]
+                last = out[-1][-1] if out[-1] else "{"
+            # "a :hover" differs from "a:hover", so only the space after ":" goes
+            if pending_space and last not in _CSS_PUNCT + ":" and tok[0] not in _CSS_PUNCT:
+                out.append(" ")
+        out.append(tok)
+        pending_space = False
+    return "".join(out)
+
+
+class MinifyStats:
+    """Bytes before and after minification, for the build summary."""
+
+    __slots__ = ("html_in", "html_out", "css_in", "css_out")
+
+    def __init__(self):
+        self.html_in = self.html_out = self.css_in = self.css_out = 0
+
+    def add_html(self, bytes_in: int, bytes_out: int) -> None:
+        self.html_in += bytes_in
+        self.html_out += bytes_out
+
+    def add_css(self, bytes_in: int, bytes_out: int) -> None:
+        self.css_in += bytes_in
+        self.css_out += bytes_out
+
+    def summary(self) -> str:
+        saved = self.html_in - self.html_out + self.css_in - self.css_out
+        total = self.html_in + self.css_in
+        pct = saved / total if total else 0.0
+        return (
+            f"[MINIFY] HTML {self.html_in:,} -> {self.html_out:,} bytes, "
+            f"CSS {self.css_in:,} -> {self.css_out:,} bytes; saved {saved:,} ({pct:.0%})"
+        )
@@ -0,0 +1,220 @@
+import contextlib
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from manifest import atomic_open_text, atomic_write_bytes, remove_output
+from staticcopy import copy_file
+
+
+class OutputBackend:
+    """
+    Where a build's files go. Paths are posix paths relative to the site root
+    ("index.html", "blog/post/index.html").
+
+    Backends must tolerate write_bytes/copy_from/link being called from
+    several threads (the static copy runs on a thread pool).
+    """
+
+    def open_text(self, path: str):
+        """Context manager yielding a text file; the file is committed only if the block succeeds."""
+        raise NotImplementedError
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        raise NotImplementedError
+
+    def copy_from(self, src: Path, path: str, link: bool = False) -> str:
+        """Store the file at src as path; returns how it was copied."""
+        raise NotImplementedError
+
+    def link(self, existing: str, path: str) -> bool:
+        """Store path as a duplicate of the already written `existing`; False if the backend can't."""
+        return False
+
+    def exists(self, path: str) -> bool:
+        return False
+
+    def stat(self, path: str) -> os.stat_result | None:
+        """Metadata of an existing output, where the backend has it (used to skip unchanged files)."""
+        return None
+
+    def remove(self, path: str) -> None:
+        pass
+
+    def display(self, path: str) -> str:
+        return path
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class DiskOutput(OutputBackend):
+    """Files under a directory; each one is written to a temporary sibling and renamed into place."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def _prepare(self, path: str) -> Path:
+        dest = self.root / path
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        return dest
+
+    def open_text(self, path: str):
+        return atomic_open_text(self._prepare(path))
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        atomic_write_bytes(self._prepare(path), data)
+
+    def copy_from(self, src: Path, path: str, link: bool = False) -> str:
+        return copy_file(src, self._prepare(path), link)
+
+    def link(self, existing: str, path: str) -> bool:
+        dest = self._prepare(path)
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(self.root / existing, dest)
+        except OSError:
+            return False
+        return True
+
+    def exists(self, path: str) -> bool:
+        return (self.root / path).exists()
+
+    def stat(self, path: str) -> os.stat_result | None:
+        try:
+            return (self.root / path).stat()
+        except FileNotFoundError:
+            return None
+
+    def remove(self, path: str) -> None:
+        remove_output(self.root / path, self.root)
+
+    def display(self, path: str) -> str:
+        return str(self.root / path)
+
+
+class MemoryOutput(OutputBackend):
+    """Files kept in `files` ({path: bytes}), e.g. to serve directly or to assert on in tests."""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+
+    @contextlib.contextmanager
+    def open_text(self, path: str):
+        buf = io.StringIO()
+        yield buf
+        self.files[path] = buf.getvalue().encode("utf-8")
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        self.files[path] = bytes(data)
+
+    def copy_from(self, src: Path, path: str, link: bool = False) -> str:
+        self.files[path] = Path(src).read_bytes()
+        return "memory"
+
+    def link(self, existing: str, path: str) -> bool:
+        self.files[path] = self.files[existing]
+        return True
+
+    def exists(self, path: str) -> bool:
+        return path in self.files
+
+    def remove(self, path: str) -> None:
+        self.files.pop(path, None)
+
+    def text(self, path: str) -> str:
+        return self.files[path].decode("utf-8")
+
+
+class ArchiveOutput(OutputBackend):
+    """
+    Streams files into a .tar.gz/.tgz/.tar or .zip archive as they are
+    produced; no temporary files. Pages are buffered in memory until complete
+    (a tar member needs its size up front), static files are read straight
+    from their source and duplicates become tar hardlink members (zip stores
+    them again). Writes are serialized with a lock. Call close() (or use as a
+    context manager) to finish the archive.
+    """
+
+    def __init__(self, path: str | Path, prefix: str = ""):
+        self.path = Path(path)
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self._lock = threading.Lock()
+        self._names: set[str] = set()
+        name = self.path.name.lower()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if name.endswith(".zip"):
+            self._zip = zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED)
+            self._tar = None
+        elif name.endswith((".tar.gz", ".tgz", ".tar")):
+            self._tar = tarfile.open(self.path, "w:gz" if not name.endswith(".tar") else "w")
+            self._zip = None
+        else:
+            raise ValueError(f"Unsupported archive type: {self.path} (use .tar.gz, .tgz, .tar or .zip)")
+
+    def _member(self, path: str, size: int, mtime: float | None = None) -> tarfile.TarInfo:
+        info = tarfile.TarInfo(self.prefix + path)
+        info.size = size
+        info.mtime = int(mtime if mtime is not None else time.time())
+        info.mode = 0o644
+        return info
+
+    @contextlib.contextmanager
+    def open_text(self, path: str):
+        buf = io.StringIO()
+        yield buf
+        self.write_bytes(path, buf.getvalue().encode("utf-8"))
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        with self._lock:
+            self._names.add(path)
+            if self._tar is not None:
+                self._tar.addfile(self._member(path, len(data)), io.BytesIO(data))
+            else:
+                self._zip.writestr(self.prefix + path, data)
+
+    def copy_from(self, src: Path, path: str, link: bool = False) -> str:
+        with self._lock:
+            self._names.add(path)
+            if self._tar is not None:
+                st = os.stat(src)
+                with open(src, "rb") as f:
+                    self._tar.addfile(self._member(path, st.st_size, st.st_mtime), f)
+            else:
+                self._zip.write(src, self.prefix + path)
+        return "archive"
+
+    def link(self, existing: str, path: str) -> bool:
+        if self._tar is None:
+            return False  # zip has no links; the file is stored again
+        with self._lock:
+            self._names.add(path)
+            info = self._member(path, 0)
+            info.type = tarfile.LNKTYPE
+            info.linkname = self.prefix + existing
+            self._tar.addfile(info)
+        return True
+
+    def exists(self, path: str) -> bool:
+        return path in self._names
+
+    def close(self) -> None:
+        with self._lock:
+            if self._tar is not None:
+                self._tar.close()
+            else:
+                self._zip.close()
+
+    def display(self, path: str) -> str:
+        return f"{self.path}:{self.prefix}{path}"
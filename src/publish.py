@@ -0,0 +1,113 @@
+import ctypes
+import filecmp
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from instrument import log
+from manifest import remove_output
+
+PUBLISH_MODES = ("swap", "sync")
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+
+
+def staging_dir(dest: str | Path) -> Path:
+    """Where a full build of dest is written before it is published: a sibling, so renames stay on one filesystem."""
+    dest = Path(dest)
+    return dest.with_name(f".{dest.name}.staging")
+
+
+def _exchange(a: Path, b: Path) -> bool:
+    """Atomically swap two paths with renameat2(RENAME_EXCHANGE); False where unsupported."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        renameat2 = ctypes.CDLL(None, use_errno=True).renameat2
+    except (OSError, AttributeError):
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    renameat2.restype = ctypes.c_int
+    return renameat2(_AT_FDCWD, os.fsencode(a), _AT_FDCWD, os.fsencode(b), _RENAME_EXCHANGE) == 0
+
+
+def _files(root: Path) -> dict[str, Path]:
+    return {p.relative_to(root).as_posix(): p for p in root.rglob("*") if p.is_file()}
+
+
+def _same(a: Path, b: Path) -> bool:
+    return filecmp.cmp(a, b, shallow=False)
+
+
+def publish_swap(staging: str | Path, dest: str | Path) -> tuple[int, int]:
+    """
+    Replace dest with staging in one rename. Files whose content didn't change
+    get their previous mtime back first, so only real changes look new.
+    Returns (unchanged, changed) file counts.
+    """
+    staging, dest = Path(staging), Path(dest)
+    old = _files(dest) if dest.is_dir() else {}
+    new_files = _files(staging)
+    unchanged = changed = 0
+    for rel, new in new_files.items():
+        prev = old.get(rel)
+        if prev is not None and _same(prev, new):
+            shutil.copystat(prev, new)
+            unchanged += 1
+        else:
+            changed += 1
+
+    if not dest.exists():
+        os.rename(staging, dest)
+    elif _exchange(staging, dest):
+        shutil.rmtree(staging)
+    else:
+        # Two renames: dest is briefly missing, but never half-written
+        retired = dest.with_name(f".{dest.name}.old")
+        shutil.rmtree(retired, ignore_errors=True)
+        os.rename(dest, retired)
+        os.rename(staging, dest)
+        shutil.rmtree(retired)
+    log.info(f"[PUBLISH] Swapped in {dest}: {changed} changed, {unchanged} unchanged, {len(old.keys() - new_files.keys())} removed")
+    return unchanged, changed
+
+
+def publish_sync(staging: str | Path, dest: str | Path) -> tuple[int, int, int]:
+    """
+    Update dest in place from staging: changed files are moved over their old
+    version one atomic rename at a time, identical ones are left alone (mtime
+    included) and files staging doesn't have are pruned. staging is removed.
+    Returns (unchanged, changed, removed) file counts.
+    """
+    staging, dest = Path(staging), Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    new_files = _files(staging)
+    unchanged = changed = 0
+    for rel, new in new_files.items():
+        target = dest / rel
+        if target.is_file() and _same(target, new):
+            unchanged += 1
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(new, target)
+        changed += 1
+
+    removed = 0
+    for rel, path in _files(dest).items():
+        if rel not in new_files:
+            remove_output(path, dest)
+            removed += 1
+    shutil.rmtree(staging)
+    log.info(f"[PUBLISH] Synced {dest}: {changed} changed, {unchanged} unchanged, {removed} removed")
+    return unchanged, changed, removed
+
+
+def publish(staging: str | Path, dest: str | Path, mode: str = "swap") -> None:
+    if mode == "swap":
+        publish_swap(staging, dest)
+    elif mode == "sync":
+        publish_sync(staging, dest)
+    else:
+        raise ValueError(f"Unknown publish mode: {mode}")
@@ -0,0 +1,156 @@
+"""
+Build-time full-text search index.
+
+Output layout under <dest>/search/:
+
+    docs.json      {"docs": [[title, url], ...], "shards": ["ab", "ac", ...]}
+    <prefix>.json  {term: [doc id, term frequency, doc id, term frequency, ...]}
+
+Terms are lower-cased words of at least two characters; a term lives in the
+shard named by its first two characters ("_" for anything that isn't a safe
+file name), so a search box only fetches docs.json plus one shard per query
+word. Doc ids are indexes into "docs".
+"""
+import json
+import re
+import time
+from collections import Counter
+from pathlib import Path
+
+from instrument import log
+from frontmatter import split_front_matter
+from manifest import atomic_write_bytes, atomic_write_text
+from textnode import find_title
+
+SEARCH_DIR_NAME = "search"
+
+_WORD_RE = re.compile(r"\w{2,}")
+_LINK_TARGET_RE = re.compile(r"\]\([^)]*\)")
+_SHARD_RE = re.compile(r"[a-z0-9]{2}")
+STOP_WORDS = frozenset(
+    "an and are as at be by for from has he in is it its of on or that the to was were will with".split()
+)
+
+
+def tokenize(markdown: str) -> Counter:
+    """Term frequencies of a markdown document (link and image targets are skipped)."""
+    text = _LINK_TARGET_RE.sub("]", markdown).casefold()
+    return Counter(w for w in _WORD_RE.findall(text) if w not in STOP_WORDS)
+
+
+def shard_of(term: str) -> str:
+    prefix = term[:2]
+    return prefix if _SHARD_RE.fullmatch(prefix) else "_"
+
+
+def page_url(out_rel: str, basepath: str = "/") -> str:
+    """URL a page is served at: 'blog/tom/index.html' -> '/blog/tom/'."""
+    if out_rel == "index.html" or out_rel.endswith("/index.html"):
+        out_rel = out_rel[: -len("index.html")]
+    return basepath + out_rel
+
+
+class SearchIndex:
+    """
+    Per-page term frequencies, kept between builds (see load/save) so only
+    pages whose source hash changed are tokenized again.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path is not None else None
+        # relative source -> {"hash", "title", "url", "terms": {term: tf}}
+        self.pages: dict[str, dict] = {}
+        self.tokenized = 0
+        self.seconds = 0.0
+        if self.path is not None:
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = {}
+            if isinstance(data, dict):
+                self.pages = data
+
+    def add_page(self, rel: str, md_path: str | Path, digest: str, url: str, title: str | None = None) -> None:
+        """
+        Index a page unless the stored entry already matches its hash and URL.
+        The title defaults to the first H1; front matter is not indexed.
+        """
+        old = self.pages.get(rel)
+        if old is not None and old["hash"] == digest and old["url"] == url:
+            return
+        start = time.perf_counter()
+        _, markdown = split_front_matter(Path(md_path).read_text(encoding="utf-8"), str(md_path))
+        self.pages[rel] = {
+            "hash": digest,
+            "title": title or find_title(markdown.splitlines()) or rel,
+            "url": url,
+            "terms": dict(tokenize(markdown)),
+        }
+        self.tokenized += 1
+        self.seconds += time.perf_counter() - start
+
+    def retain(self, rels) -> None:
+        """Drop pages that are no longer part of the site."""
+        keep = set(rels)
+        for rel in self.pages.keys() - keep:
+            del self.pages[rel]
+
+    def shards(self) -> tuple[list[list[str]], dict[str, dict[str, list[int]]]]:
+        docs = []
+        shards: dict[str, dict[str, list[int]]] = {}
+        for doc_id, rel in enumerate(sorted(self.pages)):
+            page = self.pages[rel]
+            docs.append([page["title"], page["url"]])
+            for term, tf in page["terms"].items():
+                shards.setdefault(shard_of(term), {}).setdefault(term, []).extend((doc_id, tf))
+        return docs, shards
+
+    def write(self, dest_dir: str | Path, output=None) -> tuple[int, int]:
+        """
+        Write docs.json and the shards under dest_dir/search, leaving files whose
+        content is unchanged untouched and removing shards that are gone. Each
+        file is replaced atomically. With
+        an output backend (see output.py) the files are written through it
+        instead. Returns (shard count, total bytes).
+        """
+        start = time.perf_counter()
+        out = Path(dest_dir) / SEARCH_DIR_NAME
+        if output is None:
+            out.mkdir(parents=True, exist_ok=True)
+        docs, shards = self.shards()
+        files = {"docs.json": {"docs": docs, "shards": sorted(shards)}}
+        for prefix, terms in shards.items():
+            files[f"{prefix}.json"] = {t: terms[t] for t in sorted(terms)}
+
+        total = 0
+        for name, payload in files.items():
+            data = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            total += len(data)
+            if output is not None:
+                output.write_bytes(f"{SEARCH_DIR_NAME}/{name}", data)
+                continue
+            target = out / name
+            try:
+                if target.read_bytes() == data:
+                    continue
+            except OSError:
+                pass
+            # Readers of a live docs/ must never see a half-written shard
+            atomic_write_bytes(target, data)
+        for stale in out.glob("*.json") if output is None else ():
+            if stale.name not in files:
+                stale.unlink()
+
+        self.seconds += time.perf_counter() - start
+        terms = sum(len(t) for t in shards.values())
+        log.info(
+            f"[SEARCH] {len(docs)} page(s), {terms} term(s) in {len(shards)} shard(s), "
+            f"{total:,} bytes; {self.tokenized} page(s) tokenized in {self.seconds:.2f}s"
+        )
+        return len(shards), total
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, json.dumps(self.pages, separators=(",", ":")))
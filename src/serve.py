@@ -0,0 +1,429 @@
+"""
+Development server: builds the site into memory, watches content/, static/ and
+the template, re-renders only what changed and live-reloads open browsers.
+
+    python3 src/serve.py [--port 8888] [--basepath /]
+"""
+import ctypes
+import ctypes.util
+import fnmatch
+import hashlib
+import html
+import io
+import mimetypes
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from instrument import log
+from main import normalize_basepath, render_page
+from template import Template
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = (
+    f'<script>new EventSource("{RELOAD_PATH}").onmessage = function () {{ location.reload(); }};</script>'
+)
+# After a change is noticed, wait this long for the rest of an editor's save
+DEBOUNCE = 0.01
+
+
+class Resource:
+    __slots__ = ("body", "content_type", "etag")
+
+    def __init__(self, body: bytes, content_type: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def _stat(path: Path) -> tuple[int, int] | None:
+    """(mtime_ns, size) of a file, or None if it isn't one."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if os.path.isfile(path) else None
+
+
+def _snapshot(root: Path, pattern: str = "*") -> dict[Path, tuple[int, int]]:
+    """path -> (mtime_ns, size) for every file under root whose name matches pattern."""
+    snap = {}
+    stack = [str(root)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    elif entry.is_file() and fnmatch.fnmatchcase(entry.name, pattern):
+                        st = entry.stat()
+                        snap[Path(entry.path)] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+    return snap
+
+
+def _diff(snap: dict, new: dict) -> tuple[set[Path], set[Path]]:
+    """Replace snap's contents with new; returns (changed or added, removed) paths."""
+    changed = {p for p, st in new.items() if snap.get(p) != st}
+    removed = snap.keys() - new.keys()
+    snap.clear()
+    snap.update(new)
+    return changed, removed
+
+
+def _rescan(snap: dict, path: Path, pattern: str) -> tuple[set[Path], set[Path]]:
+    """Update snap for one changed file or directory only; returns (changed or added, removed) paths."""
+    if path in snap or path.is_file():
+        st = _stat(path) if fnmatch.fnmatchcase(path.name, pattern) else None
+        if st is None:
+            return set(), {path} if snap.pop(path, None) is not None else set()
+        changed = {path} if snap.get(path) != st else set()
+        snap[path] = st
+        return changed, set()
+    # A directory was added, moved or removed (or a file that was never tracked): compare everything under it
+    old = {p: st for p, st in snap.items() if path in p.parents}
+    new = _snapshot(path, pattern)
+    for p in old.keys() - new.keys():
+        del snap[p]
+    snap.update(new)
+    return {p for p, st in new.items() if old.get(p) != st}, old.keys() - new.keys()
+
+
+def _under(path: Path, root: Path) -> bool:
+    return path == root or root in path.parents
+
+
+class SiteState:
+    """
+    The whole site held in memory as URL path -> Resource, together with the
+    compiled template and the file snapshots used to detect changes.
+    """
+
+    def __init__(self, content="content", template="template.html", static="static", basepath="/"):
+        self.content_root = Path(content)
+        self.template_path = Path(template)
+        self.static_root = Path(static)
+        self.basepath = normalize_basepath(basepath)
+        self.resources: dict[str, Resource] = {}
+        self.template: Template | None = None
+        self.generation = 0
+        self.changed = threading.Condition()
+        self._content_snap = {}
+        self._static_snap = {}
+        self._template_snap = None
+
+    # --- URL mapping ---
+    def page_url(self, md_path: Path) -> str:
+        rel = md_path.relative_to(self.content_root).with_suffix(".html")
+        return self.basepath + rel.as_posix()
+
+    def static_url(self, path: Path) -> str:
+        return self.basepath + path.relative_to(self.static_root).as_posix()
+
+    def lookup(self, url_path: str) -> Resource | None:
+        res = self.resources.get(url_path)
+        if res is None:
+            index = url_path.rstrip("/") + "/index.html"
+            res = self.resources.get(index)
+        return res
+
+    # --- rendering ---
+    def _render(self, md_path: Path) -> None:
+        url = self.page_url(md_path)
+        buf = io.StringIO()
+        try:
+            render_page(md_path.read_text(encoding="utf-8"), self.template, buf)
+        except Exception as e:
+            log.error(f"[ERROR] {md_path}: {e}")
+            body = f"<!doctype html><h1>Build error</h1><pre>{html.escape(f'{md_path}: {e}')}</pre>"
+            self.resources[url] = Resource((body + RELOAD_SCRIPT).encode("utf-8"), "text/html; charset=utf-8")
+            return
+        page = buf.getvalue()
+        idx = page.rfind("</body>")
+        page = page + RELOAD_SCRIPT if idx == -1 else page[:idx] + RELOAD_SCRIPT + page[idx:]
+        self.resources[url] = Resource(page.encode("utf-8"), "text/html; charset=utf-8")
+
+    def _load_static(self, path: Path) -> None:
+        ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.resources[self.static_url(path)] = Resource(path.read_bytes(), ctype)
+
+    def build(self) -> None:
+        """Full in-memory build."""
+        self.resources.clear()
+        self._template_snap = _stat(self.template_path)
+        self.template = Template.from_file(self.template_path, self.basepath)
+        self._static_snap = _snapshot(self.static_root)
+        for p in self._static_snap:
+            self._load_static(p)
+        self._content_snap = _snapshot(self.content_root, "*.md")
+        for p in self._content_snap:
+            self._render(p)
+
+    def _template_changed(self) -> bool:
+        st = _stat(self.template_path)
+        if st == self._template_snap:
+            return False
+        self._template_snap = st
+        return True
+
+    def refresh(self, paths=None) -> int:
+        """
+        Re-render whatever changed since the last call. Returns the number of
+        resources touched (0 when nothing changed). Without `paths` every
+        source file is checked; with them (e.g. from a file system notifier)
+        only those files and directories are.
+        """
+        if paths is None:
+            template_changed = self._template_changed()
+            pages, gone_pages = _diff(self._content_snap, _snapshot(self.content_root, "*.md"))
+            files, gone_files = _diff(self._static_snap, _snapshot(self.static_root))
+        else:
+            template_changed = False
+            pages, gone_pages, files, gone_files = set(), set(), set(), set()
+            for p in paths:
+                if p == self.template_path:
+                    template_changed = self._template_changed() or template_changed
+                elif _under(p, self.content_root):
+                    changed, removed = _rescan(self._content_snap, p, "*.md")
+                    pages |= changed
+                    gone_pages |= removed
+                elif _under(p, self.static_root):
+                    changed, removed = _rescan(self._static_snap, p, "*")
+                    files |= changed
+                    gone_files |= removed
+
+        if template_changed:
+            self.template = Template.from_file(self.template_path, self.basepath)
+            pages = set(self._content_snap)
+        for p in gone_pages:
+            self.resources.pop(self.page_url(p), None)
+        for p in pages:
+            self._render(p)
+        for p in gone_files:
+            self.resources.pop(self.static_url(p), None)
+        for p in files:
+            self._load_static(p)
+
+        touched = len(pages) + len(gone_pages) + len(files) + len(gone_files)
+        if touched:
+            with self.changed:
+                self.generation += 1
+                self.changed.notify_all()
+        return touched
+
+
+class Inotify:
+    """
+    Linux inotify, through ctypes: directories are watched recursively
+    (directories created later included) and read() returns the paths that
+    changed, so a refresh only looks at those instead of every source file.
+    """
+
+    IN_ATTRIB, IN_CLOSE_WRITE = 0x4, 0x8
+    IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+    IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+    IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x4000, 0x8000, 0x40000000
+    IN_CLOEXEC = 0o2000000
+    MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            | IN_DELETE_SELF | IN_MOVE_SELF)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, libc, fd: int):
+        self._libc = libc
+        self.fd = fd
+        self._dirs: dict[int, tuple[Path, bool]] = {}
+
+    @classmethod
+    def create(cls) -> "Inotify | None":
+        """An Inotify, or None where the API isn't available."""
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(cls.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        return cls(libc, fd) if fd >= 0 else None
+
+    def add(self, path: Path, recursive: bool = True) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.MASK)
+        if wd < 0:
+            return
+        self._dirs[wd] = (path, recursive)
+        if recursive:
+            try:
+                subdirs = [Path(e.path) for e in os.scandir(path) if e.is_dir()]
+            except OSError:
+                return
+            for sub in subdirs:
+                self.add(sub)
+
+    def read(self, timeout: float) -> set[Path] | None:
+        """
+        Paths changed within timeout seconds (empty if none), or None when
+        the kernel dropped events and everything has to be rechecked.
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return set()
+        data = os.read(self.fd, 64 * 1024)
+        changed = set()
+        pos = 0
+        while pos < len(data):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(data, pos)
+            name = data[pos + self._EVENT.size:pos + self._EVENT.size + length].rstrip(b"\0")
+            pos += self._EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if mask & self.IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            watched = self._dirs.get(wd)
+            if watched is None:
+                continue
+            directory, recursive = watched
+            if not name:
+                changed.add(directory)
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR and mask & (self.IN_CREATE | self.IN_MOVED_TO) and recursive:
+                self.add(path)
+            elif mask & self.IN_CREATE and not mask & self.IN_ISDIR:
+                # Reported again by IN_CLOSE_WRITE once the file is written
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def watch(state: SiteState, interval: float = 0.25, stop: threading.Event | None = None) -> None:
+    """
+    Refresh the in-memory site when sources change: from inotify events
+    where available, else by polling every `interval` seconds.
+    """
+    stop = stop or threading.Event()
+    notifier = Inotify.create()
+    if notifier is not None:
+        notifier.add(state.content_root)
+        notifier.add(state.static_root)
+        notifier.add(state.template_path.parent, recursive=False)
+    try:
+        while not stop.is_set():
+            if notifier is None:
+                if stop.wait(interval):
+                    break
+                paths = None
+            else:
+                paths = notifier.read(interval)
+                if paths == set():
+                    continue
+                # An editor's save can take a few events; take them in one refresh
+                more = notifier.read(DEBOUNCE) if paths is not None else None
+                paths = None if more is None else paths | more
+            start = time.perf_counter()
+            try:
+                touched = state.refresh(paths)
+            except Exception as e:  # keep watching after a broken template etc.
+                log.error(f"[ERROR] {e}")
+                continue
+            if touched:
+                log.info(f"[SERVE] Updated {touched} file(s) in {(time.perf_counter() - start) * 1000:.1f} ms")
+                log.flush()
+    finally:
+        if notifier is not None:
+            notifier.close()
+
+
+def make_handler(state: SiteState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].split("#", 1)[0]
+            if path == RELOAD_PATH:
+                return self._event_stream()
+            res = state.lookup(path)
+            if res is None:
+                body = b"Not found"
+                self.send_response(404)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            if self.headers.get("If-None-Match") == res.etag:
+                self.send_response(304)
+                self.send_header("ETag", res.etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", res.content_type)
+            self.send_header("Content-Length", str(len(res.body)))
+            self.send_header("ETag", res.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(res.body)
+
+        def _event_stream(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            seen = state.generation
+            try:
+                while True:
+                    with state.changed:
+                        state.changed.wait_for(lambda: state.generation != seen, timeout=15)
+                    if state.generation != seen:
+                        seen = state.generation
+                        self.wfile.write(b"data: reload\n\n")
+                    else:
+                        self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return Handler
+
+
+def serve(port: int = 8888, basepath: str = "/", **paths) -> None:
+    state = SiteState(basepath=basepath, **paths)
+    start = time.perf_counter()
+    state.build()
+    log.info(f"[SERVE] Built {len(state.resources)} file(s) in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    threading.Thread(target=watch, args=(state,), daemon=True).start()
+    server = ThreadingHTTPServer(("", port), make_handler(state))
+    server.daemon_threads = True
+    log.info(f"[SERVE] http://localhost:{port}{state.basepath}")
+    log.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the site from memory with live reload.")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8888)))
+    parser.add_argument("--basepath", default="/")
+    args = parser.parse_args()
+    serve(port=args.port, basepath=args.basepath)
@@ -0,0 +1,101 @@
+import hashlib
+import heapq
+import json
+from pathlib import Path
+
+from manifest import BuildManifest
+
+SHARD_STRATEGIES = ("size", "hash")
+SHARD_MANIFEST_NAME = "shard-manifest.json"
+DEFAULT_SHARD_ROOT = Path("shards")
+
+# Rendering a page costs about as much as this many bytes of markdown on top
+# of its size (template fill, file write), so many tiny pages still spread out
+PAGE_COST = 4096
+
+
+def parse_shard(spec: str) -> tuple[int, int]:
+    """Parse "I/N" (shard I of N, 1-based) into (I, N)."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard must look like I/N, got {spec!r}") from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Shard must be between 1/N and N/N, got {spec!r}")
+    return index, count
+
+
+def shard_output_dir(index: int) -> Path:
+    """Where `--shard I/N` writes its pages."""
+    return DEFAULT_SHARD_ROOT / str(index)
+
+
+def path_shard(rel: str, count: int) -> int:
+    """Shard (1-based) of a content-relative path by a stable hash of the path."""
+    digest = hashlib.sha256(rel.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def assign_shards(sizes: dict[str, int], count: int, strategy: str = "size") -> dict[str, int]:
+    """
+    Assign every content-relative path in `sizes` ({rel: bytes}) to a shard
+    1..count. Only the paths and sizes are used, so every runner building the
+    same checkout gets the same assignment.
+
+    "size" balances the shards: largest page first onto the least loaded shard
+    (ties broken by path, then shard number). "hash" uses path_shard, so a page
+    keeps its shard as other pages come and go.
+    """
+    if strategy == "hash":
+        return {rel: path_shard(rel, count) for rel in sizes}
+    if strategy != "size":
+        raise ValueError(f"Unknown shard strategy: {strategy}")
+    loads = [(0, index) for index in range(1, count + 1)]
+    assigned = {}
+    for rel in sorted(sizes, key=lambda r: (-sizes[r], r)):
+        load, index = heapq.heappop(loads)
+        assigned[rel] = index
+        heapq.heappush(loads, (load + sizes[rel] + PAGE_COST, index))
+    return assigned
+
+
+class ShardManifest:
+    """
+    The partial manifest a `--shard I/N` build leaves next to its pages: which
+    shard it is, how pages were assigned and the BuildManifest of just its own
+    pages (static files are copied when the shards are merged).
+    """
+
+    def __init__(self, index: int, count: int, strategy: str, manifest: BuildManifest):
+        self.index = index
+        self.count = count
+        self.strategy = strategy
+        self.manifest = manifest
+
+    @classmethod
+    def load(cls, out_dir: str | Path) -> "ShardManifest":
+        """Load the shard manifest from a shard's output; raises ValueError if it is missing or invalid."""
+        path = Path(out_dir) / SHARD_MANIFEST_NAME
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            manifest = BuildManifest.from_dict(data["manifest"])
+            shard = cls(int(data["index"]), int(data["count"]), data["strategy"], manifest)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"Not a shard output: {out_dir} ({e})") from None
+        if manifest is None:
+            raise ValueError(f"Shard manifest from another version: {path}")
+        return shard
+
+    def save(self, out_dir: str | Path) -> None:
+        data = {
+            "index": self.index,
+            "count": self.count,
+            "strategy": self.strategy,
+            "manifest": self.manifest.to_dict(),
+        }
+        (Path(out_dir) / SHARD_MANIFEST_NAME).write_text(
+            json.dumps(data, indent=1, sort_keys=True), encoding="utf-8"
+        )
+
+    def __repr__(self):
+        return f"ShardManifest({self.index}/{self.count}, {self.strategy}, pages: {len(self.manifest.pages)})"
@@ -0,0 +1,67 @@
+"""
+Scaffolding shared by the tests that need files on disk: a temporary
+directory that is removed when the test ends, a site laid out the way
+main.py expects (content/, static/, template.html) and a quiet build_site
+call over it.
+"""
+import contextlib
+import io
+import tempfile
+from pathlib import Path
+
+from instrument import NORMAL, QUIET, log
+from main import build_site
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def temp_dir(test, level: int = QUIET) -> Path:
+    """A temporary directory for a TestCase, with the log at `level` until the test ends."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    log.level = level
+    test.addCleanup(setattr, log, "level", NORMAL)
+    return Path(tmp.name)
+
+
+def write_files(root: Path, files: dict[str, str | bytes]) -> None:
+    """Write {relative path: text or bytes} under root, creating directories as needed."""
+    for rel, data in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(data, bytes):
+            path.write_bytes(data)
+        else:
+            path.write_text(data, encoding="utf-8")
+
+
+def make_site(test, files: dict[str, str | bytes] | None = None, template: str = TEMPLATE,
+              level: int = QUIET) -> Path:
+    """
+    A site root for a TestCase: content/ and static/ holding `files` (paths
+    relative to the root) and template.html.
+    """
+    root = temp_dir(test, level)
+    (root / "content").mkdir()
+    (root / "static").mkdir()
+    write_files(root, {"template.html": template, **(files or {})})
+    return root
+
+
+def build_logged(root: Path, **kwargs):
+    """
+    build_site over a make_site root into root/docs, with the manifest under
+    root/cache unless given. Returns (manifest, what was printed).
+    """
+    kwargs.setdefault("dest", root / "docs")
+    kwargs.setdefault("manifest_path", root / "cache" / "manifest.json")
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        manifest = build_site(
+            content=root / "content", template=root / "template.html", static=root / "static", **kwargs,
+        )
+    return manifest, out.getvalue()
+
+
+def build(root: Path, **kwargs):
+    """build_logged without the output: returns the manifest."""
+    return build_logged(root, **kwargs)[0]
@@ -0,0 +1,197 @@
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from instrument import log
+from manifest import file_hash
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl that makes dst share src's extents (btrfs, XFS, ...); Linux only
+_FICLONE = 0x40049409
+
+
+def _reflink(fs, fd) -> bool:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+        return True
+    except OSError:
+        return False
+
+
+def _copy_data(fs, fd, size: int) -> str:
+    """Copy size bytes from fs to fd in the kernel where possible; returns the method used."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < size:
+                n = os.copy_file_range(fs.fileno(), fd.fileno(), size - copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied >= size:
+                return "copy_file_range"
+        except OSError:
+            pass
+    if hasattr(os, "sendfile"):
+        try:
+            fd.seek(copied)
+            while copied < size:
+                n = os.sendfile(fd.fileno(), fs.fileno(), copied, size - copied)
+                if n == 0:
+                    break
+                copied += n
+            if copied >= size:
+                return "sendfile"
+        except OSError:
+            pass
+    fs.seek(copied)
+    fd.seek(copied)
+    shutil.copyfileobj(fs, fd, 1 << 20)
+    return "read/write"
+
+
+def copy_file(src: Path, dst: Path, link: bool = False) -> str:
+    """
+    Copy src to dst with its metadata: a hardlink when link is set, else a
+    reflink, copy_file_range or sendfile (falling back to a buffered copy).
+    dst is always unlinked first, so a file that shares an inode with
+    something else is never written through. Returns the method used.
+    """
+    dst.unlink(missing_ok=True)
+    if link:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass
+    with open(src, "rb") as fs, open(dst, "wb") as fd:
+        if _reflink(fs, fd):
+            method = "reflink"
+        else:
+            method = _copy_data(fs, fd, os.fstat(fs.fileno()).st_size)
+    shutil.copystat(src, dst)
+    return method
+
+
+class StaticCopier:
+    """
+    Mirrors a static directory into an output backend (see output.py).
+
+    Files are checked and copied across a thread pool (the copies run in the
+    kernel and hashing releases the GIL). A file is skipped when its output
+    has the same size and mtime and the previous build recorded a hash, or
+    when its hash is unchanged; byte-identical files are copied once and
+    linked where the backend can. With link=True a disk output hardlinks the
+    first copy to the source too (same filesystem only; the output then shares
+    inodes with static/). `transform(src) -> bytes | None` may produce a file's
+    output itself (e.g. minified CSS); None falls back to copying.
+    """
+
+    def __init__(self, workers: int | None = None, link: bool = False, transform=None):
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        self.link = link
+        self.transform = transform
+
+    def _check(self, job):
+        rel, s, old, output = job
+        st = s.stat()
+        if old is not None:
+            dst = output.stat(rel)
+            if dst is not None and dst.st_size == st.st_size and dst.st_mtime_ns == st.st_mtime_ns:
+                return old, st.st_size, False
+        digest = file_hash(s)
+        if digest == old and output.exists(rel):
+            return digest, st.st_size, False
+        return digest, st.st_size, True
+
+    def _store(self, s: Path, rel: str, output) -> str:
+        """Write one file through the transform (on the calling thread) or copy it."""
+        if self.transform is not None:
+            data = self.transform(s)
+            if data is not None:
+                output.write_bytes(rel, data)
+                return "transform"
+        return output.copy_from(s, rel, self.link)
+
+    def copy(self, src: str | Path, output, previous: dict[str, str] | None = None) -> dict[str, str]:
+        """
+        Copy src into output, skipping files unchanged since `previous`
+        ({relative path: hash}) and removing outputs whose source is gone.
+        Returns the new {relative path: hash} mapping.
+        """
+        start = time.perf_counter()
+        src_path = Path(src)
+        if not src_path.is_dir():
+            raise NotADirectoryError(f"Source is not a directory: {src_path}")
+        previous = previous or {}
+
+        jobs = []
+        for s in sorted(p for p in src_path.rglob("*") if p.is_file()):
+            rel = s.relative_to(src_path).as_posix()
+            # Symlinks are copied as their target's content (and deduplicated like any file)
+            jobs.append((rel, s.resolve(), previous.get(rel), output))
+
+        current = {}
+        primaries = {}  # hash -> first output path holding it
+        to_copy, to_link = [], []
+        copied_bytes = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for (rel, s, _, _), (digest, size, changed) in zip(jobs, pool.map(self._check, jobs)):
+                current[rel] = digest
+                if not changed:
+                    primaries.setdefault(digest, rel)
+                    continue
+                if digest in primaries:
+                    to_link.append((s, rel, primaries[digest]))
+                else:
+                    primaries[digest] = rel
+                    to_copy.append((s, rel))
+                    copied_bytes += size
+
+            # Transforms run here, one at a time, so they needn't be thread-safe
+            methods = {}
+            plain = []
+            for s, rel in to_copy:
+                data = self.transform(s) if self.transform is not None else None
+                if data is None:
+                    plain.append((s, rel))
+                    continue
+                output.write_bytes(rel, data)
+                methods["transform"] = methods.get("transform", 0) + 1
+                log.verbose(f"[COPY FILE] {s} -> {output.display(rel)}")
+            copies = pool.map(lambda job: output.copy_from(job[0], job[1], self.link), plain)
+            for (s, rel), method in zip(plain, copies):
+                methods[method] = methods.get(method, 0) + 1
+                log.verbose(f"[COPY FILE] {s} -> {output.display(rel)}")
+
+        deduped = 0
+        for s, rel, primary in to_link:
+            if output.link(primary, rel):
+                deduped += 1
+                log.verbose(f"[LINK FILE] {output.display(rel)} -> {output.display(primary)}")
+            else:
+                self._store(s, rel, output)
+                log.verbose(f"[COPY FILE] {s} -> {output.display(rel)}")
+
+        for rel in previous.keys() - current.keys():
+            output.remove(rel)
+            log.info(f"[DEL FILE] {output.display(rel)}")
+
+        elapsed = time.perf_counter() - start
+        files = len(to_copy) + len(to_link)
+        rate = f"{files / elapsed:,.0f} files/s, {copied_bytes / elapsed / 1e6:,.1f} MB/s" if elapsed else "n/a"
+        how = ", ".join(f"{n} {m}" for m, n in sorted(methods.items()))
+        log.info(
+            f"[COPY] {files} file(s), {copied_bytes:,} bytes in {elapsed:.2f}s ({rate}); "
+            f"{len(jobs) - files} unchanged, {deduped} deduplicated" + (f"; {how}" if how else "")
+        )
+        return current
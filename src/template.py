@@ -0,0 +1,90 @@
+import re
+from pathlib import Path
+
+from htmlnode import escape_attr
+
+# {{ Name }} placeholders; names are matched case-insensitively
+_SLOT_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+
+def prefix_root_urls(html: str, basepath: str) -> str:
+    """Put root-relative href/src attribute values under basepath."""
+    if basepath == "/":
+        return html
+    return re.sub(r'\b(href|src)="/(?!/)', rf'\1="{basepath}', html)
+
+
+class Template:
+    """
+    A template compiled into static text segments and named slots.
+
+    `segments` alternates between plain strings and Slot objects. The basepath
+    is applied to the template's own root-relative href/src once, at compile
+    time; page content gets it while links and images are rendered.
+    """
+
+    def __init__(self, text: str, basepath: str = "/"):
+        self.basepath = basepath
+        self.segments = []
+        pos = 0
+        for m in _SLOT_RE.finditer(text):
+            if m.start() > pos:
+                self.segments.append(prefix_root_urls(text[pos:m.start()], basepath))
+            self.segments.append(Slot(m.group(1)))
+            pos = m.end()
+        if pos < len(text):
+            self.segments.append(prefix_root_urls(text[pos:], basepath))
+
+    @classmethod
+    def from_file(cls, path: str | Path, basepath: str = "/") -> "Template":
+        return cls(Path(path).read_text(encoding="utf-8"), basepath)
+
+    @property
+    def slot_names(self) -> list[str]:
+        return [seg.key for seg in self.segments if isinstance(seg, Slot)]
+
+    def render_to(self, fp, values: dict) -> None:
+        """
+        Write the filled template into a text file object.
+
+        `values` maps lower-case slot names to strings or HTMLNodes (streamed via
+        write_html). Strings are escaped unless they are htmlnode.Markup, as
+        attribute values since a slot may sit inside one (e.g. a front-matter
+        description in <meta content="...">). Slots without a value render as empty.
+        """
+        write = fp.write
+        for seg in self.segments:
+            if type(seg) is str:
+                write(seg)
+                continue
+            value = values.get(seg.key)
+            if value is None:
+                continue
+            if isinstance(value, str):
+                write(escape_attr(value))
+            else:
+                value.write_html(fp)
+
+    def render(self, values: dict) -> str:
+        import io
+
+        buf = io.StringIO()
+        self.render_to(buf, values)
+        return buf.getvalue()
+
+    def __repr__(self):
+        return f"Template({self.basepath}, slots: {self.slot_names})"
+
+
+class Slot:
+    __slots__ = ("name", "key")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.key = name.lower()
+
+    def __eq__(self, other):
+        return isinstance(other, Slot) and self.key == other.key
+
+    def __repr__(self):
+        return f"Slot({self.name})"
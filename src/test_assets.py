@@ -0,0 +1,81 @@
+import gzip
+import json
+import unittest
+
+from assets import (
+    ASSET_MANIFEST_NAME,
+    HEADERS_NAME,
+    IMMUTABLE_CACHE_CONTROL,
+    fingerprint_assets,
+    fingerprinted_name,
+    precompress,
+)
+from site_fixture import temp_dir, write_files
+
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        root = temp_dir(self)
+        self.static = root / "static"
+        self.out = root / "docs"
+        for base in (self.static, self.out):
+            write_files(base, {
+                "images/a.png": b"\x89PNG fake",
+                "index.css": "body { background: url('/SSG/images/a.png'); }",
+            })
+        write_files(self.out, {
+            "index.html": '<link href="/SSG/index.css"/><img src="/SSG/images/a.png"/><a href="/SSG/blog">x</a>',
+        })
+
+    def test_fingerprinted_name(self):
+        name = fingerprinted_name("images/a.png", b"data")
+        self.assertRegex(name, r"^images/a\.[0-9a-f]{8}\.png$")
+        self.assertEqual(name, fingerprinted_name("images/a.png", b"data"))
+        self.assertNotEqual(name, fingerprinted_name("images/a.png", b"other"))
+
+    def test_references_rewritten_and_headers_written(self):
+        mapping = fingerprint_assets(self.out, self.static, "/SSG/")
+        png, css = mapping["images/a.png"], mapping["index.css"]
+        html = (self.out / "index.html").read_text()
+        self.assertIn(f'href="/SSG/{css}"', html)
+        self.assertIn(f'src="/SSG/{png}"', html)
+        self.assertIn('href="/SSG/blog"', html)
+        self.assertIn(f"/SSG/{png}", (self.out / css).read_text())
+        self.assertTrue((self.out / "index.css").exists())
+
+        headers = (self.out / HEADERS_NAME).read_text()
+        self.assertIn(f"/SSG/{css}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}", headers)
+        self.assertEqual(json.loads((self.out / ASSET_MANIFEST_NAME).read_text()), mapping)
+
+    def test_rerun_after_asset_change(self):
+        first = fingerprint_assets(self.out, self.static, "/SSG/")
+        self.assertEqual(fingerprint_assets(self.out, self.static, "/SSG/"), first)
+
+        for base in (self.static, self.out):
+            (base / "images" / "a.png").write_bytes(b"\x89PNG changed")
+        second = fingerprint_assets(self.out, self.static, "/SSG/")
+        self.assertNotEqual(first["images/a.png"], second["images/a.png"])
+        self.assertFalse((self.out / first["images/a.png"]).exists())
+        # The page still pointed at the old fingerprint and is updated
+        self.assertIn(second["images/a.png"], (self.out / "index.html").read_text())
+
+    def test_precompress(self):
+        count, raw, packed = precompress(self.out)
+        self.assertEqual(count, 2)
+        gz = self.out / "index.html.gz"
+        self.assertEqual(gzip.decompress(gz.read_bytes()), (self.out / "index.html").read_bytes())
+        self.assertFalse((self.out / "images" / "a.png.gz").exists())
+        # Up-to-date siblings are skipped
+        self.assertEqual(precompress(self.out)[0], 0)
+
+    def test_noop_rerun_leaves_output_alone(self):
+        fingerprint_assets(self.out, self.static, "/SSG/")
+        self.assertGreater(precompress(self.out)[0], 0)
+        fingerprint_assets(self.out, self.static, "/SSG/")
+        # Nothing was rewritten, so nothing needs compressing again
+        self.assertEqual(precompress(self.out)[0], 0)
+        self.assertEqual(list(self.out.rglob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import io
+import tempfile
+import tracemalloc
+import unittest
+from pathlib import Path
+
+from textnode import (
+    BlockScanner,
+    StreamedDocument,
+    block_to_block_type,
+    markdown_to_blocks,
+    markdown_to_html_node,
+)
+
+CONTENT_DIR = Path(__file__).resolve().parent.parent / "content"
+
+CASES = [
+    "# H1\n\npara one\nstill one\n\n\n\n- a\n- b",
+    "  leading spaces\n \t \n\ttabbed block  \n\n1. one\n2. two\n3. four",
+    "> q1\n>\n> q2\n\n```\ncode\n```\n\n#no heading\n\n####### seven",
+    "a\r\n\r\nb\r\n \r\nc",
+    "\n\n\n",
+    "",
+    "trailing\n\n   ",
+]
+
+
+def scan(text):
+    return list(BlockScanner(io.StringIO(text, newline=None)))
+
+
+def reference(text):
+    return [(block_to_block_type(b), b) for b in markdown_to_blocks(text)]
+
+
+class TestBlockScanner(unittest.TestCase):
+    def test_matches_markdown_to_blocks(self):
+        for text in CASES:
+            self.assertEqual(scan(text), reference(text), repr(text))
+
+    def test_matches_on_content(self):
+        for md_path in sorted(CONTENT_DIR.rglob("*.md")):
+            text = md_path.read_text(encoding="utf-8")
+            with open(md_path, encoding="utf-8") as f:
+                self.assertEqual(list(BlockScanner(f)), reference(text), md_path)
+
+    def test_streamed_document_html(self):
+        text = CASES[0] + "\n\n" + CASES[2]
+        doc = StreamedDocument(BlockScanner(io.StringIO(text)))
+        self.assertEqual(doc.to_html(), markdown_to_html_node(text).to_html())
+
+    def test_empty_document_raises(self):
+        with self.assertRaises(ValueError):
+            StreamedDocument(BlockScanner(io.StringIO("\n\n"))).to_html()
+
+    def test_bounded_memory(self):
+        block = "Some **bold** text with a [link](/x) and `code`.\n" * 4
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "big.md"
+            path.write_text("# Big\n\n" + (block + "\n") * 4000, encoding="utf-8")
+            size = path.stat().st_size
+
+            tracemalloc.start()
+            with open(path, encoding="utf-8") as f:
+                StreamedDocument(BlockScanner(f)).write_html(_NullWriter())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        self.assertLess(peak, size / 4)
+
+
+class _NullWriter:
+    def write(self, chunk):
+        return len(chunk)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from blockcache import BlockCache
+from textnode import RenderContext, markdown_to_html_node
+
+MD = (
+    "# Title\n\n"
+    "A [link](/about) with **bold**.\n\n"
+    "- one\n- two\n\n"
+    "```\ncode\n```\n\n"
+    "> Shared disclaimer"
+)
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_same_html_and_counts(self):
+        cache = BlockCache()
+        expected = markdown_to_html_node(MD).to_html()
+        first = markdown_to_html_node(MD, RenderContext(cache=cache)).to_html()
+        second = markdown_to_html_node(MD, RenderContext(cache=cache)).to_html()
+        self.assertEqual(first, expected)
+        self.assertEqual(second, expected)
+        self.assertEqual((cache.hits, cache.misses), (5, 5))
+
+    def test_basepath_is_part_of_the_key(self):
+        cache = BlockCache()
+        markdown_to_html_node(MD, RenderContext("/", cache=cache))
+        html = markdown_to_html_node(MD, RenderContext("/SSG/", cache=cache)).to_html()
+        self.assertIn('href="/SSG/about"', html)
+        self.assertEqual(cache.hits, 0)
+
+    def test_lru_limit(self):
+        cache = BlockCache(max_entries=2)
+        for i in range(3):
+            cache.put(str(i), f"<p>{i}</p>")
+        self.assertIsNone(cache.get("0"))
+        self.assertEqual(cache.get("2"), "<p>2</p>")
+        self.assertEqual(len(cache), 2)
+
+    def test_disk_store_and_version_invalidation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "blocks.json"
+            cache = BlockCache(path=path)
+            markdown_to_html_node(MD, RenderContext(cache=cache))
+            cache.save()
+
+            reloaded = BlockCache(path=path)
+            markdown_to_html_node(MD, RenderContext(cache=reloaded))
+            self.assertEqual((reloaded.hits, reloaded.misses), (5, 0))
+
+            data = json.loads(path.read_text())
+            data["version"] = "older-renderer"
+            path.write_text(json.dumps(data))
+            self.assertEqual(len(BlockCache(path=path)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
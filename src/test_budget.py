@@ -0,0 +1,99 @@
+import contextlib
+import io
+import unittest
+
+from budget import Budgets, SizeReport, page_assets, parse_size, size_report
+from site_fixture import temp_dir, write_files
+
+
+class TestBudgetHelpers(unittest.TestCase):
+    def test_parse_size(self):
+        self.assertEqual(parse_size(12), 12)
+        self.assertEqual(parse_size("500KB"), 500_000)
+        self.assertEqual(parse_size("1.5 MB"), 1_500_000)
+        self.assertEqual(parse_size("2MiB"), 2 * 1024 * 1024)
+        self.assertEqual(parse_size("3k"), 3000)
+        for bad in ("lots", "5 parsecs", ""):
+            with self.assertRaises(ValueError, msg=bad):
+                parse_size(bad)
+
+    def test_page_assets(self):
+        html = (
+            '<link href="/SSG/index.css" rel="stylesheet"/><a href="/SSG/other/">x</a>'
+            '<img src="/SSG/images/a.png?v=1" alt=""/><img src="../images/b.png"/>'
+            '<img src="https://cdn.example/c.png"/><script src="//cdn.example/d.js"></script>'
+            '<img src="/elsewhere/e.png"/><img src="/SSG/index.css"/>'
+        )
+        self.assertEqual(
+            page_assets(html, "blog/post.html", "/SSG/"),
+            ["index.css", "images/a.png", "images/b.png"],
+        )
+
+
+class TestSizeReport(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        self.out = self.root / "docs"
+        write_files(self.out, {
+            "index.css": b"x" * 100,
+            "images/a.png": b"x" * 5000,
+            "images/unused.png": b"x" * 7000,
+            "index.html": (
+                '<link href="/index.css" rel="stylesheet"/><img src="/images/a.png"/><a href="/about.html">a</a>'
+            ),
+            "about.html": "<p>about</p>",
+        })
+
+    def write(self, rel, size):
+        write_files(self.out, {rel: b"x" * size})
+
+    def test_page_weight(self):
+        report = SizeReport.from_dir(self.out)
+        page = report.pages["index.html"]
+        self.assertEqual(page["assets"], ["index.css", "images/a.png"])
+        self.assertEqual(page["weight"], page["html"] + 5100)
+        self.assertEqual(report.pages["about.html"]["weight"], len("<p>about</p>"))
+        self.assertEqual(report.total, sum(report.files.values()))
+
+    def test_budgets(self):
+        report = SizeReport.from_dir(self.out)
+        budgets = Budgets.from_dict({
+            "files": {"images/a.png": 10_000, "images/*": "6KB", "*": "1KB"},
+            "pages": {"*": 5000},
+            "total": 10_000,
+        })
+        over = budgets.check(report)
+        self.assertEqual(len(over), 3, over)
+        self.assertEqual(over[0], "file images/unused.png is 7,000 bytes, over the 6,000 byte budget for images/*")
+        self.assertTrue(over[1].startswith("page index.html is "))
+        self.assertTrue(over[2].startswith("total output is "))
+        self.assertEqual(Budgets.load().check(report), [])
+        with self.assertRaises(ValueError):
+            Budgets.from_dict({"file": {}})
+
+    def test_baseline_and_growth(self):
+        baseline = self.root / "sizes.json"
+        self.assertEqual(size_report(self.out, baseline_path=baseline), [])
+        self.write("images/a.png", 6000)
+        self.write("images/new.png", 10)
+
+        report = SizeReport.from_dir(self.out)
+        grown = report.regressions(SizeReport.load(baseline))
+        self.assertEqual(grown[0][:2], ("file", "images/a.png"))
+        self.assertEqual(grown[1][:2], ("page", "index.html"))
+        self.assertEqual(grown[2], ("file", "images/new.png", 0, 10))
+
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            over = size_report(self.out, budgets=Budgets(growth=0.1), baseline_path=baseline)
+            self.assertEqual(len(over), 2)
+            self.assertTrue(all("grew" in message for message in over))
+            # A failed run doesn't become the baseline: rerunning fails again
+            self.assertEqual(size_report(self.out, budgets=Budgets(growth=0.1), baseline_path=baseline), over)
+        self.assertEqual(err.getvalue().count("[BUDGET]"), 4)
+        # Within budget, the run is the new baseline
+        self.assertEqual(size_report(self.out, baseline_path=baseline), [])
+        self.assertEqual(size_report(self.out, budgets=Budgets(growth=0.1), baseline_path=baseline), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import contextlib
+import io
+import unittest
+
+from frontmatter import MetadataIndex, read_front_matter, read_meta, split_front_matter, template_values
+from main import PageGenerationError
+from manifest import file_hash
+from site_fixture import build, make_site, temp_dir
+
+POST = """---
+title: "Tom & Jerry"
+date: 2024-03-01
+tags: [cats, mice]
+description: A chase
+draft: no
+---
+# Heading
+
+Body text.
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_split(self):
+        meta, body = split_front_matter(POST)
+        self.assertEqual(meta, {
+            "title": "Tom & Jerry", "date": "2024-03-01", "tags": ["cats", "mice"],
+            "description": "A chase", "draft": False,
+        })
+        self.assertEqual(body, "# Heading\n\nBody text.\n")
+        self.assertEqual(split_front_matter("# No front matter\n"), ({}, "# No front matter\n"))
+
+    def test_read_leaves_file_at_body(self):
+        f = io.StringIO(POST)
+        self.assertEqual(read_front_matter(f)["tags"], ["cats", "mice"])
+        self.assertEqual(f.readline(), "# Heading\n")
+        f = io.StringIO("# Title\n")
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.read(), "# Title\n")
+
+    def test_errors(self):
+        for bad in ("---\ntitle: x\n", "---\nnot a pair\n---\n", "---\ndate: March\n---\n", "---\ndraft: maybe\n---\n"):
+            with self.assertRaises(ValueError, msg=bad):
+                split_front_matter(bad)
+
+    def test_template_values(self):
+        meta, _ = split_front_matter(POST)
+        values = template_values(meta)
+        self.assertEqual(values["tags"], "cats, mice")
+        self.assertNotIn("draft", values)
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+
+    def write(self, name, text):
+        path = self.root / name
+        path.write_text(text, encoding="utf-8")
+        return path, file_hash(path)
+
+    def test_title_falls_back_to_h1(self):
+        path, _ = self.write("a.md", "---\ndate: 2024-01-01\n---\n\n# From H1\n\ntext")
+        self.assertEqual(read_meta(path), {"date": "2024-01-01", "title": "From H1"})
+
+    def test_cached_by_hash_and_listing(self):
+        cache = self.root / "metadata.json"
+        index = MetadataIndex(cache)
+        a = self.write("a.md", "---\ndate: 2024-01-01\n---\n# A")
+        b = self.write("b.md", "---\ndate: 2024-05-01\n---\n# B")
+        c = self.write("c.md", "---\ndraft: true\n---\n# C")
+        d = self.write("d.md", "# D")
+        for name, (path, digest) in zip("abcd", (a, b, c, d)):
+            index.get(f"{name}.md", path, digest)
+        self.assertEqual([rel for rel, _ in index.listing()], ["b.md", "a.md", "d.md"])
+        self.assertEqual(len(index.listing(include_drafts=True)), 4)
+        index.save()
+
+        again = MetadataIndex(cache)
+        self.assertEqual(again.get("a.md", *a)["title"], "A")
+        self.assertEqual(again.read, 0)
+        path, digest = self.write("a.md", "# A2")
+        self.assertEqual(again.get("a.md", path, digest), {"title": "A2"})
+        self.assertEqual(again.read, 1)
+
+
+class TestBuildWithFrontMatter(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(
+            self,
+            {
+                "content/post.md": POST,
+                # Invalid markdown body: a draft must never be parsed
+                "content/draft.md": "---\ndraft: true\n---\nno title",
+            },
+            template="<title>{{ Title }}</title><time>{{ Date }}</time><p>{{ Tags }}</p>{{ Content }}",
+        )
+
+    def build(self, **kwargs):
+        return build(self.root, **kwargs)
+
+    def test_drafts_skipped_and_metadata_in_template(self):
+        for workers in (1, 2):
+            manifest = self.build(workers=workers)
+            self.assertEqual(list(manifest.pages), ["post.md"])
+            html = (self.root / "docs" / "post.html").read_text()
+            self.assertTrue(html.startswith(
+                "<title>Tom &amp; Jerry</title><time>2024-03-01</time><p>cats, mice</p><div><h1>Heading</h1>"
+            ))
+            self.assertFalse((self.root / "docs" / "draft.html").exists())
+
+    def test_page_turned_draft_is_removed(self):
+        self.build()
+        post = self.root / "content" / "post.md"
+        post.write_text(POST.replace("draft: no", "draft: yes"), encoding="utf-8")
+        self.build(incremental=True)
+        self.assertFalse((self.root / "docs" / "post.html").exists())
+
+    def test_malformed_front_matter_is_reported(self):
+        bad = self.root / "content" / "bad.md"
+        bad.write_text("---\ndate: March 1\n---\n# Bad", encoding="utf-8")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr), self.assertRaises(PageGenerationError) as cm:
+            self.build()
+        self.assertEqual([p for p, _ in cm.exception.failures], [bad])
+        self.assertIn(f"{bad}: date must be YYYY-MM-DD, got 'March 1'", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from pathlib import Path
+
+from blockcache import BlockCache
+from highlight import LEXERS, STYLESHEET_NAME, highlight, language, stylesheet
+from textnode import RenderContext, markdown_to_html_node
+
+
+class TestHighlight(unittest.TestCase):
+    def test_language(self):
+        self.assertEqual(language("Python"), "python")
+        self.assertEqual(language(" sh title=run.sh"), "bash")
+        self.assertEqual(language("<x>"), "x")
+        self.assertEqual(language(""), "")
+
+    def test_python(self):
+        self.assertEqual(
+            highlight('def f(x=1):\n    return "a<b"  # done\n', "python"),
+            '<span class="hl-k">def</span> f(x=<span class="hl-n">1</span>):\n'
+            '    <span class="hl-k">return</span> <span class="hl-s">"a&lt;b"</span>  '
+            '<span class="hl-c"># done</span>\n',
+        )
+
+    def test_every_lexer_keeps_the_text(self):
+        samples = {
+            "python": '@app.route("/")\nasync def f(): return f"{x}" or None  # c\n',
+            "bash": 'for f in *.md; do echo "$f" ${x} # c\ndone\n',
+            "js": "const a = `x${y}`; // c\nif (a === null) return 0x1f;\n",
+            "html": '<!doctype html><a href="/x" class=\'y\'>a=b &amp; c</a><!-- c -->\n',
+            "css": "a:hover { color: #fff; margin: 0 1.5em !important } @media (x) {}\n",
+            "json": '{"a": [1, -2.5e3, true, "s"]}\n',
+        }
+        self.assertEqual(samples.keys(), LEXERS.keys())
+        for lang, code in samples.items():
+            tokens = list(LEXERS[lang].tokens(code))
+            self.assertEqual("".join(text for _, text in tokens), code, lang)
+            self.assertGreater(len([cls for cls, _ in tokens if cls]), 3, lang)
+
+    def test_unknown_language(self):
+        self.assertIsNone(highlight("x", "brainfuck"))
+
+    def test_stylesheet_is_up_to_date(self):
+        static = Path(__file__).resolve().parent.parent / "static" / STYLESHEET_NAME
+        self.assertEqual(static.read_text(encoding="utf-8"), stylesheet())
+
+
+class TestCodeBlocks(unittest.TestCase):
+    def test_fence_language(self):
+        html = markdown_to_html_node("```py\nx = None\n```").to_html()
+        self.assertEqual(
+            html,
+            '<div><pre><code class="language-python">x = <span class="hl-b">None</span>\n</code></pre></div>',
+        )
+        html = markdown_to_html_node("```mermaid\na --> <b>\n```").to_html()
+        self.assertEqual(html, '<div><pre><code class="language-mermaid">a --&gt; &lt;b&gt;\n</code></pre></div>')
+        html = markdown_to_html_node("```\nplain <b>\n```").to_html()
+        self.assertEqual(html, "<div><pre><code>plain &lt;b&gt;\n</code></pre></div>")
+
+    def test_tokens_cached_by_language_and_code(self):
+        cache = BlockCache(100)
+        ctx = RenderContext(cache=cache)
+        markdown_to_html_node("```python\nx = 1\n```", ctx)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+        # Another block (the fence differs) with the same code and language reuses the tokens
+        html = markdown_to_html_node("```python3\nx = 1\n```", ctx).to_html()
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+        self.assertIn('<span class="hl-n">1</span>', html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -49,6 +49,24 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_nodes_are_slotted(self):
+        from htmlnode import LeafNode, ParentNode
+        from textnode import TextNode, TextType
+
+        for node in (
+            HTMLNode("p"),
+            LeafNode("b", "x"),
+            ParentNode("div", [LeafNode("b", "x")]),
+            TextNode("x", TextType.TEXT),
+        ):
+            self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+
+    def test_tags_are_interned(self):
+        level = 2
+        a = HTMLNode(f"h{level}")
+        b = HTMLNode("".join(["h", "2"]))
+        self.assertIs(a.tag, b.tag)
+
 
 if __name__ == "__main__":
     unittest.main()
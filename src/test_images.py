@@ -0,0 +1,128 @@
+import json
+import os
+import struct
+import unittest
+import zlib
+from unittest import mock
+
+from blockcache import BlockCache
+from images import ImageIndex, image_size
+from site_fixture import temp_dir
+from textnode import RenderContext, markdown_to_html_node
+
+
+def png(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr
+        + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    )
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+def gif(width, height):
+    return b"GIF89a" + struct.pack("<HH", width, height) + b"\x00\x00\x00"
+
+
+def webp_vp8x(width, height):
+    body = b"VP8X" + struct.pack("<I", 10) + b"\x00\x00\x00\x00"
+    body += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+
+def webp_vp8l(width, height):
+    bits = (width - 1) | ((height - 1) << 14)
+    body = b"VP8L" + struct.pack("<I", 5) + b"\x2f" + struct.pack("<I", bits)
+    return b"RIFF" + struct.pack("<I", len(body) + 4) + b"WEBP" + body
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.dir = temp_dir(self)
+
+    def probe(self, name, data):
+        path = self.dir / name
+        path.write_bytes(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.probe("a.png", png(640, 480)), (640, 480))
+        self.assertEqual(self.probe("a.jpg", jpeg(1024, 768)), (1024, 768))
+        self.assertEqual(self.probe("a.gif", gif(16, 9)), (16, 9))
+        self.assertEqual(self.probe("a.webp", webp_vp8x(3000, 2000)), (3000, 2000))
+        self.assertEqual(self.probe("b.webp", webp_vp8l(300, 200)), (300, 200))
+
+    def test_unknown_or_truncated(self):
+        self.assertIsNone(self.probe("a.txt", b"hello world"))
+        self.assertIsNone(self.probe("b.jpg", jpeg(10, 10)[:12]))
+        self.assertIsNone(self.probe("empty.png", b""))
+
+    def test_index_is_cached_by_stat_and_hash(self):
+        static = self.dir / "static"
+        (static / "images").mkdir(parents=True)
+        image = static / "images" / "a.png"
+        image.write_bytes(png(10, 20))
+        (static / "notes.txt").write_text("not an image")
+        cache = self.dir / "images.json"
+
+        index = ImageIndex.scan(static, cache)
+        self.assertEqual(index.lookup("/images/a.png"), (10, 20))
+        self.assertEqual(len(index), 1)
+        entry = json.loads(cache.read_text())["/images/a.png"]
+        self.assertEqual(entry["size"], [10, 20])
+
+        # An unchanged stat means the file is neither hashed nor probed
+        with mock.patch("images.file_hash") as hashed, mock.patch("images.image_size") as probed:
+            self.assertEqual(ImageIndex.scan(static, cache).lookup("/images/a.png"), (10, 20))
+        hashed.assert_not_called()
+        probed.assert_not_called()
+
+        # A changed stat with the same content is hashed but not probed again
+        st = image.stat()
+        os.utime(image, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+        with mock.patch("images.image_size") as probed:
+            self.assertEqual(ImageIndex.scan(static, cache).lookup("/images/a.png"), (10, 20))
+        probed.assert_not_called()
+
+        image.write_bytes(png(30, 40))
+        os.utime(image, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000_000))
+        changed = ImageIndex.scan(static, cache)
+        self.assertEqual(changed.lookup("/images/a.png"), (30, 40))
+        self.assertNotEqual(changed.version, index.version)
+
+
+class TestImageAttributes(unittest.TestCase):
+    MARKDOWN = "# T\n\n![one](/a.png)\n\ntext ![two](/a.png) and ![three](https://x/y.png)"
+
+    def setUp(self):
+        self.index = ImageIndex({"/a.png": (10, 20)})
+
+    def test_dimensions_and_lazy_loading(self):
+        html = markdown_to_html_node(self.MARKDOWN, RenderContext("/SSG/", images=self.index)).to_html()
+        self.assertIn('<img src="/SSG/a.png" alt="one" width="10" height="20" decoding="async"/>', html)
+        self.assertIn(
+            '<img src="/SSG/a.png" alt="two" width="10" height="20" loading="lazy" decoding="async"/>', html
+        )
+        self.assertIn('<img src="https://x/y.png" alt="three" loading="lazy" decoding="async"/>', html)
+
+    def test_without_index(self):
+        html = markdown_to_html_node(self.MARKDOWN).to_html()
+        self.assertIn('<img src="/a.png" alt="one"/>', html)
+
+    def test_cached_blocks_keep_first_image_eager(self):
+        cache = BlockCache()
+        first = markdown_to_html_node(self.MARKDOWN, RenderContext(images=self.index, cache=cache)).to_html()
+        second = markdown_to_html_node(self.MARKDOWN, RenderContext(images=self.index, cache=cache)).to_html()
+        self.assertEqual(first, second)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(first.count('loading="lazy"'), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
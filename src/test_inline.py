@@ -0,0 +1,137 @@
+import base64
+import unittest
+
+from inline import AssetInliner, PageUsage, split_rules, used_css
+from site_fixture import build, make_site, temp_dir, write_files
+
+CSS = """/* site styles */
+@charset "utf-8";
+body { margin: 0 }
+.card, .unused { padding: 1em }
+#nav > a:hover { color: red }
+table td { border: 0 }
+a[href$=".pdf"]::after { content: "{pdf}" }
+@media (max-width: 600px) { .card { padding: 0 } .gone { display: none } }
+@font-face { font-family: X; src: url(fonts/x.woff2) }
+"""
+
+
+class TestUsedCss(unittest.TestCase):
+    def test_split_rules(self):
+        rules = split_rules(CSS)
+        self.assertEqual(rules[0], ('@charset "utf-8";', None))
+        self.assertEqual(rules[1], ("body", "margin: 0"))
+        self.assertEqual(rules[5], ('a[href$=".pdf"]::after', 'content: "{pdf}"'))
+        self.assertEqual(len(rules), 8)
+
+    def test_keeps_only_matching_rules(self):
+        usage = PageUsage('<body><nav id="nav"><a href="/">home</a></nav><div class="card big">x</div></body>')
+        self.assertEqual(
+            used_css(split_rules(CSS), usage),
+            '@charset "utf-8";body{margin: 0}.card, .unused{padding: 1em}#nav > a:hover{color: red}'
+            'a[href$=".pdf"]::after{content: "{pdf}"}@media (max-width: 600px){.card{padding: 0}}'
+            "@font-face{font-family: X; src: url(fonts/x.woff2)}",
+        )
+
+    def test_selector_matching(self):
+        usage = PageUsage('<ul class="menu"><li id="first">x</li></ul>')
+        self.assertTrue(usage.matches("ul.menu li#first"))
+        self.assertTrue(usage.matches("* > li:not(.other)"))
+        self.assertFalse(usage.matches("ul.menu.wide"))
+        self.assertFalse(usage.matches("ol li"))
+
+
+class TestAssetInliner(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        self.out = self.root / "docs"
+        self.png = b"\x89PNG\r\n\x1a\n" + b"\0" * 40
+        self.page = (
+            '<head><link href="/SSG/css/site.css" rel="stylesheet"><link rel="icon" href="/SSG/images/dot.png"></head>'
+            '<body><p>x</p><img src="../images/dot.png" alt=""><img src="/SSG/images/big.png" alt=""></body>'
+        )
+        write_files(self.out, {
+            "css/site.css": "p { color: red }\n.hero { background: url(../images/bg.png) }",
+            "images/dot.png": self.png,
+            "images/big.png": self.png * 100,
+            "blog/post.html": self.page,
+        })
+
+    def test_full_css_and_small_images(self):
+        cache = self.root / "inline.json"
+        inliner = AssetInliner(self.out, "/SSG/", "full", 1024, cache)
+        self.assertEqual(inliner.run(), (1, 1, 1))
+        html = (self.out / "blog" / "post.html").read_text(encoding="utf-8")
+        data_uri = "data:image/png;base64," + base64.b64encode(self.png).decode("ascii")
+        self.assertEqual(
+            html,
+            "<head><style>p{color: red}.hero{background: url(/SSG/images/bg.png)}</style>"
+            '<link rel="icon" href="/SSG/images/dot.png"></head>'
+            f'<body><p>x</p><img src="{data_uri}" alt=""><img src="/SSG/images/big.png" alt=""></body>',
+        )
+
+        (self.out / "blog" / "post.html").write_text(self.page, encoding="utf-8")
+        again = AssetInliner(self.out, "/SSG/", "full", 1024, cache)
+        again.run()
+        self.assertEqual((again.hits, again.misses), (2, 0))
+        self.assertEqual((self.out / "blog" / "post.html").read_text(encoding="utf-8"), html)
+
+    def test_used_css(self):
+        AssetInliner(self.out, "/SSG/", "used").run()
+        html = (self.out / "blog" / "post.html").read_text(encoding="utf-8")
+        self.assertIn("<style>p{color: red}</style>", html)
+        self.assertIn('src="../images/dot.png"', html)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            AssetInliner(self.out, css_mode="some")
+
+
+class TestBuildWithInlining(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(
+            self,
+            {"content/index.md": "# Home\n\ntext", "static/index.css": "h1 { color: red } .nav { color: blue }"},
+            template='<link href="/index.css" rel="stylesheet">{{ Content }}',
+        )
+
+    def build(self, **kwargs):
+        return build(self.root, image_dimensions=False, **kwargs)
+
+    def html(self):
+        return (self.root / "docs" / "index.html").read_text(encoding="utf-8")
+
+    def test_incremental_follows_css_changes(self):
+        self.build(inline_css="used")
+        self.assertTrue(self.html().startswith("<style>h1{color: red}</style><div><h1>Home</h1>"))
+        self.assertTrue((self.root / "cache" / "inline.json").exists())
+
+        (self.root / "static" / "index.css").write_text("h1 { color: green }", encoding="utf-8")
+        self.build(inline_css="used", incremental=True)
+        self.assertTrue(self.html().startswith("<style>h1{color: green}</style>"))
+
+        # Switching inlining off is an options change: a full build with the <link> back
+        self.build(incremental=True)
+        self.assertTrue(self.html().startswith('<link href="/index.css" rel="stylesheet">'))
+
+    def test_minified_pages(self):
+        # Minify unquotes simple attribute values before the pages are inlined
+        (self.root / "static" / "dot.png").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\0" * 40)
+        (self.root / "template.html").write_text(
+            '<link href="/index.css" rel="stylesheet"><nav class="nav" id="top"><img src="/dot.png" alt="dot"></nav>'
+            "{{ Content }}",
+            encoding="utf-8",
+        )
+        self.build(minify=True, inline_css="used", inline_images=1024)
+        html = self.html()
+        self.assertTrue(html.startswith("<style>h1{color:red}.nav{color:blue}</style><nav class=nav id=top>"), html)
+        self.assertIn('<img src="data:image/png;base64,', html)
+        self.assertIn(" alt=dot>", html)
+
+    def test_rejected_for_shards(self):
+        with self.assertRaises(ValueError):
+            self.build(inline_images=1024, shard=(1, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from pathlib import Path
+
+from textnode import (
+    TextNode,
+    TextType,
+    markdown_to_blocks,
+    split_nodes_delimiter,
+    split_nodes_image,
+    split_nodes_link,
+    text_to_textnodes,
+)
+
+CONTENT_DIR = Path(__file__).resolve().parent.parent / "content"
+
+
+def legacy_text_to_textnodes(text):
+    """The original five-pass pipeline, without its empty TEXT nodes."""
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE, drop_trailing_empty=True)
+    nodes = split_nodes_image(nodes)
+    nodes = split_nodes_link(nodes)
+    return [n for n in nodes if not (n.text_type == TextType.TEXT and n.text == "")]
+
+
+# Inline text from the markdown_to_html_node test cases
+CASES = [
+    "This is **bolded** paragraph text in a p tag here",
+    "This is another paragraph with _italic_ text and `code` here",
+    "first **bold**",
+    "second _ital_",
+    "third `code`",
+    "quoted **bold**\nstill quoted _ital_",
+    "A [link](https://example.com) and an ![alt](img.png) here.",
+    "Intro paragraph with a [link](https://example.com).",
+    "H1 title",
+    "plain text",
+    "**bold** at start and `code` at end",
+    "![one](a.png)![two](b.png)",
+    "[a](x) [b](y) ![c](z)",
+    "",
+]
+
+
+class TestInlineTokenizer(unittest.TestCase):
+    def assertSameAsLegacy(self, text):
+        self.assertEqual(text_to_textnodes(text), legacy_text_to_textnodes(text), repr(text))
+
+    def test_matches_legacy_pipeline(self):
+        for text in CASES:
+            self.assertSameAsLegacy(text)
+
+    def test_matches_legacy_pipeline_on_content(self):
+        for md_path in sorted(CONTENT_DIR.rglob("*.md")):
+            for block in markdown_to_blocks(md_path.read_text(encoding="utf-8")):
+                if block.startswith("```"):
+                    continue
+                for line in block.split("\n"):
+                    self.assertSameAsLegacy(line)
+
+    def test_fast_path(self):
+        self.assertEqual(
+            text_to_textnodes("no markup, just text!"),
+            [TextNode("no markup, just text!", TextType.TEXT)],
+        )
+
+    def test_unmatched_delimiter_is_literal(self):
+        self.assertEqual(
+            text_to_textnodes("2 ** 3 and a `tick"),
+            [TextNode("2 ** 3 and a `tick", TextType.TEXT)],
+        )
+
+    def test_code_is_opaque(self):
+        self.assertEqual(
+            text_to_textnodes("`a_b_c` and [x](https://e.com/a_b)"),
+            [
+                TextNode("a_b_c", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("x", TextType.LINK, "https://e.com/a_b"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import contextlib
+import csv
+import io
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from instrument import PAGE_STAGES, QUIET, BuildLog, PageTimer, Profiler
+from main import generate_pages_recursive
+from textnode import RenderContext, markdown_to_html_node
+
+
+class TestBuildLog(unittest.TestCase):
+    def test_levels_and_buffering(self):
+        log = BuildLog()
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            log.info("one")
+            log.verbose("hidden")
+            self.assertEqual(out.getvalue(), "")  # buffered until flushed
+            log.flush()
+        self.assertEqual(out.getvalue(), "one\n")
+
+        log.level = QUIET
+        with contextlib.redirect_stdout(io.StringIO()) as out, \
+                contextlib.redirect_stderr(io.StringIO()) as err:
+            log.info("quiet")
+            log.error("boom")
+            log.flush()
+        self.assertEqual(out.getvalue(), "")
+        self.assertEqual(err.getvalue(), "boom\n")
+
+
+class TestProfiler(unittest.TestCase):
+    def test_markdown_stages_are_timed(self):
+        timer = PageTimer("doc")
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        html = markdown_to_html_node(md, RenderContext("/", timer)).to_html()
+        self.assertEqual(html, markdown_to_html_node(md).to_html())
+        for stage in ("block_split", "block_classify", "inline_parse", "block_render"):
+            self.assertGreater(timer.stages[stage], 0, stage)
+
+    def test_build_report(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            (root / "content").mkdir()
+            for i in range(3):
+                (root / "content" / f"p{i}.md").write_text(f"# P{i}\n\nsome **text**", encoding="utf-8")
+            (root / "t.html").write_text("{{ Title }}{{ Content }}", encoding="utf-8")
+
+            for workers in (1, 2):
+                profiler = Profiler()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generate_pages_recursive(root / "content", root / "t.html", root / "out",
+                                             workers=workers, profiler=profiler)
+                self.assertEqual(len(profiler.pages), 3)
+                self.assertEqual(set(profiler.pages[0].stages), set(PAGE_STAGES))
+                totals = [t.total for t in profiler.slowest()]
+                self.assertEqual(totals, sorted(totals, reverse=True))
+
+            profiler.add_build("static_copy", 0.5)
+            profiler.write_report(root / "profile.json")
+            report = json.loads((root / "profile.json").read_text())
+            self.assertEqual(report["pages"], 3)
+            self.assertEqual(report["totals"]["static_copy"], 0.5)
+            self.assertEqual(len(report["per_page"]), 3)
+
+            profiler.write_report(root / "profile.csv")
+            rows = list(csv.reader((root / "profile.csv").read_text().splitlines()))
+            self.assertEqual(rows[0][0], "page")
+            self.assertEqual(rows[-1][0], "TOTAL")
+            self.assertEqual(len(rows), 1 + 3 + 1 + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,3 +9,26 @@ class TestLeafNode(unittest.TestCase):
 	def test_leaf_to_html_(self):
 		node2 = LeafNode("a", "Click me!", {"href": "https://www.google.com"})
 		self.assertEqual(node2.to_html(), '<a href="https://www.google.com">Click me!</a>')
+
+	def test_leaf_escapes_text_and_attributes(self):
+		node = LeafNode("a", "a < b && c", {"href": '/q?x=1&y="2"'})
+		self.assertEqual(
+			node.to_html(),
+			'<a href="/q?x=1&amp;y=&quot;2&quot;">a &lt; b &amp;&amp; c</a>',
+		)
+		self.assertEqual(LeafNode(None, "it's > 3").to_html(), "it's &gt; 3")
+
+	def test_markup_is_not_escaped_twice(self):
+		from htmlnode import Markup, escape
+
+		html = Markup("<b>&amp;</b>")
+		self.assertIs(escape(html), html)
+		self.assertEqual(LeafNode(None, html).to_html(), "<b>&amp;</b>")
+		self.assertEqual(LeafNode("p", Markup(escape("<x>"))).to_html(), "<p>&lt;x&gt;</p>")
+
+	def test_plain_text_is_returned_as_is(self):
+		from htmlnode import escape
+
+		text = "nothing to escape here"
+		self.assertIs(escape(text), text)
+		self.assertEqual(escape(42), "42")
@@ -0,0 +1,89 @@
+import os
+import unittest
+
+from instrument import VERBOSE
+from manifest import BuildManifest, atomic_open_text, atomic_write_text
+from site_fixture import build_logged, make_site, temp_dir
+
+
+class TestIncrementalBuild(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(
+            self,
+            {
+                "content/index.md": "# Home\n\nhello",
+                "content/blog/post.md": "# Post\n\nbody",
+                "static/index.css": "body {}",
+            },
+            template="<title>{{ Title }}</title><link href=\"/index.css\"/>{{ Content }}",
+            level=VERBOSE,
+        )
+
+    def build(self, basepath="/", incremental=True):
+        return build_logged(self.root, basepath=basepath, incremental=incremental)
+
+    def test_manifest_roundtrip(self):
+        manifest, _ = self.build(incremental=False)
+        loaded = BuildManifest.load(self.root / "cache" / "manifest.json")
+        self.assertEqual(loaded.pages, manifest.pages)
+        self.assertEqual(loaded.static, manifest.static)
+        self.assertEqual(set(loaded.pages), {"index.md", "blog/post.md"})
+        self.assertEqual(set(loaded.static), {"index.css"})
+
+    def test_only_changed_page_is_rendered(self):
+        self.build()
+        (self.root / "content" / "blog" / "post.md").write_text("# Post\n\nedited", encoding="utf-8")
+        _, log = self.build()
+        self.assertIn("post.md", log)
+        self.assertNotIn("index.md", log)
+        self.assertNotIn("[COPY FILE]", log)
+        self.assertIn("edited", (self.root / "docs" / "blog" / "post.html").read_text())
+
+    def test_template_or_basepath_change_rebuilds_everything(self):
+        self.build()
+        _, log = self.build(basepath="/SSG/")
+        self.assertIn("index.md", log)
+        self.assertIn("post.md", log)
+        self.assertIn('href="/SSG/index.css"', (self.root / "docs" / "index.html").read_text())
+
+        tpl = self.root / "template.html"
+        tpl.write_text(tpl.read_text() + "<!-- v2 -->", encoding="utf-8")
+        _, log = self.build(basepath="/SSG/")
+        self.assertIn("index.md", log)
+        self.assertIn("post.md", log)
+
+    def test_removed_sources_delete_outputs(self):
+        self.build()
+        os.remove(self.root / "content" / "blog" / "post.md")
+        os.remove(self.root / "static" / "index.css")
+        self.build()
+        docs = self.root / "docs"
+        self.assertFalse((docs / "blog" / "post.html").exists())
+        self.assertFalse((docs / "blog").exists())
+        self.assertFalse((docs / "index.css").exists())
+        self.assertTrue((docs / "index.html").exists())
+
+    def test_missing_output_is_regenerated(self):
+        self.build()
+        os.remove(self.root / "docs" / "index.html")
+        _, log = self.build()
+        self.assertTrue((self.root / "docs" / "index.html").exists())
+        self.assertNotIn("post.md", log)
+
+
+class TestAtomicWrites(unittest.TestCase):
+    def test_replaced_whole_or_not_at_all(self):
+        path = temp_dir(self) / "a.json"
+        atomic_write_text(path, "old")
+        with self.assertRaises(RuntimeError):
+            with atomic_open_text(path) as fp:
+                fp.write("half")
+                raise RuntimeError
+        self.assertEqual(path.read_text(), "old")
+        atomic_write_text(path, "new")
+        self.assertEqual(path.read_text(), "new")
+        self.assertEqual([p.name for p in path.parent.iterdir()], ["a.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import io
+import unittest
+
+from minify import HtmlMinifier, minify_css, minify_html, minify_tag
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_whitespace_and_comments(self):
+        html = "<html>\n  <body>\n    <p>a  <b>b</b>\n  c <!-- note --> d</p>\n  </body>\n</html>\n"
+        self.assertEqual(minify_html(html), "<html><body><p>a <b>b</b> c d</p></body></html>")
+
+    def test_raw_elements_kept(self):
+        html = "<pre><code>x  =  1\n  y</code></pre>\n<p>use <code>a  b</code> here</p>"
+        self.assertEqual(minify_html(html), "<pre><code>x  =  1\n  y</code></pre><p>use <code>a  b</code> here</p>")
+
+    def test_conditional_comment_and_stray_lt(self):
+        html = "<!--[if IE]><p>old</p><![endif]--><a href=\"/\">< Back</a>"
+        self.assertEqual(minify_html(html), html)
+
+    def test_tags(self):
+        self.assertEqual(minify_tag('<img src="/a.png" alt="x" />'), '<img src="/a.png" alt=x>')
+        self.assertEqual(minify_tag('<meta  name="viewport"  content="a, b">'), '<meta name=viewport content="a, b">')
+        self.assertEqual(minify_tag("</p >"), "</p>")
+        self.assertEqual(minify_tag('<input disabled value="">'), '<input disabled value="">')
+        self.assertEqual(minify_tag('<svg a="b"/>'), '<svg a="b"/>')
+
+    def test_gt_inside_quoted_value(self):
+        self.assertEqual(minify_html('<a title="a>b">z</a>'), '<a title="a>b">z</a>')
+        html = "<meta  content=\"A -> B\"><button onclick='a>b' >go</button>"
+        self.assertEqual(minify_html(html), "<meta content=\"A -> B\"><button onclick='a>b'>go</button>")
+        for batch in (1, 5):
+            buf = io.StringIO()
+            m = HtmlMinifier(buf, batch_size=batch)
+            for i in range(0, len(html), 2):
+                m.write(html[i:i + 2])
+            m.close()
+            self.assertEqual(buf.getvalue(), minify_html(html))
+
+    def test_chunked_writes_match(self):
+        html = "<div>\n  <p>one <i>two</i></p><pre>  a\n  b</pre><!-- c -->\n<ul> <li> x </li></ul></div>"
+        expected = minify_html(html)
+        for batch in (1, 5, 32):
+            buf = io.StringIO()
+            m = HtmlMinifier(buf, batch_size=batch)
+            for i in range(0, len(html), 3):
+                m.write(html[i:i + 3])
+            m.close()
+            self.assertEqual(buf.getvalue(), expected)
+            self.assertGreater(m.bytes_in, m.bytes_out)
+
+
+class TestMinifyCss(unittest.TestCase):
+    def test_css(self):
+        css = "/* c */\nbody {\n  color : red ;\n  font-family: \"A  B\", serif;\n}\na :hover , p > b { x: calc(1px + 2px); }\n"
+        self.assertEqual(
+            minify_css(css),
+            'body{color :red;font-family:"A  B",serif}a :hover,p>b{x:calc(1px + 2px)}',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import tarfile
+import unittest
+import zipfile
+
+from output import ArchiveOutput, DiskOutput, MemoryOutput
+from site_fixture import build, make_site, temp_dir
+
+
+class TestBackends(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+
+    def test_disk_writes_atomically(self):
+        out = DiskOutput(self.root / "docs")
+        with out.open_text("a/index.html") as fp:
+            fp.write("<p>hi</p>")
+        with self.assertRaises(RuntimeError):
+            with out.open_text("a/index.html") as fp:
+                fp.write("half")
+                raise RuntimeError
+        self.assertEqual((self.root / "docs" / "a" / "index.html").read_text(), "<p>hi</p>")
+        self.assertEqual([p.name for p in (self.root / "docs" / "a").iterdir()], ["index.html"])
+        out.remove("a/index.html")
+        self.assertFalse((self.root / "docs" / "a").exists())
+
+    def test_tar_links_duplicates(self):
+        src = self.root / "a.png"
+        src.write_bytes(b"png")
+        with ArchiveOutput(self.root / "site.tar.gz", prefix="site") as out:
+            out.write_bytes("index.html", b"<p>hi</p>")
+            out.copy_from(src, "img/a.png")
+            self.assertTrue(out.link("img/a.png", "img/b.png"))
+        with tarfile.open(self.root / "site.tar.gz") as tar:
+            self.assertEqual(tar.getnames(), ["site/index.html", "site/img/a.png", "site/img/b.png"])
+            self.assertTrue(tar.getmember("site/img/b.png").islnk())
+            self.assertEqual(tar.extractfile("site/img/b.png").read(), b"png")
+
+    def test_zip_stores_duplicates_again(self):
+        with ArchiveOutput(self.root / "site.zip") as out:
+            out.write_bytes("index.html", b"<p>hi</p>")
+            self.assertFalse(out.link("index.html", "copy.html"))
+        with zipfile.ZipFile(self.root / "site.zip") as z:
+            self.assertEqual(z.read("index.html"), b"<p>hi</p>")
+
+    def test_unknown_archive_type(self):
+        with self.assertRaises(ValueError):
+            ArchiveOutput(self.root / "site.rar")
+
+
+class TestBuildToBackend(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(self, {
+            "content/index.md": "# Home\n\nhello",
+            "content/blog/post.md": "# Post\n\n**bold**",
+            "static/site.css": "body {}",
+        })
+
+    def build(self, output, **kwargs):
+        build(self.root, output=output, **kwargs)
+
+    def test_memory_build(self):
+        for workers in (1, 2):
+            out = MemoryOutput()
+            self.build(out, workers=workers, search_index=True)
+            pages = sorted(n for n in out.files if not n.startswith("search/"))
+            self.assertEqual(pages, ["blog/post.html", "index.html", "site.css"])
+            self.assertIn("search/docs.json", out.files)
+            self.assertIn("<b>bold</b>", out.text("blog/post.html"))
+            self.assertEqual(out.text("site.css"), "body {}")
+            self.assertFalse((self.root / "docs").exists())
+            self.assertFalse((self.root / "cache" / "manifest.json").exists())
+
+    def test_archive_build(self):
+        self.build(ArchiveOutput(self.root / "site.tar.gz"))
+        with tarfile.open(self.root / "site.tar.gz") as tar:
+            self.assertEqual(sorted(tar.getnames()), ["blog/post.html", "index.html", "site.css"])
+            self.assertIn(b"<title>Home</title>", tar.extractfile("index.html").read())
+
+    def test_post_build_stages_need_a_directory(self):
+        with self.assertRaises(ValueError):
+            self.build(MemoryOutput(), fingerprint=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
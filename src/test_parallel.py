@@ -0,0 +1,50 @@
+import contextlib
+import io
+import unittest
+
+from instrument import NORMAL
+from main import PageGenerationError, generate_pages_recursive
+from site_fixture import make_site
+
+
+class TestParallelGeneration(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(self, {f"content/page{i}.md": f"# Page {i}\n\nbody {i}" for i in range(8)}, level=NORMAL)
+        self.content = self.root / "content"
+        self.template = self.root / "template.html"
+
+    def generate(self, workers):
+        dest = self.root / f"out{workers}"
+        with contextlib.redirect_stdout(io.StringIO()) as out, \
+                contextlib.redirect_stderr(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, dest, workers=workers)
+        return dest, out.getvalue()
+
+    def test_same_output_as_sequential(self):
+        seq, _ = self.generate(1)
+        par, _ = self.generate(3)
+        for i in range(8):
+            self.assertEqual(
+                (seq / f"page{i}.html").read_text(),
+                (par / f"page{i}.html").read_text(),
+            )
+
+    def test_logs_are_ordered(self):
+        _, log = self.generate(3)
+        wrote = [line for line in log.splitlines() if line.startswith("[PAGE] Wrote")]
+        self.assertEqual(len(wrote), 8)
+        self.assertEqual(wrote, sorted(wrote))
+
+    def test_failing_page_is_reported(self):
+        (self.content / "page3.md").write_text("no heading here", encoding="utf-8")
+        for workers in (1, 3):
+            with self.assertRaises(PageGenerationError) as ctx:
+                self.generate(workers)
+            self.assertEqual([p.name for p, _ in ctx.exception.failures], ["page3.md"])
+            self.assertIn("No H1 header found", ctx.exception.failures[0][1])
+            # every other page was still rendered
+            self.assertTrue((self.root / f"out{workers}" / "page7.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -47,3 +47,28 @@ class TestParentNode(unittest.TestCase):
 			"<div><span><em>first</em></span><span><em>second</em></span></div>",
 			)
 
+	def test_iter_html_matches_to_html(self):
+		parent_node = ParentNode("div", [
+			LeafNode("p", "one"),
+			ParentNode("ul", [ParentNode("li", [LeafNode("b", "two")])]),
+		])
+		chunks = list(parent_node.iter_html())
+		self.assertGreater(len(chunks), 1)
+		self.assertEqual("".join(chunks), parent_node.to_html())
+
+	def test_write_html(self):
+		import io
+		parent_node = ParentNode("div", [LeafNode("a", "x", {"href": "/y"})])
+		fp = io.StringIO()
+		parent_node.write_html(fp)
+		self.assertEqual(fp.getvalue(), '<div><a href="/y">x</a></div>')
+
+	def test_iter_html_raises_lazily(self):
+		parent_node = ParentNode("div", [])
+		chunks = parent_node.iter_html()
+		with self.assertRaises(ValueError):
+			next(chunks)
+
+	def test_to_html_with_props(self):
+		parent_node = ParentNode("pre", [LeafNode("code", "x")], {"class": "c"})
+		self.assertEqual(parent_node.to_html(), '<pre class="c"><code>x</code></pre>')
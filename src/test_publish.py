@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import unittest
+
+from main import PageGenerationError
+from publish import publish_swap, publish_sync, staging_dir
+from site_fixture import build, make_site, temp_dir, write_files
+
+
+class TestPublish(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        self.dest = self.root / "docs"
+        write_files(self.dest, {"same.html": "same", "changed.html": "old", "stale.html": "gone", "sub/x.css": "x"})
+        for p in self.dest.rglob("*"):
+            os.utime(p, (1_000_000, 1_000_000))
+        self.staging = staging_dir(self.dest)
+        write_files(self.staging, {"same.html": "same", "changed.html": "new", "added.html": "added"})
+
+    def check_published(self):
+        names = sorted(p.relative_to(self.dest).as_posix() for p in self.dest.rglob("*"))
+        self.assertEqual(names, ["added.html", "changed.html", "same.html"])
+        self.assertEqual((self.dest / "changed.html").read_text(), "new")
+        self.assertEqual((self.dest / "same.html").stat().st_mtime, 1_000_000)
+        self.assertNotEqual((self.dest / "changed.html").stat().st_mtime, 1_000_000)
+        self.assertFalse(self.staging.exists())
+
+    def test_swap(self):
+        self.assertEqual(publish_swap(self.staging, self.dest), (1, 2))
+        self.check_published()
+        self.assertEqual(sorted(p.name for p in self.root.iterdir()), ["docs"])
+
+    def test_sync(self):
+        self.assertEqual(publish_sync(self.staging, self.dest), (1, 2, 2))
+        self.check_published()
+
+    def test_swap_into_missing_dest(self):
+        fresh = self.root / "fresh"
+        staging = staging_dir(fresh)
+        os.rename(self.staging, staging)
+        publish_swap(staging, fresh)
+        self.assertEqual((fresh / "added.html").read_text(), "added")
+
+
+class TestStagedBuild(unittest.TestCase):
+    def setUp(self):
+        self.root = make_site(self, {"content/index.md": "# Home\n\nhello"})
+
+    def build(self, **kwargs):
+        build(self.root, **kwargs)
+
+    def test_failed_build_leaves_dest_untouched(self):
+        self.build()
+        before = (self.root / "docs" / "index.html").read_text()
+        (self.root / "content" / "broken.md").write_text("no title here", encoding="utf-8")
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(PageGenerationError):
+            self.build()
+        self.assertEqual((self.root / "docs" / "index.html").read_text(), before)
+        self.assertFalse(staging_dir(self.root / "docs").exists())
+
+    def test_sync_build_prunes_unknown_files(self):
+        self.build()
+        (self.root / "docs" / "stray.html").write_text("?", encoding="utf-8")
+        self.build(publish_mode="sync")
+        self.assertFalse((self.root / "docs" / "stray.html").exists())
+        self.assertTrue((self.root / "docs" / "index.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
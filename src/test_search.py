@@ -0,0 +1,79 @@
+import json
+import unittest
+
+from search import SearchIndex, page_url, shard_of, tokenize
+from site_fixture import temp_dir, write_files
+
+
+class TestTokenize(unittest.TestCase):
+    def test_terms(self):
+        terms = tokenize("# The Hobbit\n\nA **hobbit** [link](/hobbit-hole) and the ring. Ring!")
+        self.assertEqual(terms["hobbit"], 2)
+        self.assertEqual(terms["ring"], 2)
+        self.assertEqual(terms["link"], 1)
+        self.assertNotIn("hole", terms)  # link targets are skipped
+        self.assertNotIn("the", terms)
+        self.assertNotIn("a", terms)
+
+    def test_shard_and_url(self):
+        self.assertEqual(shard_of("hobbit"), "ho")
+        self.assertEqual(shard_of("éowyn"), "_")
+        self.assertEqual(page_url("index.html", "/SSG/"), "/SSG/")
+        self.assertEqual(page_url("blog/tom/index.html"), "/blog/tom/")
+        self.assertEqual(page_url("blog/post.html"), "/blog/post.html")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = temp_dir(self)
+        self.state = self.root / "search.json"
+        self.out = self.root / "docs"
+        write_files(self.root, {"a.md": "# Alpha\n\nhobbit hobbit shire", "b.md": "# Beta\n\nring hobbit"})
+
+    def build(self, hashes):
+        index = SearchIndex(self.state)
+        for rel, digest in hashes.items():
+            index.add_page(rel, self.root / rel, digest, page_url(rel.replace(".md", ".html")))
+        index.retain(hashes)
+        index.write(self.out)
+        index.save()
+        return index
+
+    def shard(self, prefix):
+        return json.loads((self.out / "search" / f"{prefix}.json").read_text(encoding="utf-8"))
+
+    def test_written_index(self):
+        self.build({"a.md": "1", "b.md": "1"})
+        docs = json.loads((self.out / "search" / "docs.json").read_text())
+        self.assertEqual(docs["docs"], [["Alpha", "/a.html"], ["Beta", "/b.html"]])
+        self.assertIn("ho", docs["shards"])
+        self.assertEqual(self.shard("ho")["hobbit"], [0, 2, 1, 1])
+        self.assertEqual(self.shard("ri")["ring"], [1, 1])
+
+    def test_incremental_update(self):
+        self.build({"a.md": "1", "b.md": "1"})
+        (self.root / "b.md").write_text("# Beta\n\nmordor", encoding="utf-8")
+        index = self.build({"a.md": "1", "b.md": "2"})
+        self.assertEqual(index.tokenized, 1)
+        self.assertEqual(self.shard("mo")["mordor"], [1, 1])
+        self.assertFalse((self.out / "search" / "ri.json").exists())
+
+        index = self.build({"b.md": "2"})
+        self.assertEqual(index.tokenized, 0)
+        self.assertFalse((self.out / "search" / "sh.json").exists())
+        self.assertEqual(self.shard("mo")["mordor"], [0, 1])
+
+
+    def test_shards_replaced_atomically(self):
+        self.build({"a.md": "1", "b.md": "1"})
+        inode = {name: (self.out / "search" / f"{name}.json").stat().st_ino for name in ("ho", "sh")}
+        (self.root / "b.md").write_text("# Beta\n\nring hobbit hobbit", encoding="utf-8")
+        self.build({"a.md": "1", "b.md": "2"})
+        # A changed shard is a new file swapped in; an unchanged one is left alone
+        self.assertNotEqual((self.out / "search" / "ho.json").stat().st_ino, inode["ho"])
+        self.assertEqual((self.out / "search" / "sh.json").stat().st_ino, inode["sh"])
+        self.assertEqual(list((self.out / "search").glob("*.tmp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import contextlib
+import io
+import os
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+from instrument import NORMAL
+from serve import RELOAD_SCRIPT, Inotify, SiteState, make_handler, watch
+from site_fixture import make_site
+from http.server import ThreadingHTTPServer
+
+
+class TestSiteState(unittest.TestCase):
+    def setUp(self):
+        self.root = root = make_site(
+            self,
+            {
+                "content/index.md": "# Home\n\n[post](/blog)",
+                "content/blog/index.md": "# Post\n\nbody",
+                "static/index.css": "body {}",
+            },
+            template="<body>{{ Content }}</body>",
+            level=NORMAL,
+        )
+        self.state = SiteState(root / "content", root / "template.html", root / "static")
+        self.state.build()
+
+    def touch(self, rel, text):
+        p = self.root / rel
+        p.write_text(text, encoding="utf-8")
+        st = p.stat()
+        os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    def test_lookup(self):
+        self.assertIn(b"<h1>Home</h1>", self.state.lookup("/").body)
+        self.assertIn(b"<h1>Post</h1>", self.state.lookup("/blog").body)
+        self.assertIn(b"<h1>Post</h1>", self.state.lookup("/blog/").body)
+        self.assertEqual(self.state.lookup("/index.css").content_type, "text/css")
+        self.assertIsNone(self.state.lookup("/nope"))
+        self.assertIn(RELOAD_SCRIPT.encode(), self.state.lookup("/").body)
+
+    def test_refresh_only_changed_page(self):
+        home = self.state.lookup("/")
+        self.assertEqual(self.state.refresh(), 0)
+        self.touch("content/blog/index.md", "# Post\n\nedited")
+        generation = self.state.generation
+        self.assertEqual(self.state.refresh(), 1)
+        self.assertGreater(self.state.generation, generation)
+        self.assertIn(b"edited", self.state.lookup("/blog/").body)
+        self.assertIs(self.state.lookup("/"), home)
+
+    def test_template_change_rerenders_all(self):
+        self.touch("template.html", "<body><main>{{ Content }}</main></body>")
+        self.assertEqual(self.state.refresh(), 2)
+        self.assertIn(b"<main>", self.state.lookup("/").body)
+
+    def test_removed_page(self):
+        os.remove(self.root / "content" / "blog" / "index.md")
+        self.state.refresh()
+        self.assertIsNone(self.state.lookup("/blog/"))
+
+    def test_refresh_given_paths(self):
+        content = self.root / "content"
+        self.touch("content/blog/index.md", "# Post\n\nedited")
+        # Only the given paths are looked at
+        self.assertEqual(self.state.refresh({content / "index.md"}), 0)
+        self.assertEqual(self.state.refresh({content / "blog" / "index.md"}), 1)
+        self.assertIn(b"edited", self.state.lookup("/blog/").body)
+
+        (content / "news").mkdir()
+        (content / "news" / "index.md").write_text("# News", encoding="utf-8")
+        self.assertEqual(self.state.refresh({content / "news"}), 1)
+        self.assertIn(b"<h1>News</h1>", self.state.lookup("/news/").body)
+        (content / "news" / "index.md").unlink()
+        (content / "news").rmdir()
+        self.assertEqual(self.state.refresh({content / "news"}), 1)
+        self.assertIsNone(self.state.lookup("/news/"))
+
+        self.touch("template.html", "<body><main>{{ Content }}</main></body>")
+        self.assertEqual(self.state.refresh({self.root / "template.html", self.root / "unrelated.txt"}), 2)
+
+    def test_error_page_is_escaped(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.touch("content/blog/index.md", "no <title> here")
+            self.state.refresh()
+        body = self.state.lookup("/blog/").body
+        self.assertIn(b"Build error", body)
+        self.assertNotIn(b"<title>", body)
+
+    @unittest.skipIf(Inotify.create() is None, "inotify is not available")
+    def test_watch_reacts_to_events(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=watch, args=(self.state,), kwargs={"interval": 1, "stop": stop})
+        with contextlib.redirect_stdout(io.StringIO()):
+            thread.start()
+            try:
+                time.sleep(0.1)  # let the watches be added
+                generation = self.state.generation
+                start = time.perf_counter()
+                self.touch("content/blog/index.md", "# Post\n\nlive")
+                with self.state.changed:
+                    self.state.changed.wait_for(lambda: self.state.generation != generation, timeout=5)
+                # Well inside the 1 s poll interval: the change came from inotify
+                self.assertLess(time.perf_counter() - start, 0.5)
+                self.assertIn(b"live", self.state.lookup("/blog/").body)
+            finally:
+                stop.set()
+                thread.join()
+
+    def test_etag_not_modified(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(self.state))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/index.css"
+            with urllib.request.urlopen(url) as resp:
+                etag = resp.headers["ETag"]
+                self.assertEqual(resp.read(), b"body {}")
+            req = urllib.request.Request(url, headers={"If-None-Match": etag})
+            with self.assertRaises(urllib.error.HTTPError) as ctx:
+                urllib.request.urlopen(req)
+            self.assertEqual(ctx.exception.code, 304)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import contextlib
+import io
+import shutil
+import unittest
+
+from main import merge_shards
+from shard import PAGE_COST, assign_shards, parse_shard, path_shard
+from site_fixture import build, make_site
+
+
+class TestAssignShards(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/3"), (2, 3))
+        for bad in ("0/3", "4/3", "1/0", "1", "a/b", "1/2/3"):
+            with self.assertRaises(ValueError, msg=bad):
+                parse_shard(bad)
+
+    def test_size_balanced(self):
+        sizes = {"big.md": 100_000, "a.md": 40_000, "b.md": 40_000, "c.md": 10_000, "d.md": 10_000}
+        assigned = assign_shards(sizes, 2)
+        self.assertEqual(assigned, assign_shards(dict(reversed(sizes.items())), 2))
+        loads = {1: 0, 2: 0}
+        for rel, shard in assigned.items():
+            loads[shard] += sizes[rel] + PAGE_COST
+        self.assertLessEqual(abs(loads[1] - loads[2]), 20_000 + PAGE_COST)
+
+    def test_hash_is_stable_per_path(self):
+        paths = {f"p{i}.md": i for i in range(50)}
+        assigned = assign_shards(paths, 4, "hash")
+        self.assertEqual(set(assigned.values()), {1, 2, 3, 4})
+        del paths["p0.md"]
+        smaller = assign_shards(paths, 4, "hash")
+        self.assertTrue(all(smaller[rel] == assigned[rel] == path_shard(rel, 4) for rel in smaller))
+
+
+class TestShardedBuild(unittest.TestCase):
+    def setUp(self):
+        files = {f"content/blog/post{i}.md": f"# Post {i}\n\n" + "text " * 50 * i for i in range(5)}
+        files["content/index.md"] = "# Home\n\nhello"
+        files["static/site.css"] = "body {}"
+        self.root = make_site(self, files)
+
+    def build(self, **kwargs):
+        return build(self.root, **kwargs)
+
+    def build_shards(self, count):
+        for i in range(1, count + 1):
+            self.build(dest=self.root / "shards" / str(i), shard=(i, count))
+        return [self.root / "shards" / str(i) for i in range(1, count + 1)]
+
+    def merge(self, dirs):
+        r = self.root
+        with contextlib.redirect_stdout(io.StringIO()):
+            return merge_shards(
+                dirs, content=r / "content", static=r / "static", dest=r / "merged",
+                manifest_path=r / "cache" / "merged.json",
+            )
+
+    @staticmethod
+    def files(root):
+        return {p.relative_to(root).as_posix(): p.read_bytes() for p in root.rglob("*") if p.is_file()}
+
+    def test_merge_matches_a_full_build(self):
+        full = self.build()
+        merged = self.merge(self.build_shards(3))
+        self.assertEqual(self.files(self.root / "merged"), self.files(self.root / "docs"))
+        self.assertEqual(merged.pages, full.pages)
+        self.assertEqual(merged.static, full.static)
+
+    def test_shards_split_the_pages(self):
+        dirs = self.build_shards(2)
+        pages = [{p.name for p in d.rglob("*.html")} for d in dirs]
+        self.assertFalse(pages[0] & pages[1])
+        self.assertFalse((dirs[0] / "site.css").exists())
+        self.assertFalse((self.root / "cache" / "manifest.json").exists())
+
+    def test_missing_shard(self):
+        dirs = self.build_shards(3)
+        with self.assertRaisesRegex(ValueError, "Expected shards 1..3"):
+            self.merge(dirs[:2])
+        with self.assertRaisesRegex(ValueError, "Expected shards 1..3"):
+            self.merge(dirs + dirs[:1])
+        self.assertFalse((self.root / "merged").exists())
+
+    def test_uncovered_page(self):
+        dirs = self.build_shards(2)
+        (self.root / "content" / "new.md").write_text("# New", encoding="utf-8")
+        with self.assertRaisesRegex(ValueError, "not built by any shard: new.md"):
+            self.merge(dirs)
+
+    def test_path_written_twice(self):
+        dirs = self.build_shards(2)
+        shutil.copy(self.root / "static" / "site.css", dirs[1] / "site.css")
+        with self.assertRaisesRegex(ValueError, "site.css is written by both static and shard 2"):
+            self.merge(dirs)
+
+    def test_settings_must_match(self):
+        dirs = self.build_shards(2)
+        self.build(dest=dirs[1], shard=(2, 2), basepath="/other/")
+        with self.assertRaisesRegex(ValueError, "different settings"):
+            self.merge(dirs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import unittest
+
+from output import DiskOutput
+from site_fixture import temp_dir, write_files
+from staticcopy import StaticCopier, copy_file
+
+
+class TestStaticCopier(unittest.TestCase):
+    def setUp(self):
+        root = temp_dir(self)
+        self.src = root / "static"
+        self.dst = root / "docs"
+        png = os.urandom(200_000)
+        write_files(self.src, {"img/a.png": png, "img/copy.png": png, "site.css": "body {}"})
+        os.symlink("a.png", self.src / "img" / "link.png")
+
+    def test_copy_file(self):
+        self.dst.mkdir()
+        method = copy_file(self.src / "site.css", self.dst / "site.css")
+        self.assertIn(method, {"reflink", "copy_file_range", "sendfile", "read/write"})
+        self.assertEqual((self.dst / "site.css").read_text(), "body {}")
+        self.assertEqual(
+            (self.dst / "site.css").stat().st_mtime_ns, (self.src / "site.css").stat().st_mtime_ns
+        )
+
+    def test_full_copy_dedupes_identical_files(self):
+        hashes = StaticCopier().copy(self.src, DiskOutput(self.dst))
+        self.assertEqual(set(hashes), {"img/a.png", "img/copy.png", "img/link.png", "site.css"})
+        out = self.dst / "img"
+        self.assertEqual((out / "copy.png").read_bytes(), (self.src / "img" / "a.png").read_bytes())
+        self.assertFalse((out / "link.png").is_symlink())
+        self.assertTrue(os.path.samefile(out / "a.png", out / "copy.png"))
+        self.assertTrue(os.path.samefile(out / "a.png", out / "link.png"))
+        self.assertFalse(os.path.samefile(out / "a.png", self.src / "img" / "a.png"))
+
+    def test_incremental_skips_and_deletes(self):
+        copier = StaticCopier()
+        hashes = copier.copy(self.src, DiskOutput(self.dst))
+        css = self.dst / "site.css"
+        os.utime(css, ns=(1, 1))
+        os.utime(self.src / "site.css", ns=(1, 1))
+        (self.src / "img" / "copy.png").unlink()
+
+        again = copier.copy(self.src, DiskOutput(self.dst), hashes)
+        self.assertEqual(again["site.css"], hashes["site.css"])
+        self.assertEqual(css.stat().st_mtime_ns, 1)
+        self.assertFalse((self.dst / "img" / "copy.png").exists())
+
+        (self.src / "site.css").write_text("p {}", encoding="utf-8")
+        copier.copy(self.src, DiskOutput(self.dst), again)
+        self.assertEqual(css.read_text(), "p {}")
+
+    def test_link_and_transform(self):
+        def upper_css(s):
+            return s.read_bytes().upper() if s.suffix == ".css" else None
+
+        StaticCopier(link=True, transform=upper_css).copy(self.src, DiskOutput(self.dst))
+        self.assertTrue(os.path.samefile(self.dst / "img" / "a.png", self.src / "img" / "a.png"))
+        self.assertEqual((self.dst / "site.css").read_text(), "BODY {}")
+
+
+if __name__ == "__main__":
+    unittest.main()
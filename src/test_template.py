@@ -0,0 +1,63 @@
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import Slot, Template
+from textnode import RenderContext, markdown_to_html_node
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments(self):
+        tpl = Template("<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(
+            tpl.segments,
+            ["<title>", Slot("Title"), "</title><main>", Slot("content"), "</main>"],
+        )
+        self.assertEqual(tpl.slot_names, ["title", "content"])
+
+    def test_render_arbitrary_slots(self):
+        tpl = Template("{{ Title }} | {{ Date }} | {{ Nav }} | {{ Missing }}.")
+        html = tpl.render({
+            "title": "Hello",
+            "date": "2024-01-02",
+            "nav": ParentNode("nav", [LeafNode("a", "home", {"href": "/"})]),
+        })
+        self.assertEqual(html, 'Hello | 2024-01-02 | <nav><a href="/">home</a></nav> | .')
+
+    def test_basepath_applied_to_template_at_compile_time(self):
+        tpl = Template('<link href="/index.css"/><script src="//cdn.example/x.js"></script>', "/SSG/")
+        self.assertEqual(
+            tpl.render({}),
+            '<link href="/SSG/index.css"/><script src="//cdn.example/x.js"></script>',
+        )
+
+    def test_basepath_applied_while_rendering_content(self):
+        md = (
+            "[home](/index) and ![logo](/images/logo.png) and [ext](https://e.com/)\n\n"
+            "```\n<a href=\"/not-a-link\">sample</a>\n```"
+        )
+        html = markdown_to_html_node(md, RenderContext("/SSG/")).to_html()
+        self.assertIn('<a href="/SSG/index">home</a>', html)
+        self.assertIn('<img src="/SSG/images/logo.png" alt="logo"/>', html)
+        self.assertIn('<a href="https://e.com/">ext</a>', html)
+        # code samples are escaped, not rewritten
+        self.assertIn('&lt;a href="/not-a-link"&gt;sample&lt;/a&gt;', html)
+
+    def test_string_values_are_escaped_unless_markup(self):
+        from htmlnode import Markup
+
+        tpl = Template("<title>{{ Title }}</title>{{ Content }}")
+        html = tpl.render({"title": "Tom & <Jerry>", "content": Markup("<p>ok</p>")})
+        self.assertEqual(html, "<title>Tom &amp; &lt;Jerry&gt;</title><p>ok</p>")
+
+    def test_string_values_are_safe_in_attributes(self):
+        tpl = Template("<meta name=\"description\" content=\"{{ Description }}\"><meta content='{{ Description }}'>")
+        html = tpl.render({"description": "He said \"hi\" & left, it's done"})
+        self.assertEqual(
+            html,
+            '<meta name="description" content="He said &quot;hi&quot; &amp; left, it&#x27;s done">'
+            "<meta content='He said &quot;hi&quot; &amp; left, it&#x27;s done'>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,16 @@
 import unittest
 import textwrap
-from textnode import markdown_to_html_node
+from blockcache import BlockCache
+from htmlnode import LeafNode, ParentNode
+from textnode import (
+    BlockScanner,
+    BlockType,
+    RenderContext,
+    block_to_block_type,
+    markdown_to_html_node,
+    register_block_kind,
+    unregister_block_kind,
+)
 
 
 class TestMarkdownToHtmlNode(unittest.TestCase):
@@ -105,6 +115,80 @@ class TestMarkdownToHtmlNode(unittest.TestCase):
             "</div>",
         )
 
+    def test_special_characters_are_escaped_once(self):
+        md = "[< Back](/?a=1&b=2) a < b && `x > y`\n\n```\n<script>\n```"
+        expected = (
+            '<div><p><a href="/?a=1&amp;b=2">&lt; Back</a> a &lt; b &amp;&amp; <code>x &gt; y</code></p>'
+            "<pre><code>&lt;script&gt;\n</code></pre></div>"
+        )
+        self.assertEqual(markdown_to_html_node(md).to_html(), expected)
+        ctx = RenderContext(cache=BlockCache(100))
+        for _ in range(2):  # miss, then hit
+            self.assertEqual(markdown_to_html_node(md, ctx).to_html(), expected)
+
+
+
+def _render_table(block, ctx):
+    rows = [line.strip("|").split("|") for line in block.split("\n")]
+    return ParentNode("table", [
+        ParentNode("tr", [LeafNode("td", cell.strip()) for cell in row]) for row in rows
+    ])
+
+
+def _render_note(block, ctx):
+    return ParentNode("aside", [LeafNode(None, block[4:].strip())], {"class": "note"})
+
+
+class TestBlockKinds(unittest.TestCase):
+    def register(self, *args, **kwargs):
+        kind = register_block_kind(*args, **kwargs)
+        self.addCleanup(unregister_block_kind, kind.type)
+        return kind
+
+    def test_new_kind(self):
+        self.assertEqual(block_to_block_type("| a | b |"), BlockType.PARAGRAPH)
+        self.register("table", "|", _render_table, lambda block, lines: block.endswith("|"))
+        self.assertEqual(block_to_block_type("| a | b |\n| c | d |"), "table")
+        self.assertEqual(block_to_block_type("| not a table"), BlockType.PARAGRAPH)
+        for cache in (None, BlockCache(100)):
+            html = markdown_to_html_node("# T\n\n| a | b |\n| c | d |", RenderContext(cache=cache)).to_html()
+            self.assertEqual(
+                html,
+                "<div><h1>T</h1><table><tr><td>a</td><td>b</td></tr><tr><td>c</td><td>d</td></tr></table></div>",
+            )
+        self.assertEqual(
+            [btype for btype, _ in BlockScanner(["| x |\n", "\n", "text\n"])], ["table", BlockType.PARAGRAPH]
+        )
+
+    def test_block_cache_follows_registry(self):
+        cache = BlockCache(100)
+        md = "| a | b |"
+        self.assertEqual(markdown_to_html_node(md, RenderContext(cache=cache)).to_html(), "<div><p>| a | b |</p></div>")
+        self.register("table", "|", _render_table)
+        self.assertEqual(
+            markdown_to_html_node(md, RenderContext(cache=cache)).to_html(),
+            "<div><table><tr><td>a</td><td>b</td></tr></table></div>",
+        )
+        unregister_block_kind("table")
+        self.assertEqual(markdown_to_html_node(md, RenderContext(cache=cache)).to_html(), "<div><p>| a | b |</p></div>")
+
+    def test_later_kind_is_tried_first(self):
+        self.register("note", ">", _render_note, lambda block, lines: block.startswith(">!! "))
+        self.assertEqual(block_to_block_type(">!! careful"), "note")
+        self.assertEqual(block_to_block_type("> quoted"), BlockType.QUOTE)
+        self.assertEqual(
+            markdown_to_html_node(">!! careful").to_html(), '<div><aside class="note">careful</aside></div>'
+        )
+
+    def test_unregister(self):
+        self.register("table", "|", _render_table)
+        unregister_block_kind("table")
+        self.assertEqual(block_to_block_type("| a |"), BlockType.PARAGRAPH)
+        with self.assertRaises(ValueError):
+            register_block_kind(BlockType.PARAGRAPH, "x", _render_note)
+        with self.assertRaises(ValueError):
+            register_block_kind("empty", "", _render_note)
+
 
 if __name__ == "__main__":
     unittest.main()
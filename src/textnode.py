@@ -1,6 +1,9 @@
 from enum import Enum
 from htmlnode import *
+from highlight import LEXERS, highlight, language
+import hashlib
 import re
+from time import perf_counter
 
 
 class TextType(Enum):
@@ -13,6 +16,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -30,7 +35,60 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(node: TextNode):
+class RenderContext:
+    """
+    Per-page rendering state threaded through the block and inline renderers.
+
+    basepath: normalized URL prefix ("/" or "/repo/") applied to root-relative
+              link and image URLs as they are rendered
+    timer:    optional instrument.PageTimer; when set, block splitting,
+              classification and inline parsing are timed separately
+    cache:    optional blockcache.BlockCache of rendered block HTML
+    images:   optional images.ImageIndex; when set, images get width/height,
+              decoding="async" and, after the first one on the page, loading="lazy"
+    """
+    __slots__ = ("basepath", "timer", "cache", "images", "seen_image")
+
+    def __init__(self, basepath: str = "/", timer=None, cache=None, images=None):
+        self.basepath = basepath
+        self.timer = timer
+        self.cache = cache
+        self.images = images
+        self.seen_image = False
+
+    def cache_key(self) -> str:
+        """Everything in this context that changes how a block renders, including the registered block kinds."""
+        if self.images is None:
+            return f"{self.basepath}\0{_kinds_version}"
+        return f"{self.basepath}\0{_kinds_version}\0{self.images.version}\0{int(self.seen_image)}"
+
+    def image_props(self, node: "TextNode") -> dict:
+        props = {"src": self.url(node.url), "alt": node.text}
+        if self.images is None:
+            return props
+        size = self.images.lookup(node.url)
+        if size is not None:
+            props["width"], props["height"] = str(size[0]), str(size[1])
+        # The first image is usually above the fold; don't delay it
+        if self.seen_image:
+            props["loading"] = "lazy"
+        props["decoding"] = "async"
+        self.seen_image = True
+        return props
+
+    def url(self, url):
+        """Prefix a root-relative URL with the basepath; other URLs are untouched."""
+        if self.basepath == "/" or not url or url[0] != "/" or url.startswith("//"):
+            return url
+        return self.basepath + url[1:]
+
+
+_DEFAULT_CONTEXT = RenderContext()
+
+
+def text_node_to_html_node(node: TextNode, ctx: RenderContext | None = None):
+    if ctx is None:
+        ctx = _DEFAULT_CONTEXT
     if node.text_type == TextType.TEXT:
         return LeafNode(value=node.text)
     if node.text_type == TextType.BOLD:
@@ -40,9 +98,9 @@ def text_node_to_html_node(node: TextNode):
     if node.text_type == TextType.CODE:
         return LeafNode(tag="code", value=node.text)
     if node.text_type == TextType.LINK:
-        return LeafNode(tag="a", value=node.text, props={"href": node.url})
+        return LeafNode(tag="a", value=node.text, props={"href": ctx.url(node.url)})
     if node.text_type == TextType.IMAGE:
-        return LeafNode(tag="img", props={"src": node.url, "alt": node.text})
+        return LeafNode(tag="img", props=ctx.image_props(node))
     raise Exception("Not a supported TextType")
 
 
@@ -140,16 +198,75 @@ def split_nodes_link(old_nodes):
     return new_nodes
 
 
+# Characters that can start inline markup; text without any of them is plain.
+_INLINE_MARKUP_CHARS = frozenset("*_`[")
+# Next candidate token: bold, italic, code, image or link opener
+_INLINE_TOKEN_RE = re.compile(r"\*\*|[_`]|!?\[")
+_IMAGE_RE = re.compile(r"!\[(.*?)\]\((.*?)\)")
+_LINK_RE = re.compile(r"\[(.*?)\]\((.*?)\)")
+_DELIMITED_TYPES = {
+    "**": TextType.BOLD,
+    "_": TextType.ITALIC,
+    "`": TextType.CODE,
+}
+
+
 def text_to_textnodes(text: str):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    # Drop the trailing empty TEXT created by a terminal `code` segment
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE, drop_trailing_empty=True)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    """
+    Tokenize inline markdown into TextNodes in a single left-to-right scan.
+
+    Produces the same nodes as the split_nodes_* pipeline for well-formed input,
+    minus the empty TEXT nodes that pipeline leaves around delimiters.
+    An unmatched delimiter is kept as literal text.
+    """
+    # Fast path: nothing that could start markup
+    if _INLINE_MARKUP_CHARS.isdisjoint(text):
+        return [TextNode(text, TextType.TEXT)] if text else []
+
+    nodes = []
+    start = 0  # start of the pending plain-text run
+    pos = 0
+    search = _INLINE_TOKEN_RE.search
+    while True:
+        m = search(text, pos)
+        if m is None:
+            break
+        token = m.group()
+        at = m.start()
+
+        if token in _DELIMITED_TYPES:
+            end = text.find(token, m.end())
+            if end == -1:
+                pos = m.end()
+                continue
+            node = TextNode(text[m.end():end], _DELIMITED_TYPES[token])
+            after = end + len(token)
+        else:
+            if token == "![":
+                match = _IMAGE_RE.match(text, at)
+                if match is None:
+                    # Not an image; the "[" may still open a link
+                    pos = at + 1
+                    continue
+                node = TextNode(match.group(1), TextType.IMAGE, match.group(2))
+            else:
+                match = _LINK_RE.match(text, at)
+                if match is None:
+                    pos = m.end()
+                    continue
+                node = TextNode(match.group(1), TextType.LINK, match.group(2))
+            after = match.end()
+
+        if at > start:
+            nodes.append(TextNode(text[start:at], TextType.TEXT))
+        nodes.append(node)
+        start = pos = after
+
+    if start < len(text):
+        nodes.append(TextNode(text[start:], TextType.TEXT))
     return nodes
 
+
 def markdown_to_blocks(markdown: str) -> list[str]:
     """
     Split a raw Markdown string into block strings.
@@ -182,91 +299,89 @@ class BlockType(Enum):
     ORDERED_LIST = "ordered_list"
 
 
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$")
+_QUOTE_PREFIX_RE = re.compile(r"^>\s?")
+_OL_PREFIX_RE = re.compile(r"^\d+\.\s")
+
+
 def block_to_block_type(block: str) -> BlockType:
     """
-    Determine the Markdown block type.
+    Determine the Markdown block type: a BlockType, or the type of a kind added
+    with register_block_kind.
 
     Assumes `block` has already had leading/trailing whitespace stripped.
     """
     if not block:
         return BlockType.PARAGRAPH
+    return _classify(block, None)
 
-    # Code block: starts with ``` and ends with ```
-    if block.startswith("```") and block.endswith("```"):
-        return BlockType.CODE
-
-    # Heading: 1–6 '#' followed by a space, then text
-    if re.match(r"^(#{1,6})\s+.+$", block):
-        return BlockType.HEADING
-
-    lines = block.split("\n")
-
-    # Quote: every line starts with '>'
-    if all(line.startswith(">") for line in lines):
-        return BlockType.QUOTE
-
-    # Unordered list: every line starts with "- " (dash + space)
-    if all(line.startswith("- ") for line in lines):
-        return BlockType.UNORDERED_LIST
-
-    # Ordered list: lines start with "1. ", "2. ", ... incrementing by 1
-    is_ordered = True
-    for i, line in enumerate(lines, start=1):
-        if not line.startswith(f"{i}. "):
-            is_ordered = False
-            break
-    if is_ordered and len(lines) > 0:
-        return BlockType.ORDERED_LIST
 
-    # Default: paragraph
+def _classify(block: str, lines: list[str] | None) -> BlockType:
+    """
+    block_to_block_type for a non-empty block; `lines` is block.split("\n")
+    when the caller already has it. Only the kinds registered for the block's
+    first character are tried; a block none of them matches is a paragraph.
+    """
+    for kind in _KINDS_BY_FIRST.get(block[0], ()):
+        if kind.match is None or kind.match(block, lines):
+            return kind.type
     return BlockType.PARAGRAPH
 
 
-def text_to_children(text: str):
+def text_to_children(text: str, ctx: RenderContext | None = None):
     """
     Convert a string with inline markdown into a list of HTMLNodes,
     using your existing inline pipeline (TextNode -> HTMLNode).
     """
-    nodes = text_to_textnodes(text)
-    return [text_node_to_html_node(n) for n in nodes]
+    if ctx is not None and ctx.timer is not None:
+        start = perf_counter()
+        nodes = text_to_textnodes(text)
+        ctx.timer.add("inline_parse", perf_counter() - start)
+    else:
+        nodes = text_to_textnodes(text)
+    return [text_node_to_html_node(n, ctx) for n in nodes]
 
 # ---------- per-block renderers ----------
-def _render_heading(block: str) -> ParentNode:
+def _render_heading(block: str, ctx: RenderContext) -> ParentNode:
     # Heading: 1–6 '#' + space
-    m = re.match(r"^(#{1,6})\s+(.*)$", block)
+    m = _HEADING_RE.match(block)
     level = len(m.group(1))
     content = m.group(2)
-    return ParentNode(f"h{level}", text_to_children(content))
+    return ParentNode(f"h{level}", text_to_children(content, ctx))
 
-def _render_paragraph(block: str) -> ParentNode:
+def _render_paragraph(block: str, ctx: RenderContext) -> ParentNode:
     # Collapse internal line breaks into single spaces for paragraphs
     collapsed = " ".join(block.splitlines())
-    return ParentNode("p", text_to_children(collapsed))
+    return ParentNode("p", text_to_children(collapsed, ctx))
 
 
-def _render_quote(block: str) -> ParentNode:
+def _render_quote(block: str, ctx: RenderContext) -> ParentNode:
     # Every line starts with '>' possibly followed by space
     lines = block.split("\n")
-    stripped = [re.sub(r"^>\s?", "", line) for line in lines]
+    stripped = [_QUOTE_PREFIX_RE.sub("", line) for line in lines]
     # Join with newlines to preserve line breaks inside the quote
     content = "\n".join(stripped)
-    return ParentNode("blockquote", text_to_children(content))
+    return ParentNode("blockquote", text_to_children(content, ctx))
 
-def _render_ul(block: str) -> ParentNode:
+def _render_ul(block: str, ctx: RenderContext) -> ParentNode:
     # Each line starts with "- "
     lines = [re.sub(r"^- ", "", line) for line in block.split("\n")]
-    li_children = [ParentNode("li", text_to_children(line)) for line in lines]
+    li_children = [ParentNode("li", text_to_children(line, ctx)) for line in lines]
     return ParentNode("ul", li_children)
 
-def _render_ol(block: str) -> ParentNode:
+def _render_ol(block: str, ctx: RenderContext) -> ParentNode:
     # Lines like "1. item", "2. item", incrementing numbers
-    lines = [re.sub(r"^\d+\.\s", "", line) for line in block.split("\n")]
-    li_children = [ParentNode("li", text_to_children(line)) for line in lines]
+    lines = [_OL_PREFIX_RE.sub("", line) for line in block.split("\n")]
+    li_children = [ParentNode("li", text_to_children(line, ctx)) for line in lines]
     return ParentNode("ol", li_children)
 
-def _render_code(block: str) -> ParentNode:
+def _render_code(block: str, ctx: RenderContext) -> ParentNode:
     lines = block.split("\n")
+    lang = ""
     if lines and lines[0].startswith("```"):
+        # The info string after the opening fence names the language
+        if len(lines) > 1:
+            lang = language(lines[0][3:])
         lines = lines[1:]
     if lines and lines[-1].startswith("```"):
         lines = lines[:-1]
@@ -274,37 +389,295 @@ def _render_code(block: str) -> ParentNode:
     # Ensure trailing newline
     if not code_text.endswith("\n"):
         code_text += "\n"
-    code_leaf = LeafNode(tag="code", value=code_text)
-    return ParentNode("pre", [code_leaf])
+    if not lang:
+        return ParentNode("pre", [LeafNode(tag="code", value=code_text)])
+    props = {"class": f"language-{lang}"}
+    if lang in LEXERS:
+        code_text = Markup(_highlight_cached(code_text, lang, ctx))
+    return ParentNode("pre", [LeafNode(tag="code", value=code_text, props=props)])
+
+
+def _highlight_cached(code: str, lang: str, ctx: RenderContext) -> str:
+    """highlight() memoized by (language, code hash) in ctx.cache, so it persists with the block cache."""
+    cache = ctx.cache
+    if cache is None:
+        return highlight(code, lang)
+    key = cache.key(code, f"highlight\0{lang}")
+    html = cache.get(key)
+    if html is None:
+        html = highlight(code, lang)
+        cache.put(key, html)
+    return html
+
+# ---------- block kinds ----------
+class BlockKind:
+    """
+    A kind of block: the characters a block of this kind can start with, an
+    optional `match(block, lines)` confirming a block that starts with one of
+    them (lines is block.split("\n"), or None when the caller hasn't split it)
+    and `render(block, ctx)` returning its HTMLNode.
+    """
+    __slots__ = ("type", "first", "match", "render")
+
+    def __init__(self, type, first: str, match, render):
+        self.type = type
+        self.first = first
+        self.match = match
+        self.render = render
+
+
+# First character -> kinds that can start with it, most recently registered first
+_KINDS_BY_FIRST: dict[str, list[BlockKind]] = {}
+_BLOCK_RENDERERS = {BlockType.PARAGRAPH: _render_paragraph}
+# Digest of the registered kinds, updated by (un)register_block_kind
+_kinds_version = ""
+
+
+def _qualname(fn) -> str:
+    if fn is None:
+        return ""
+    return f"{getattr(fn, '__module__', '')}.{getattr(fn, '__qualname__', repr(fn))}"
+
+
+def _update_kinds_version() -> None:
+    global _kinds_version
+    kinds = {kind for kinds in _KINDS_BY_FIRST.values() for kind in kinds}
+    signature = sorted(
+        f"{kind.type!r}\0{kind.first}\0{_qualname(kind.render)}\0{_qualname(kind.match)}" for kind in kinds
+    )
+    _kinds_version = hashlib.blake2b("\n".join(signature).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def register_block_kind(type, first: str, render, match=None) -> BlockKind:
+    """
+    Add a kind of block. `type` is what classification returns for it: a
+    BlockType for the built-in kinds, any other hashable value (e.g. "table")
+    for new ones. Classification looks the block's first character up in
+    `first`, so a kind only costs anything for blocks that start with one of
+    its characters; kinds registered later are tried first, which lets a new
+    kind claim blocks from a built-in one. Registering a type again replaces it.
+
+    Register kinds when your module is imported, so page worker processes have
+    them too. The registered kinds are part of every block cache key (see
+    RenderContext.cache_key), so cached HTML from before a kind was added,
+    removed or given another renderer is not reused.
+    """
+    if type == BlockType.PARAGRAPH:
+        raise ValueError("Paragraphs are what no block kind matches; they can't be registered")
+    if not first:
+        raise ValueError("A block kind needs at least one first character")
+    unregister_block_kind(type)
+    kind = BlockKind(type, first, match, render)
+    for ch in first:
+        _KINDS_BY_FIRST.setdefault(ch, []).insert(0, kind)
+    _BLOCK_RENDERERS[type] = render
+    _update_kinds_version()
+    return kind
+
+
+def unregister_block_kind(type) -> None:
+    """Remove a kind added with register_block_kind; its blocks become paragraphs."""
+    for ch, kinds in list(_KINDS_BY_FIRST.items()):
+        kinds[:] = [kind for kind in kinds if kind.type != type]
+        if not kinds:
+            del _KINDS_BY_FIRST[ch]
+    if type != BlockType.PARAGRAPH:
+        _BLOCK_RENDERERS.pop(type, None)
+    _update_kinds_version()
+
+
+def _is_code(block: str, lines) -> bool:
+    # Starts with ``` and ends with ```
+    return block.startswith("```") and block.endswith("```")
+
+
+def _is_heading(block: str, lines) -> bool:
+    # 1–6 '#' followed by a space, then text
+    return _HEADING_RE.match(block) is not None
+
+
+def _is_quote(block: str, lines) -> bool:
+    # Every line starts with '>'
+    return all(line.startswith(">") for line in lines or block.split("\n"))
+
+
+def _is_ul(block: str, lines) -> bool:
+    # Every line starts with "- " (dash + space)
+    return all(line.startswith("- ") for line in lines or block.split("\n"))
+
+
+def _is_ol(block: str, lines) -> bool:
+    # Lines start with "1. ", "2. ", ... incrementing by 1
+    for i, line in enumerate(lines or block.split("\n"), start=1):
+        if not line.startswith(f"{i}. "):
+            return False
+    return True
+
+
+register_block_kind(BlockType.CODE, "`", _render_code, _is_code)
+register_block_kind(BlockType.HEADING, "#", _render_heading, _is_heading)
+register_block_kind(BlockType.QUOTE, ">", _render_quote, _is_quote)
+register_block_kind(BlockType.UNORDERED_LIST, "-", _render_ul, _is_ul)
+register_block_kind(BlockType.ORDERED_LIST, "1", _render_ol, _is_ol)
+
 
 # ---------- main entry ----------
-def markdown_to_html_node(markdown: str) -> ParentNode:
+def markdown_to_html_node(markdown: str, ctx: RenderContext | None = None) -> ParentNode:
     """
     Convert a full Markdown document into a single parent HTML node (<div>),
     with one child per block.
     """
+    if ctx is None:
+        ctx = _DEFAULT_CONTEXT
+    if ctx.timer is not None:
+        return _markdown_to_html_node_timed(markdown, ctx)
     blocks = markdown_to_blocks(markdown)
-    children = []
+    if ctx.cache is not None:
+        return ParentNode("div", [_render_block_cached(block, ctx) for block in blocks])
+    # markdown_to_blocks drops empty blocks, so they can be classified directly
+    renderers = _BLOCK_RENDERERS
+    return ParentNode("div", [renderers[_classify(block, None)](block, ctx) for block in blocks])
+
+
+def _render_block_cached(block: str, ctx: RenderContext, btype: BlockType | None = None) -> LeafNode:
+    """Render a block through ctx.cache; the rendered HTML is kept as a Markup leaf."""
+    cache = ctx.cache
+    key = cache.key(block, ctx.cache_key())
+    html = cache.get(key)
+    if html is None:
+        if btype is None:
+            btype = block_to_block_type(block)
+        html = _BLOCK_RENDERERS[btype](block, ctx).to_html()
+        cache.put(key, html)
+    elif ctx.images is not None and "<img" in html:
+        ctx.seen_image = True
+    return LeafNode(value=Markup(html))
+
+
+def _markdown_to_html_node_timed(markdown: str, ctx: RenderContext) -> ParentNode:
+    """markdown_to_html_node with each stage recorded on ctx.timer."""
+    timer = ctx.timer
+    start = perf_counter()
+    blocks = markdown_to_blocks(markdown)
+    timer.add("block_split", perf_counter() - start)
 
+    children = []
+    classify = render = 0.0
+    inline_before = timer.stages["inline_parse"]
     for block in blocks:
+        t0 = perf_counter()
+        if ctx.cache is not None:
+            # Classification only happens on a miss; count it all as rendering
+            children.append(_render_block_cached(block, ctx))
+            render += perf_counter() - t0
+            continue
         btype = block_to_block_type(block)
-        if btype.name == "HEADING":
-            children.append(_render_heading(block))
-        elif btype.name == "QUOTE":
-            children.append(_render_quote(block))
-        elif btype.name == "UNORDERED_LIST":
-            children.append(_render_ul(block))
-        elif btype.name == "ORDERED_LIST":
-            children.append(_render_ol(block))
-        elif btype.name == "CODE":
-            children.append(_render_code(block))
-        else:  # PARAGRAPH
-            children.append(_render_paragraph(block))
-
-    # Wrap all block nodes in a single container <div>
+        t1 = perf_counter()
+        children.append(_BLOCK_RENDERERS[btype](block, ctx))
+        classify += t1 - t0
+        render += perf_counter() - t1
+    timer.add("block_classify", classify)
+    # Block rendering time excludes the inline parsing recorded inside it
+    timer.add("block_render", render - (timer.stages["inline_parse"] - inline_before))
     return ParentNode("div", children)
 
-import re
+# ---------- streaming ----------
+class BlockScanner:
+    """
+    Single-pass block scanner over an iterable of lines, e.g. an open text file.
+
+    Iterating yields (BlockType, block) pairs equal to classifying
+    markdown_to_blocks() of the whole text, while holding only one block in
+    memory. The page title is not tracked here: it is needed before the body
+    is written, so it comes from frontmatter.read_meta.
+    """
+
+    def __init__(self, lines):
+        self._lines = lines
+
+    def __iter__(self):
+        pending = []
+        for line in self._lines:
+            line = line.rstrip("\r\n")
+            # Blank lines (spaces/tabs only) separate blocks
+            if not line.strip(" \t"):
+                if pending:
+                    block = self._finish(pending)
+                    if block is not None:
+                        yield block
+                    pending = []
+                continue
+            pending.append(line)
+        if pending:
+            block = self._finish(pending)
+            if block is not None:
+                yield block
+
+    @staticmethod
+    def _finish(lines: list[str]) -> tuple[BlockType, str] | None:
+        block = "\n".join(lines).strip()
+        if not block:
+            return None
+        # The stripped block only differs from `lines` at its ends
+        if lines[0][:1].isspace() or lines[-1][-1:].isspace():
+            lines = block.split("\n")
+        return _classify(block, lines), block
+
+
+def render_block(block: str, btype: BlockType | None = None, ctx: RenderContext | None = None):
+    """Render one block to its HTML node, through ctx.cache when there is one."""
+    if ctx is None:
+        ctx = _DEFAULT_CONTEXT
+    if ctx.cache is not None:
+        return _render_block_cached(block, ctx, btype)
+    if btype is None:
+        btype = block_to_block_type(block)
+    return _BLOCK_RENDERERS[btype](block, ctx)
+
+
+class StreamedDocument:
+    """
+    The <div> around a document's blocks, rendered one block at a time as it
+    is written. Behaves like the node markdown_to_html_node returns for
+    write_html/iter_html, but can only be written once.
+    """
+
+    def __init__(self, scanner: BlockScanner, ctx: RenderContext | None = None):
+        self.scanner = scanner
+        self.ctx = ctx
+
+    def iter_html(self):
+        yield "<div>"
+        empty = True
+        for btype, block in self.scanner:
+            empty = False
+            yield from render_block(block, btype, self.ctx).iter_html()
+        if empty:
+            raise ValueError("Children are missing")
+        yield "</div>"
+
+    def write_html(self, fp):
+        write = fp.write
+        for chunk in self.iter_html():
+            write(chunk)
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+
+_TITLE_RE = re.compile(r"^# (.+)$")
+
+
+def find_title(lines) -> str | None:
+    """First H1 in an iterable of lines (stopping as soon as it is found), or None."""
+    for line in lines:
+        # Match exactly one leading '#', followed by a space and text
+        if "# " in line:
+            m = _TITLE_RE.match(line.strip())
+            if m:
+                return m.group(1).strip()
+    return None
+
 
 def extract_title(markdown: str) -> str:
     """
@@ -318,10 +691,7 @@ def extract_title(markdown: str) -> str:
     # Normalize line endings and split
     lines = markdown.replace("\r\n", "\n").replace("\r", "\n").split("\n")
 
-    for line in lines:
-        # Match exactly one leading '#', followed by a space and text
-        m = re.match(r"^# (.+)$", line.strip())
-        if m:
-            return m.group(1).strip()
-
-    raise ValueError("No H1 header found in markdown")
+    title = find_title(lines)
+    if title is None:
+        raise ValueError("No H1 header found in markdown")
+    return title